@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+Compare the selective appmanifest field extractor against a full vdf.load
+
+Generates a corpus of realistic appmanifest_*.acf files (with
+InstalledDepots, UserConfig, MountedConfig, ... sections) in a temporary
+directory and times reading name/appid/SizeOnDisk from all of them.
+
+Usage:
+    python benchmarks/bench_manifest_parse.py --count 2000 --depots 20
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+import vdf
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+)
+from steam_vdf import parser, storage  # noqa: E402
+
+
+def make_manifest(app_id, depots, rng):
+    """Build a manifest dict shaped like the ones Steam writes"""
+    installed_depots = {
+        str(app_id + i + 1): {
+            "manifest": str(rng.getrandbits(63)),
+            "size": str(rng.randrange(10**6, 10**10)),
+        }
+        for i in range(depots)
+    }
+    return {
+        "AppState": {
+            "appid": str(app_id),
+            "universe": "1",
+            "LauncherPath": "/home/deck/.local/share/Steam/ubuntu12_32/steam",
+            "name": f"Synthetic Game {app_id}",
+            "StateFlags": "4",
+            "installdir": f"Synthetic Game {app_id}",
+            "LastUpdated": str(rng.randrange(1_600_000_000, 1_700_000_000)),
+            "SizeOnDisk": str(rng.randrange(10**8, 10**11)),
+            "StagingSize": "0",
+            "buildid": str(rng.randrange(10**6, 10**7)),
+            "LastOwner": "76561197960287930",
+            "AutoUpdateBehavior": "0",
+            "AllowOtherDownloadsWhileRunning": "0",
+            "ScheduledAutoUpdate": "0",
+            "InstalledDepots": installed_depots,
+            "SharedDepots": {"228988": "228980", "228990": "228980"},
+            "UserConfig": {"language": "english", "BetaKey": "public"},
+            "MountedConfig": {"language": "english", "BetaKey": "public"},
+        }
+    }
+
+
+def write_corpus(directory, count, depots, seed=0):
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        app_id = 10 + i * 10
+        path = os.path.join(directory, f"appmanifest_{app_id}.acf")
+        with open(path, "w", encoding="utf-8") as f:
+            vdf.dump(make_manifest(app_id, depots, rng), f, pretty=True)
+        paths.append(path)
+    return paths
+
+
+def full_parse(path):
+    with open(path, "r", encoding="utf-8") as f:
+        app_data = vdf.load(f).get("AppState", {})
+    return {key: app_data[key] for key in storage.MANIFEST_FIELDS}
+
+
+def fast_parse(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return parser.extract_fields(f, ("AppState",), storage.MANIFEST_FIELDS)
+
+
+def best_of(func, paths, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in paths:
+            func(path)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--count", type=int, default=2000)
+    arg_parser.add_argument("--depots", type=int, default=20)
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_corpus(directory, args.count, args.depots)
+
+        # Both readers must agree before timing means anything
+        for path in paths:
+            assert full_parse(path) == fast_parse(path), path
+
+        full = best_of(full_parse, paths, args.repeat)
+        fast = best_of(fast_parse, paths, args.repeat)
+
+    print(f"manifests:      {args.count} ({args.depots} depots each)")
+    print(f"vdf.load:       {full * 1000:8.1f} ms")
+    print(f"extract_fields: {fast * 1000:8.1f} ms")
+    print(f"speedup:        {full / fast:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""
+Measure steam-vdf startup cost with python -X importtime
+
+Runs the CLI in fresh interpreters (by default for "view" on a small text
+VDF and for --help) and reports the cumulative import time of the
+steam_vdf.cli entry point, the wall time of the whole process and the
+slowest imports. With --max-import-ms it exits non-zero when the import
+time is above the budget, so the check can run in CI.
+
+Usage:
+    python benchmarks/bench_startup.py --repeat 10 --top 10
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+
+# import time: self [us] | cumulative | imported package
+_IMPORTTIME_RE = re.compile(
+    r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$"
+)
+
+# Runs the CLI the way the steam-vdf entry point does
+_RUN_CLI = (
+    "import sys; from steam_vdf import cli; "
+    "sys.argv[0] = 'steam-vdf'; cli.main()"
+)
+
+
+def parse_importtime(stderr):
+    """Return {module: (self_us, cumulative_us)} from -X importtime output"""
+    modules = {}
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, _, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def run_once(cli_args):
+    """Run the CLI once; return (wall seconds, importtime modules)"""
+    env = dict(os.environ, PYTHONPATH=SRC)
+    command = [sys.executable, "-X", "importtime", "-c", _RUN_CLI]
+    command.extend(cli_args)
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        command,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+    return wall, parse_importtime(result.stderr)
+
+
+def measure(cli_args, repeat):
+    walls = []
+    cli_import = []
+    slowest = {}
+    for _ in range(repeat):
+        wall, modules = run_once(cli_args)
+        walls.append(wall)
+        cli_import.append(modules.get("steam_vdf.cli", (0, 0))[1])
+        for name, (self_us, _) in modules.items():
+            slowest[name] = min(slowest.get(name, self_us), self_us)
+    return statistics.median(walls), statistics.median(cli_import), slowest
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    arg_parser.add_argument("--top", type=int, default=10)
+    arg_parser.add_argument(
+        "--max-import-ms",
+        type=float,
+        help="Fail if importing steam_vdf.cli takes longer than this",
+    )
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        vdf_path = os.path.join(directory, "test.vdf")
+        with open(vdf_path, "w", encoding="utf-8") as f:
+            f.write('"root"\n{\n\t"key"\t\t"value"\n}\n')
+
+        cases = {
+            "view": ["view", vdf_path],
+            "--help": ["--help"],
+        }
+
+        over_budget = False
+        for label, cli_args in cases.items():
+            wall, cli_us, modules = measure(cli_args, args.repeat)
+            print(f"{label}:")
+            print(f"  process wall time:   {wall * 1000:8.1f} ms")
+            print(f"  steam_vdf.cli import:{cli_us / 1000:8.1f} ms")
+            print(f"  modules imported:    {len(modules):8d}")
+            print("  slowest imports (self time):")
+            top = sorted(modules.items(), key=lambda m: m[1], reverse=True)
+            for name, self_us in top[: args.top]:
+                print(f"    {self_us / 1000:7.2f} ms  {name}")
+
+            if args.max_import_ms and cli_us / 1000 > args.max_import_ms:
+                over_budget = True
+
+    if over_budget:
+        print(f"steam_vdf.cli import is over {args.max_import_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
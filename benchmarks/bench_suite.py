@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+"""
+Time the main steam-vdf operations on a synthetic Steam install
+
+Generates a Steam tree of the requested scale (see steam_tree.py) and runs
+every benchmark case several times, each in a fresh interpreter so that
+caches and peak RSS do not leak between runs. Wall time and peak RSS are
+written to a JSON file; --compare prints the change against an earlier
+results file.
+
+Usage:
+    python benchmarks/bench_suite.py --manifests 2000 --users 5 \\
+        --output results.json --compare previous.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+)
+from steam_tree import generate_steam_tree, load_tree  # noqa: E402
+
+from steam_vdf import storage, users, utils  # noqa: E402
+
+
+def _cli_args():
+    return argparse.Namespace(
+        debug=False, dump_vdfs=False, output="text", user=None
+    )
+
+
+def bench_find_steam_library_folders(tree):
+    users.find_steam_library_folders(_cli_args())
+
+
+def bench_get_installed_games(tree):
+    for library in tree["libraries"]:
+        storage.get_installed_games(library)
+
+
+def bench_get_non_steam_usage(tree):
+    storage.get_non_steam_usage(tree["steam"])
+
+
+def bench_get_recent_games(tree):
+    userdata = os.path.join(tree["steam"], "userdata")
+    for user_id in tree["users"]:
+        users.get_recent_games(userdata, user_id)
+
+
+def bench_list_shortcuts(tree):
+    users.list_shortcuts(_cli_args(), tree["steam"])
+
+
+def bench_view_vdf(tree):
+    localconfig = os.path.join(
+        tree["steam"],
+        "userdata",
+        tree["users"][0],
+        "config",
+        "localconfig.vdf",
+    )
+    utils.view_vdf(localconfig, "json")
+
+
+CASES = {
+    name[len("bench_") :]: func
+    for name, func in globals().items()
+    if name.startswith("bench_")
+}
+
+
+def _peak_rss_kib():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_case(name, home):
+    """Run one case in this process and print its measurements as JSON"""
+    tree = load_tree(home)
+    os.environ["HOME"] = home
+    baseline = _peak_rss_kib()
+
+    with open(os.devnull, "w") as devnull:
+        with contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            CASES[name](tree)
+            wall = time.perf_counter() - start
+
+    print(
+        json.dumps(
+            {
+                "wall_s": wall,
+                "peak_rss_kib": _peak_rss_kib(),
+                "baseline_rss_kib": baseline,
+            }
+        )
+    )
+
+
+def measure(name, home, repeat):
+    runs = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, __file__, "--run-case", name, "--tree", home],
+            check=True,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        runs.append(json.loads(result.stdout.splitlines()[-1]))
+
+    walls = [run["wall_s"] for run in runs]
+    return {
+        "wall_s": walls,
+        "median_wall_s": statistics.median(walls),
+        "peak_rss_kib": max(run["peak_rss_kib"] for run in runs),
+        "baseline_rss_kib": min(run["baseline_rss_kib"] for run in runs),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(results, previous):
+    print(f"\ncompared with {previous.get('commit') or 'previous run'}:")
+    for name, result in results.items():
+        before = previous.get("results", {}).get(name)
+        if not before:
+            continue
+        ratio = result["median_wall_s"] / before["median_wall_s"]
+        rss = result["peak_rss_kib"] - before["peak_rss_kib"]
+        print(f"  {name:30s} {ratio:6.2f}x time  {rss:+8d} KiB peak RSS")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    arg_parser.add_argument("--libraries", type=int, default=2)
+    arg_parser.add_argument("--manifests", type=int, default=500)
+    arg_parser.add_argument("--users", type=int, default=3)
+    arg_parser.add_argument("--shortcuts", type=int, default=50)
+    arg_parser.add_argument("--localconfig-apps", type=int, default=5000)
+    arg_parser.add_argument("--other-dirs", type=int, default=20)
+    arg_parser.add_argument("--files-per-dir", type=int, default=50)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    arg_parser.add_argument(
+        "--case",
+        action="append",
+        choices=sorted(CASES),
+        help="Case to run, can be repeated (default: all)",
+    )
+    arg_parser.add_argument(
+        "--tree",
+        help="Directory to generate the Steam tree in, or to reuse a tree "
+        "from (default: a temporary directory)",
+    )
+    arg_parser.add_argument("--output", default="bench-results.json")
+    arg_parser.add_argument(
+        "--compare", help="Earlier results file to compare against"
+    )
+    arg_parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.run_case:
+        run_case(args.run_case, args.tree)
+        return
+
+    with contextlib.ExitStack() as stack:
+        home = args.tree
+        if home is None:
+            home = stack.enter_context(tempfile.TemporaryDirectory())
+        if os.path.exists(os.path.join(home, "tree.json")):
+            tree = load_tree(home)
+        else:
+            start = time.perf_counter()
+            tree = generate_steam_tree(
+                os.path.abspath(home),
+                libraries=args.libraries,
+                manifests=args.manifests,
+                users=args.users,
+                shortcuts=args.shortcuts,
+                localconfig_apps=args.localconfig_apps,
+                other_dirs=args.other_dirs,
+                files_per_dir=args.files_per_dir,
+            )
+            print(f"generated tree in {time.perf_counter() - start:.1f} s")
+
+        results = {}
+        for name in args.case or sorted(CASES):
+            results[name] = measure(name, tree["home"], args.repeat)
+            print(
+                f"{name:30s} {results[name]['median_wall_s'] * 1000:9.1f} ms"
+                f"  {results[name]['peak_rss_kib']:8d} KiB peak RSS"
+            )
+
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "scale": tree["scale"],
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            print_comparison(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
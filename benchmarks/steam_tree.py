@@ -0,0 +1,185 @@
+"""
+Generate synthetic Steam installs for benchmarking
+
+The tree is laid out like a Linux install under a fake home directory:
+
+    home/.local/share/Steam/           main library, config and userdata
+    home/.local/share/<App>/...        non-Steam directories next to Steam
+    home/SteamLibrary<N>/steamapps/    additional libraries
+
+A tree.json file at the top describes what was generated.
+"""
+
+import json
+import os
+import random
+
+import vdf
+from bench_manifest_parse import make_manifest
+
+STEAM64_BASE = 76561197960265728
+
+
+def generate_steam_tree(
+    home,
+    libraries=2,
+    manifests=500,
+    users=3,
+    shortcuts=50,
+    localconfig_apps=5000,
+    depots=10,
+    other_dirs=20,
+    files_per_dir=50,
+    seed=0,
+):
+    """
+    Write a synthetic Steam install under home. manifests are spread over
+    the libraries, every user gets shortcuts shortcuts and a localconfig.vdf
+    with localconfig_apps apps, and other_dirs directory trees of
+    files_per_dir files each are created next to the Steam directory.
+    Returns the description that is also saved as tree.json.
+    """
+    rng = random.Random(seed)
+    steam = os.path.join(home, ".local", "share", "Steam")
+    library_paths = [steam] + [
+        os.path.join(home, f"SteamLibrary{i}") for i in range(1, libraries)
+    ]
+
+    for library in library_paths:
+        os.makedirs(os.path.join(library, "steamapps"), exist_ok=True)
+    os.makedirs(os.path.join(steam, "config"), exist_ok=True)
+
+    _write_text_vdf(
+        os.path.join(steam, "steamapps", "libraryfolders.vdf"),
+        {
+            "libraryfolders": {
+                str(i): {"path": path, "label": ""}
+                for i, path in enumerate(library_paths)
+            }
+        },
+    )
+
+    for i in range(manifests):
+        app_id = 10 + i * 10
+        library = library_paths[i % len(library_paths)]
+        _write_text_vdf(
+            os.path.join(library, "steamapps", f"appmanifest_{app_id}.acf"),
+            make_manifest(app_id, depots, rng),
+        )
+
+    user_ids = [str(100000 + i) for i in range(users)]
+    _write_text_vdf(
+        os.path.join(steam, "config", "loginusers.vdf"),
+        {
+            "users": {
+                str(STEAM64_BASE + int(user_id)): {
+                    "AccountName": f"user{user_id}",
+                    "PersonaName": f"Synthetic User {user_id}",
+                    "MostRecent": "0",
+                }
+                for user_id in user_ids
+            }
+        },
+    )
+
+    for user_id in user_ids:
+        config = os.path.join(steam, "userdata", user_id, "config")
+        os.makedirs(config, exist_ok=True)
+        _write_text_vdf(
+            os.path.join(config, "localconfig.vdf"),
+            make_localconfig(localconfig_apps, rng),
+        )
+        with open(os.path.join(config, "shortcuts.vdf"), "wb") as f:
+            f.write(vdf.binary_dumps(make_shortcuts(shortcuts, rng)))
+
+    share = os.path.dirname(steam)
+    for i in range(other_dirs):
+        directory = os.path.join(share, f"App{i}", "data", "nested")
+        os.makedirs(directory, exist_ok=True)
+        for j in range(files_per_dir):
+            parent = directory if j % 2 else os.path.dirname(directory)
+            with open(os.path.join(parent, f"file{j}.bin"), "wb") as f:
+                f.write(b"\0" * rng.randrange(0, 16384))
+
+    tree = {
+        "home": home,
+        "steam": steam,
+        "libraries": library_paths,
+        "users": user_ids,
+        "scale": {
+            "libraries": libraries,
+            "manifests": manifests,
+            "users": users,
+            "shortcuts": shortcuts,
+            "localconfig_apps": localconfig_apps,
+            "depots": depots,
+            "other_dirs": other_dirs,
+            "files_per_dir": files_per_dir,
+            "seed": seed,
+        },
+    }
+    with open(os.path.join(home, "tree.json"), "w", encoding="utf-8") as f:
+        json.dump(tree, f, indent=2)
+    return tree
+
+
+def load_tree(home):
+    """Return the description of a tree written by generate_steam_tree"""
+    with open(os.path.join(home, "tree.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def make_localconfig(apps, rng):
+    """Build a localconfig.vdf dict with per-app play data"""
+    return {
+        "UserLocalConfigStore": {
+            "friends": {
+                str(rng.getrandbits(32)): {"name": f"Friend {i}"}
+                for i in range(200)
+            },
+            "Software": {
+                "Valve": {
+                    "Steam": {
+                        "apps": {
+                            str(10 + i * 10): {
+                                "LastPlayed": str(
+                                    rng.randrange(1_500_000_000, 1_700_000_000)
+                                ),
+                                "Playtime": str(rng.randrange(0, 100_000)),
+                                "cloud": {
+                                    "last_sync_state": "synchronized",
+                                    "quota_files": str(rng.randrange(100)),
+                                },
+                            }
+                            for i in range(apps)
+                        }
+                    }
+                }
+            },
+        }
+    }
+
+
+def make_shortcuts(count, rng):
+    """Build a shortcuts.vdf dict with count entries"""
+    return {
+        "shortcuts": {
+            str(i): {
+                "appid": rng.randrange(-(2**31), 0),
+                "AppName": f"Shortcut {i}",
+                "Exe": f'"/opt/games/game{i}/run.sh"',
+                "StartDir": f'"/opt/games/game{i}"',
+                "icon": "",
+                "LaunchOptions": "",
+                "IsHidden": 0,
+                "LastPlayTime": rng.randrange(0, 1_700_000_000),
+                "tags": {"0": "synthetic"},
+            }
+            for i in range(count)
+        }
+    }
+
+
+def _write_text_vdf(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        vdf.dump(data, f, pretty=True)
@@ -0,0 +1,429 @@
+import array
+import hashlib
+import logging
+import mmap
+import os
+import struct
+from collections.abc import Mapping
+
+import vdf
+
+from steam_vdf import binary, cache, formats, profiling
+
+logger = logging.getLogger("cli")
+
+# Bump when the layout of the sidecar index changes
+INDEX_VERSION = 1
+
+_HEADER = struct.Struct("<II")  # magic, universe
+_STRING_TABLE_OFFSET = struct.Struct("<q")  # appinfo v29+
+_UINT32 = struct.Struct("<I")
+
+# Per app, after the app ID and record size: info state, last updated,
+# PICS token, SHA-1 of the text KeyValues and change number. v28 and later
+# add the SHA-1 of the binary KeyValues.
+_APP_FIELDS_SIZE = 4 + 4 + 8 + 20 + 4
+_APP_BINARY_SHA_SIZE = 20
+# Per package, after the package ID: SHA-1 and change number; v40 adds
+# the PICS token
+_PACKAGE_FIELDS_SIZE = 20 + 4
+_PACKAGE_TOKEN_SIZE = 8
+_PACKAGE_LIST_END = 0xFFFFFFFF
+
+# magic, index version, source magic, source size, source mtime_ns, count
+_INDEX_HEADER = struct.Struct("<4sIIqqI")
+_INDEX_MAGIC = b"SVAI"
+
+
+def get_appinfo_path(steam_root):
+    """Path of the app metadata cache of a Steam install"""
+    return os.path.join(steam_root, "appcache", "appinfo.vdf")
+
+
+def get_packageinfo_path(steam_root):
+    """Path of the package metadata cache of a Steam install"""
+    return os.path.join(steam_root, "appcache", "packageinfo.vdf")
+
+
+class AppInfo(Mapping):
+    """
+    Indexed reader for Steam's appinfo.vdf and packageinfo.vdf caches.
+
+    The file is memory mapped and indexed once: only the fixed record
+    headers are read to find where the binary KeyValues of every app (or
+    package) start and end. The index is saved as a sidecar file in the
+    steam-vdf cache directory, keyed on the size and mtime of the source,
+    so later runs do not scan the file at all. Records are decoded when
+    they are looked up and are not kept.
+
+    Keys are app (or package) IDs as strings, like everywhere else in
+    Steam's files; lookups also accept ints. Use it as a context manager
+    or call close().
+    """
+
+    def __init__(self, path, use_cache=True):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._buf = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+            self._read_header()
+            self._load_index(use_cache)
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        buf = getattr(self, "_buf", None)
+        if buf is not None:
+            buf.close()
+        self._file.close()
+
+    def _read_header(self):
+        if len(self._buf) < _HEADER.size:
+            raise SyntaxError(f"{self.path} is too short for a header")
+        self.magic, self.universe = _HEADER.unpack_from(self._buf)
+        self._key_table = None
+        self._records_start = _HEADER.size
+
+        if self.magic in formats.APPINFO_MAGICS:
+            self.format = formats.APPINFO
+            self.version = formats.APPINFO_MAGICS[self.magic]
+            if self.version >= 29:
+                self._string_table_offset = _STRING_TABLE_OFFSET.unpack_from(
+                    self._buf, _HEADER.size
+                )[0]
+                self._records_start += _STRING_TABLE_OFFSET.size
+        elif self.magic in formats.PACKAGEINFO_MAGICS:
+            self.format = formats.PACKAGEINFO
+            self.version = formats.PACKAGEINFO_MAGICS[self.magic]
+        else:
+            raise SyntaxError(
+                f"{self.path} is not an appinfo or packageinfo file "
+                f"(magic {self.magic:#010x})"
+            )
+
+    def _load_index(self, use_cache):
+        st = os.fstat(self._file.fileno())
+        stamp = (st.st_size, st.st_mtime_ns)
+        index_path = get_index_path(self.path) if use_cache else None
+
+        loaded = _read_index(index_path, self.magic, stamp)
+        if loaded is None:
+            with profiling.phase("appinfo index"):
+                loaded = self._build_index()
+            if index_path is not None:
+                _write_index(index_path, self.magic, stamp, *loaded)
+        self._ids, self._offsets, self._sizes = loaded
+        self._positions = None
+
+    def _build_index(self):
+        """Scan the record headers, returning (ids, offsets, sizes)"""
+        profiling.count_parsed(self._file)
+        ids = array.array("I")
+        offsets = array.array("Q")
+        sizes = array.array("I")
+        if self.format == formats.APPINFO:
+            records = self._iter_app_records()
+        else:
+            records = self._iter_package_records()
+        for record_id, offset, size in records:
+            ids.append(record_id)
+            offsets.append(offset)
+            sizes.append(size)
+        return ids, offsets, sizes
+
+    def _iter_app_records(self):
+        buf = self._buf
+        end = len(buf)
+        if self.version >= 29:
+            end = self._string_table_offset
+        fields_size = _APP_FIELDS_SIZE
+        if self.version >= 28:
+            fields_size += _APP_BINARY_SHA_SIZE
+
+        pos = self._records_start
+        while pos + 4 <= end:
+            app_id = _UINT32.unpack_from(buf, pos)[0]
+            if app_id == 0:
+                return
+            if pos + 8 > end:
+                break
+            size = _UINT32.unpack_from(buf, pos + 4)[0]
+            data_start = pos + 8 + fields_size
+            data_end = pos + 8 + size
+            if data_end > end or data_start > data_end:
+                raise SyntaxError(f"Truncated record for app {app_id}")
+            yield app_id, data_start, data_end - data_start
+            pos = data_end
+        raise SyntaxError("Reached EOF before the end of the app list")
+
+    def _iter_package_records(self):
+        buf = self._buf
+        fields_size = _PACKAGE_FIELDS_SIZE
+        if self.version >= 40:
+            fields_size += _PACKAGE_TOKEN_SIZE
+
+        pos = self._records_start
+        while pos + 4 <= len(buf):
+            package_id = _UINT32.unpack_from(buf, pos)[0]
+            if package_id == _PACKAGE_LIST_END:
+                return
+            # Package records do not store their size, so the KeyValues
+            # have to be walked (not decoded) to find the next record
+            data_start = pos + 4 + fields_size
+            data_end = _skip_map(buf, data_start)
+            yield package_id, data_start, data_end - data_start
+            pos = data_end
+        raise SyntaxError("Reached EOF before the end of the package list")
+
+    def _position(self, key):
+        if self._positions is None:
+            self._positions = {
+                record_id: i for i, record_id in enumerate(self._ids)
+            }
+        try:
+            return self._positions[int(key)]
+        except (TypeError, ValueError):
+            raise KeyError(key) from None
+
+    def __getitem__(self, key):
+        i = self._position(key)
+        start = self._offsets[i]
+        return _decode_map(
+            self._buf, start, start + self._sizes[i], self._key_reader()
+        )
+
+    def __iter__(self):
+        return (str(record_id) for record_id in self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, key):
+        try:
+            self._position(key)
+        except KeyError:
+            return False
+        return True
+
+    def name(self, app_id):
+        """Return the name of an app, or None if it is not known"""
+        try:
+            record = self[app_id]
+        except KeyError:
+            return None
+        common = record.get("appinfo", {}).get("common", {})
+        name = common.get("name")
+        return name if isinstance(name, str) else None
+
+    def names(self, app_ids):
+        """Return {app_id: name} for those of app_ids that have a name"""
+        names = {}
+        for app_id in app_ids:
+            name = self.name(app_id)
+            if name is not None:
+                names[app_id] = name
+        return names
+
+    def _key_reader(self):
+        """Return a function reading a key at an offset: (key, next pos)"""
+        if self.format == formats.APPINFO and self.version >= 29:
+            table = self._load_key_table()
+
+            def read_table_key(buf, pos):
+                return table[_UINT32.unpack_from(buf, pos)[0]], pos + 4
+
+            return read_table_key
+        return _read_cstring_key
+
+    def _load_key_table(self):
+        """appinfo v29 stores every key once, in a table at the end"""
+        if self._key_table is None:
+            buf = self._buf
+            pos = self._string_table_offset
+            count = _UINT32.unpack_from(buf, pos)[0]
+            pos += 4
+            table = []
+            for _ in range(count):
+                key, pos = _read_cstring_key(buf, pos)
+                table.append(key)
+            self._key_table = table
+        return self._key_table
+
+
+def _find_nul(buf, pos, nul=b"\x00"):
+    end = buf.find(nul, pos)
+    if end == -1:
+        raise SyntaxError(f"Unterminated cstring (offset: {pos})")
+    return end
+
+
+def _read_cstring_key(buf, pos):
+    end = _find_nul(buf, pos)
+    return buf[pos:end].decode("utf-8", "replace"), end + 1
+
+
+def _read_value(buf, t, pos):
+    """Decode one value, returning (value, next pos)"""
+    if t == binary.BIN_STRING:
+        return _read_cstring_key(buf, pos)
+    if t == binary.BIN_WIDESTRING:
+        end = pos
+        while True:
+            end = _find_nul(buf, end, b"\x00\x00")
+            if (end - pos) % 2 == 0:
+                break
+            end += 1
+        return buf[pos:end].decode("utf-16"), end + 2
+    if t == binary.BIN_INT32:
+        return struct.unpack_from("<i", buf, pos)[0], pos + 4
+    if t == binary.BIN_POINTER:
+        return vdf.POINTER(struct.unpack_from("<i", buf, pos)[0]), pos + 4
+    if t == binary.BIN_COLOR:
+        return vdf.COLOR(struct.unpack_from("<i", buf, pos)[0]), pos + 4
+    if t == binary.BIN_FLOAT32:
+        return struct.unpack_from("<f", buf, pos)[0], pos + 4
+    if t == binary.BIN_UINT64:
+        return vdf.UINT_64(struct.unpack_from("<Q", buf, pos)[0]), pos + 8
+    if t == binary.BIN_INT64:
+        return vdf.INT_64(struct.unpack_from("<q", buf, pos)[0]), pos + 8
+    raise SyntaxError(f"Unknown data type at offset {pos - 1}: {t!r}")
+
+
+def _decode_map(buf, pos, end, read_key):
+    """
+    Decode the binary KeyValues document between pos and end into dicts.
+    Duplicate keys are merged like vdf.binary_load does.
+    """
+    root = {}
+    stack = [root]
+    while pos < end:
+        t = buf[pos]
+        pos += 1
+        if t == binary.BIN_END:
+            stack.pop()
+            if not stack:
+                break
+            continue
+
+        key, pos = read_key(buf, pos)
+        if t == binary.BIN_NONE:
+            child = stack[-1].get(key)
+            if not isinstance(child, dict):
+                child = stack[-1][key] = {}
+            stack.append(child)
+        else:
+            stack[-1][key], pos = _read_value(buf, t, pos)
+
+    if len(stack) > 1:
+        raise SyntaxError("Binary KeyValues record is incomplete")
+    return root
+
+
+def _skip_map(buf, pos):
+    """
+    Return the offset just past the binary KeyValues document at pos,
+    which must use inline keys
+    """
+    depth = 1
+    size = len(buf)
+    while pos < size:
+        t = buf[pos]
+        pos += 1
+        if t == binary.BIN_END:
+            depth -= 1
+            if depth == 0:
+                return pos
+            continue
+
+        pos = _find_nul(buf, pos) + 1
+        if t == binary.BIN_NONE:
+            depth += 1
+        else:
+            _, pos = _read_value(buf, t, pos)
+    raise SyntaxError("Reached EOF, but Binary VDF is incomplete")
+
+
+def get_index_path(path):
+    """Sidecar index of an appinfo/packageinfo file in the cache directory"""
+    digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+    name = f"{os.path.basename(path)}.{digest}.idx"
+    return os.path.join(cache.get_cache_dir(), "appinfo", name)
+
+
+def _read_index(index_path, magic, stamp):
+    """
+    Return (ids, offsets, sizes) from a sidecar index, or None if there
+    is none or it does not match the source file
+    """
+    if index_path is None:
+        return None
+    try:
+        with open(index_path, "rb") as f:
+            header = f.read(_INDEX_HEADER.size)
+            if len(header) != _INDEX_HEADER.size:
+                return None
+            (
+                index_magic,
+                version,
+                source_magic,
+                size,
+                mtime_ns,
+                count,
+            ) = _INDEX_HEADER.unpack(header)
+            if (
+                index_magic != _INDEX_MAGIC
+                or version != INDEX_VERSION
+                or source_magic != magic
+                or (size, mtime_ns) != stamp
+            ):
+                logger.debug("Appinfo index %s is stale", index_path)
+                return None
+
+            columns = (array.array("I"), array.array("Q"), array.array("I"))
+            for column in columns:
+                column.fromfile(f, count)
+    except (OSError, EOFError) as e:
+        logger.debug("Cannot read appinfo index %s: %s", index_path, e)
+        return None
+    return columns
+
+
+def _write_index(index_path, magic, stamp, ids, offsets, sizes):
+    header = _INDEX_HEADER.pack(
+        _INDEX_MAGIC, INDEX_VERSION, magic, stamp[0], stamp[1], len(ids)
+    )
+    try:
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        binary.atomic_write(
+            index_path,
+            [header, ids.tobytes(), offsets.tobytes(), sizes.tobytes()],
+        )
+    except OSError as e:
+        logger.debug("Cannot write appinfo index %s: %s", index_path, e)
+
+
+def resolve_app_names(steam_root, app_ids):
+    """
+    Return {app_id: name} for the given app IDs from the appinfo cache of
+    a Steam install. IDs without a record are left out; if there is no
+    readable appinfo.vdf the result is empty.
+    """
+    app_ids = list(app_ids)
+    path = get_appinfo_path(steam_root)
+    if not app_ids or not os.path.exists(path):
+        return {}
+    try:
+        with AppInfo(path) as info:
+            return info.names(app_ids)
+    except (OSError, SyntaxError, ValueError) as e:
+        logger.debug("Cannot read app names from %s: %s", path, e)
+        return {}
@@ -0,0 +1,426 @@
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+from collections.abc import Mapping
+from typing import NamedTuple
+
+import vdf
+
+BIN_NONE = 0x00
+BIN_STRING = 0x01
+BIN_INT32 = 0x02
+BIN_FLOAT32 = 0x03
+BIN_POINTER = 0x04
+BIN_WIDESTRING = 0x05
+BIN_COLOR = 0x06
+BIN_UINT64 = 0x07
+BIN_END = 0x08
+BIN_INT64 = 0x0A
+BIN_END_ALT = 0x0B
+
+_INT32 = struct.Struct("<i")
+_UINT64 = struct.Struct("<Q")
+_INT64 = struct.Struct("<q")
+_FLOAT32 = struct.Struct("<f")
+
+COPY_BLOCK_SIZE = 1024 * 1024
+
+# Size of fixed-width values, by type byte
+_FIXED_SIZES = {
+    BIN_INT32: 4,
+    BIN_FLOAT32: 4,
+    BIN_POINTER: 4,
+    BIN_COLOR: 4,
+    BIN_UINT64: 8,
+    BIN_INT64: 8,
+}
+
+
+class BinaryVDF:
+    """
+    Memory-mapped binary VDF file (shortcuts.vdf and friends).
+
+    Opening the file runs a single pass over it that records where every
+    map ends, without decoding any keys or values. The tree is then
+    available through root, a read-only Mapping whose nodes are decoded
+    only when they are accessed. Values use the same types as
+    vdf.binary_load, so to_dict() on a node gives the same result.
+
+    The mapping is only valid while the file is open; use it as a context
+    manager or call close(). An already open binary file object can be
+    passed as fileobj; it is mapped as is and left open on close().
+    """
+
+    def __init__(self, path, alt_format=False, fileobj=None):
+        self.path = path
+        self._end_byte = BIN_END_ALT if alt_format else BIN_END
+        self._owns_file = fileobj is None
+        self._file = open(path, "rb") if fileobj is None else fileobj
+        try:
+            if os.fstat(self._file.fileno()).st_size:
+                self._buf = mmap.mmap(
+                    self._file.fileno(), 0, access=mmap.ACCESS_READ
+                )
+            else:
+                # Empty files cannot be mapped
+                self._buf = b""
+            self._map_ends = {}
+            self._last_entries = {}
+            self._max_indices = {}
+            self._index()
+        except Exception:
+            self.close()
+            raise
+        self.root = BinaryVDFMap(self, (0,))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        buf = getattr(self, "_buf", None)
+        if isinstance(buf, mmap.mmap):
+            buf.close()
+        if self._owns_file:
+            self._file.close()
+
+    def read_bytes(self, start=0, end=None):
+        """Return the raw bytes of the file between two offsets"""
+        return self._buf[start:end]
+
+    def _index(self):
+        """
+        Walk the whole file once, recording the end offset, the offset of
+        the last entry and the highest numeric key of every map
+        """
+        buf = self._buf
+        size = len(buf)
+        pos = 0
+        stack = []
+        # Offset of the type byte of the latest entry in the current map
+        last = None
+        # Highest numeric key seen so far in the current map
+        high = None
+
+        while pos < size:
+            t = buf[pos]
+            if t == self._end_byte:
+                if not stack:
+                    self._root_end = pos
+                    self._root_last = last
+                    self._root_max = high
+                    return
+                start, parent_last, parent_high = stack.pop()
+                self._map_ends[start] = pos + 1
+                if last is not None:
+                    self._last_entries[start] = last
+                if high is not None:
+                    self._max_indices[start] = high
+                last = parent_last
+                high = parent_high
+                pos += 1
+                continue
+
+            entry = pos
+            key_end = self._find_cstring_end(pos + 1)
+            key = buf[pos + 1 : key_end]
+            if key.isdigit() and (high is None or int(key) > high):
+                high = int(key)
+            pos = key_end + 1
+            if t == BIN_NONE:
+                stack.append((pos, entry, high))
+                last = None
+                high = None
+            else:
+                last = entry
+                pos = self._skip_value(t, pos)
+
+        if stack:
+            raise SyntaxError("Reached EOF, but Binary VDF is incomplete")
+        self._root_end = None
+        self._root_last = last
+        self._root_max = high
+
+    def _skip_cstring(self, pos, wide=False):
+        end = self._find_cstring_end(pos, wide)
+        return end + (2 if wide else 1)
+
+    def _find_cstring_end(self, pos, wide=False):
+        if wide:
+            end = pos
+            while True:
+                end = self._buf.find(b"\x00\x00", end)
+                if end == -1 or (end - pos) % 2 == 0:
+                    break
+                end += 1
+        else:
+            end = self._buf.find(b"\x00", pos)
+        if end == -1:
+            raise SyntaxError(f"Unterminated cstring (offset: {pos})")
+        return end
+
+    def _skip_value(self, t, pos):
+        if t == BIN_STRING:
+            return self._skip_cstring(pos)
+        if t == BIN_WIDESTRING:
+            return self._skip_cstring(pos, wide=True)
+        if t in _FIXED_SIZES:
+            return pos + _FIXED_SIZES[t]
+        raise SyntaxError(f"Unknown data type at offset {pos - 1}: {t!r}")
+
+    def _read_cstring(self, pos, wide=False):
+        end = self._find_cstring_end(pos, wide)
+        raw = self._buf[pos:end]
+        if wide:
+            return raw.decode("utf-16")
+        return raw.decode("utf-8", "replace")
+
+    def _iter_entries(self, start):
+        """Yield (key, type, value_offset) for each entry of a map"""
+        buf = self._buf
+        size = len(buf)
+        pos = start
+        while pos < size:
+            t = buf[pos]
+            if t == self._end_byte:
+                return
+            key_end = self._find_cstring_end(pos + 1)
+            key = buf[pos + 1 : key_end].decode("utf-8", "replace")
+            pos = key_end + 1
+            yield key, t, pos
+            if t == BIN_NONE:
+                pos = self._map_ends[pos]
+            else:
+                pos = self._skip_value(t, pos)
+
+    def _decode_value(self, t, pos):
+        buf = self._buf
+        if t == BIN_STRING:
+            return self._read_cstring(pos)
+        if t == BIN_WIDESTRING:
+            return self._read_cstring(pos, wide=True)
+        if t in (BIN_INT32, BIN_POINTER, BIN_COLOR):
+            value = _INT32.unpack_from(buf, pos)[0]
+            if t == BIN_POINTER:
+                return vdf.POINTER(value)
+            if t == BIN_COLOR:
+                return vdf.COLOR(value)
+            return value
+        if t == BIN_UINT64:
+            return vdf.UINT_64(_UINT64.unpack_from(buf, pos)[0])
+        if t == BIN_INT64:
+            return vdf.INT_64(_INT64.unpack_from(buf, pos)[0])
+        if t == BIN_FLOAT32:
+            return _FLOAT32.unpack_from(buf, pos)[0]
+        raise SyntaxError(f"Unknown data type at offset {pos - 1}: {t!r}")
+
+
+class BinaryVDFEntry(NamedTuple):
+    """One entry of a map, as yielded by BinaryVDFMap.entries()"""
+
+    key: str
+    type: int
+    value: object
+    raw: bytes
+
+    def encode(self, key=None):
+        """Encode the entry, optionally under a different key"""
+        key = self.key if key is None else key
+        return bytes((self.type,)) + key.encode("utf-8") + b"\x00" + self.raw
+
+
+class BinaryVDFMap(Mapping):
+    """
+    Read-only view of one map in a BinaryVDF file.
+
+    The keys of the map are indexed on first access; values (and child
+    maps) are decoded each time they are looked up and are not kept, so
+    walking a large file does not accumulate decoded nodes.
+    """
+
+    __slots__ = ("_doc", "_starts", "_entries")
+
+    def __init__(self, doc, starts):
+        self._doc = doc
+        # Duplicate map keys are merged like vdf.binary_load does, so a
+        # map can be made of several segments in the file
+        self._starts = starts
+        self._entries = None
+
+    def _load_entries(self):
+        if self._entries is None:
+            entries = {}
+            for start in self._starts:
+                for key, t, pos in self._doc._iter_entries(start):
+                    previous = entries.get(key)
+                    if (
+                        t == BIN_NONE
+                        and previous is not None
+                        and previous[0] == BIN_NONE
+                    ):
+                        entries[key] = (BIN_NONE, previous[1] + (pos,))
+                    elif t == BIN_NONE:
+                        entries[key] = (BIN_NONE, (pos,))
+                    else:
+                        entries[key] = (t, pos)
+            self._entries = entries
+        return self._entries
+
+    def __getitem__(self, key):
+        t, pos = self._load_entries()[key]
+        if t == BIN_NONE:
+            return BinaryVDFMap(self._doc, pos)
+        return self._doc._decode_value(t, pos)
+
+    def __iter__(self):
+        return iter(self._load_entries())
+
+    def __len__(self):
+        return len(self._load_entries())
+
+    def __contains__(self, key):
+        return key in self._load_entries()
+
+    def entries(self):
+        """
+        Yield a BinaryVDFEntry for every entry of this map in file order,
+        without merging duplicate keys. The value is decoded lazily like a
+        lookup; raw holds the encoded value so the entry can be copied to
+        another file (possibly under a new key) without re-encoding it.
+        """
+        doc = self._doc
+        for start in self._starts:
+            for key, t, pos in doc._iter_entries(start):
+                if t == BIN_NONE:
+                    value = BinaryVDFMap(doc, (pos,))
+                    end = doc._map_ends[pos]
+                else:
+                    value = doc._decode_value(t, pos)
+                    end = doc._skip_value(t, pos)
+                yield BinaryVDFEntry(key, t, value, doc._buf[pos:end])
+
+    def start_offset(self):
+        """
+        Return the file offset of the first entry of this map, or None if
+        the map is made of several merged segments
+        """
+        if len(self._starts) != 1:
+            return None
+        return self._starts[0]
+
+    def last_key(self):
+        """
+        Return the key of the last entry in this map, or None if it is
+        empty. This does not need to index the map.
+        """
+        start = self._starts[-1]
+        if start == 0:
+            last = self._doc._root_last
+        else:
+            last = self._doc._last_entries.get(start)
+        if last is None:
+            return None
+        return self._doc._read_cstring(last + 1)
+
+    def max_index(self):
+        """
+        Return the highest numeric key of this map, or None if it has
+        none. Like last_key() this does not need to index the map, and
+        unlike it the result does not depend on the order of the keys.
+        """
+        highs = [
+            (
+                self._doc._root_max
+                if start == 0
+                else self._doc._max_indices.get(start)
+            )
+            for start in self._starts
+        ]
+        return max((h for h in highs if h is not None), default=None)
+
+    def end_offset(self):
+        """
+        Return the file offset of the end marker of this map (None for a
+        root map that runs to EOF without one). New entries can be added
+        to the map by inserting them at this offset.
+        """
+        start = self._starts[-1]
+        if start == 0:
+            return self._doc._root_end
+        return self._doc._map_ends[start] - 1
+
+    def to_dict(self):
+        """Decode this map and everything below it into plain dicts"""
+        return {
+            key: value.to_dict() if isinstance(value, BinaryVDFMap) else value
+            for key, value in self.items()
+        }
+
+
+def encode_entry(key, value, alt_format=False):
+    """
+    Encode a single key/value pair as it appears inside a binary VDF map,
+    ready to be spliced in at BinaryVDFMap.end_offset()
+    """
+    # binary_dumps terminates the root map as well, which is dropped here
+    return vdf.binary_dumps({key: value}, alt_format=alt_format)[:-1]
+
+
+def atomic_write(path, chunks):
+    """
+    Write the byte chunks to path through a temporary file in the same
+    directory that is renamed over path once complete, so readers (and
+    Steam) never see a partially written file
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def insert_bytes(path, offset, data):
+    """
+    Atomically rewrite path with data inserted at offset. The existing
+    contents are copied in blocks, never decoded or held in memory.
+    """
+
+    def chunks():
+        with open(path, "rb") as src:
+            remaining = offset
+            while remaining:
+                block = src.read(min(remaining, COPY_BLOCK_SIZE))
+                if not block:
+                    raise EOFError(f"{path} is shorter than offset {offset}")
+                remaining -= len(block)
+                yield block
+            yield data
+            while block := src.read(COPY_BLOCK_SIZE):
+                yield block
+
+    atomic_write(path, chunks())
+
+
+def load(path, alt_format=False):
+    """
+    Read a binary VDF file eagerly into plain dicts through the mmap
+    reader. Equivalent to vdf.binary_load on the open file.
+    """
+    with BinaryVDF(path, alt_format=alt_format) as doc:
+        return doc.root.to_dict()
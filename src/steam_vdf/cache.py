@@ -0,0 +1,205 @@
+import logging
+import os
+import sqlite3
+import threading
+
+logger = logging.getLogger("cli")
+
+# Bump when the table layout changes; older databases are rebuilt
+SCHEMA_VERSION = 1
+
+
+def get_cache_dir():
+    """
+    Return the steam-vdf cache directory, following the XDG base
+    directory spec ($XDG_CACHE_HOME, falling back to ~/.cache)
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "steam-vdf")
+
+
+class SizeIndex:
+    """
+    On-disk index of per-directory sizes and parsed appmanifest records.
+
+    Directories are stored with the size of the regular files directly
+    inside them plus the names of their subdirectories, keyed by path and
+    validated against inode and mtime. A directory whose mtime is unchanged
+    does not need to be listed again, only its subdirectories have to be
+    stat'ed. Note that rewriting a file in place does not change the mtime
+    of its directory, so such changes are only picked up once the directory
+    itself changes (or with --no-cache).
+
+    Lookups are safe to call from worker threads. Updates are staged in
+    memory and written in a single transaction by commit().
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._dir_updates = []
+        self._dir_removals = []
+        self._manifest_updates = []
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._setup_schema()
+
+    @classmethod
+    def open_default(cls):
+        """
+        Open the index in the user cache directory.
+        Returns None if the cache cannot be created.
+        """
+        db_path = os.path.join(get_cache_dir(), "size-index.sqlite3")
+        try:
+            return cls(db_path)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Size index unavailable (%s): %s", db_path, e)
+            return None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _setup_schema(self):
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            logger.debug("Rebuilding size index at %s", self.db_path)
+            self._conn.executescript("""
+                DROP TABLE IF EXISTS dirs;
+                DROP TABLE IF EXISTS manifests;
+                """)
+        self._conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS dirs (
+                path TEXT PRIMARY KEY,
+                inode INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                files_size INTEGER NOT NULL,
+                subdirs TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS manifests (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                file_size INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                app_id TEXT NOT NULL,
+                raw_size INTEGER NOT NULL
+            );
+            PRAGMA user_version = {SCHEMA_VERSION};
+            """)
+        self._conn.commit()
+
+    def lookup_dir(self, path, st):
+        """
+        Return (files_size, subdir_names) for path if the stored entry
+        still matches the inode and mtime in st, otherwise None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT inode, mtime_ns, files_size, subdirs "
+                "FROM dirs WHERE path = ?",
+                (path,),
+            ).fetchone()
+
+        if row is None or row[0] != st.st_ino or row[1] != st.st_mtime_ns:
+            return None
+        return row[2], row[3].split("\0") if row[3] else []
+
+    def stored_subdirs(self, path):
+        """
+        Return the subdirectory names last stored for path, regardless of
+        whether the entry is still valid, or None if there is no entry
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT subdirs FROM dirs WHERE path = ?", (path,)
+            ).fetchone()
+
+        if row is None:
+            return None
+        return row[0].split("\0") if row[0] else []
+
+    def update_dir(self, path, st, files_size, subdirs):
+        """Stage a fresh directory entry"""
+        with self._lock:
+            self._dir_updates.append(
+                (
+                    path,
+                    st.st_ino,
+                    st.st_mtime_ns,
+                    files_size,
+                    "\0".join(subdirs),
+                )
+            )
+
+    def remove_tree(self, path):
+        """Stage removal of path and every entry below it"""
+        with self._lock:
+            self._dir_removals.append(path)
+
+    def lookup_manifest(self, path, st):
+        """
+        Return the cached (name, app_id, raw_size) for an appmanifest if
+        its mtime and size are unchanged, otherwise None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mtime_ns, file_size, name, app_id, raw_size "
+                "FROM manifests WHERE path = ?",
+                (path,),
+            ).fetchone()
+
+        if row is None or row[0] != st.st_mtime_ns or row[1] != st.st_size:
+            return None
+        return row[2], row[3], row[4]
+
+    def update_manifest(self, path, st, name, app_id, raw_size):
+        """Stage a freshly parsed appmanifest record"""
+        with self._lock:
+            self._manifest_updates.append(
+                (path, st.st_mtime_ns, st.st_size, name, str(app_id), raw_size)
+            )
+
+    def commit(self):
+        """Write all staged changes in a single transaction"""
+        with self._lock:
+            removals, self._dir_removals = self._dir_removals, []
+            dirs, self._dir_updates = self._dir_updates, []
+            manifests, self._manifest_updates = self._manifest_updates, []
+
+            if not (removals or dirs or manifests):
+                return
+
+            try:
+                with self._conn:
+                    # '/' sorts directly before '0', so this range selects
+                    # exactly the entries below path using the primary key
+                    self._conn.executemany(
+                        "DELETE FROM dirs WHERE path = ? "
+                        "OR (path >= ? || '/' AND path < ? || '0')",
+                        [(path, path, path) for path in removals],
+                    )
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?, ?)",
+                        dirs,
+                    )
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO manifests "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        manifests,
+                    )
+                logger.debug(
+                    "Size index updated: %s dirs, %s manifests",
+                    len(dirs),
+                    len(manifests),
+                )
+            except sqlite3.Error as e:
+                logger.warning("Could not update size index: %s", e)
+
+    def close(self):
+        self.commit()
+        self._conn.close()
@@ -1,8 +1,23 @@
 #!/usr/bin/env python
 
 import argparse
+import sys
 
-from steam_vdf import users, utils
+# Only what parsing arguments and logging need is imported here. Each
+# command imports its own modules in main(), so that quick commands such
+# as view do not pay for loading psutil, asyncio and the rest.
+from steam_vdf import utils
+
+
+def _byte_count(value):
+    """argparse type for byte offsets and lengths, decimal or 0x hex"""
+    try:
+        count = int(value, 0)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid byte count: {value!r}")
+    if count < 0:
+        raise argparse.ArgumentTypeError("byte counts cannot be negative")
+    return count
 
 
 def parse_arguments():
@@ -23,9 +38,23 @@ def parse_arguments():
     parent_parser.add_argument(
         "-o",
         "--output",
-        choices=["json", "text"],
+        choices=["json", "ndjson", "text"],
         default="text",
-        help="Output type format",
+        help="Output type format; info and list-shortcuts write a single "
+        "JSON document, or one JSON record per line with ndjson",
+    )
+    # SUPPRESS keeps the subcommand from resetting a value given before it
+    parent_parser.add_argument(
+        "--profile",
+        action="store_true",
+        default=argparse.SUPPRESS,
+        help="Print where the time went to stderr, as JSON with -o json",
+    )
+    parent_parser.add_argument(
+        "--profile-dump",
+        metavar="FILE",
+        default=argparse.SUPPRESS,
+        help="Run under cProfile and save the pstats data to FILE",
     )
 
     # Add parent parser arguments to main parser
@@ -51,6 +80,16 @@ def parse_arguments():
         action="store_true",
         help="Show all information (e.g. all games)",
     )
+    info_parser.add_argument(
+        "--all-libraries",
+        action="store_true",
+        help="Include games from every Steam library folder in storage analysis",
+    )
+    info_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore the on-disk size index and rescan everything",
+    )
     subparsers.add_parser(
         "list-shortcuts",
         help="List existing non-Steam game shortcuts",
@@ -59,7 +98,30 @@ def parse_arguments():
     view_parser = subparsers.add_parser(
         "view", help="View contents of a VDF file", parents=[parent_parser]
     )
-    view_parser.add_argument("file", type=str, help="Path to VDF file to view")
+    view_parser.add_argument(
+        "files",
+        metavar="file",
+        type=str,
+        nargs="+",
+        help="Path to VDF file to view, can be repeated",
+    )
+    view_parser.add_argument(
+        "--hex",
+        action="store_true",
+        help="Show a hex dump of the file instead of parsing it",
+    )
+    view_parser.add_argument(
+        "--offset",
+        type=_byte_count,
+        help="First byte to hex dump with --hex (decimal or 0x hex, "
+        "default: 0)",
+    )
+    view_parser.add_argument(
+        "--length",
+        type=_byte_count,
+        help="Number of bytes to hex dump with --hex (default: to the end "
+        "of the file)",
+    )
 
     # Add
     subparsers.add_parser(
@@ -68,26 +130,295 @@ def parse_arguments():
         parents=[parent_parser],
     )
 
+    import_parser = subparsers.add_parser(
+        "import-shortcuts",
+        help="Add non-Steam game shortcuts in bulk from a JSON or CSV file",
+        parents=[parent_parser],
+    )
+    import_parser.add_argument(
+        "file", type=str, help="JSON or CSV file describing the shortcuts"
+    )
+    import_parser.add_argument(
+        "--format",
+        choices=["json", "csv"],
+        help="Format of the file (default: from the file extension)",
+    )
+    import_parser.add_argument(
+        "--user",
+        action="append",
+        help="Steam user ID to import for, can be repeated (default: all)",
+    )
+    import_parser.add_argument(
+        "--no-restart",
+        action="store_true",
+        help="Do not restart Steam after importing",
+    )
+
     # Deletion  / Manipulation
-    subparsers.add_parser(
+    delete_parser = subparsers.add_parser(
         "delete-shortcut",
         help="Delete an existing non-Steam game shortcut",
         parents=[parent_parser],
     )
+    delete_parser.add_argument(
+        "--match",
+        type=str,
+        help=(
+            "Delete every shortcut matching an app ID, a glob on the "
+            "executable path or a regex on the name, without prompting"
+        ),
+    )
+    delete_parser.add_argument(
+        "--user",
+        action="append",
+        help="Steam user ID to delete for with --match, can be repeated",
+    )
+    delete_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only list the shortcuts --match would delete",
+    )
+    delete_parser.add_argument(
+        "--no-restart",
+        action="store_true",
+        help="Do not restart Steam after deleting with --match",
+    )
 
     # System
     subparsers.add_parser(
         "restart-steam", help="Restart Steam", parents=[parent_parser]
     )
 
+    # Daemon
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Keep the library model in memory and answer queries",
+        parents=[parent_parser],
+    )
+    serve_parser.add_argument(
+        "--socket",
+        type=str,
+        help="Unix socket to listen on "
+        "(default: $XDG_RUNTIME_DIR/steam-vdf.sock)",
+    )
+    serve_parser.add_argument(
+        "--poll-interval",
+        type=float,
+        help="Seconds between checks when inotify is not available "
+        "(default: 2)",
+    )
+    serve_parser.add_argument(
+        "--no-inotify",
+        action="store_true",
+        help="Poll for changes instead of using inotify",
+    )
+    query_parser = subparsers.add_parser(
+        "query",
+        help="Query a running steam-vdf server, printing JSON",
+        parents=[parent_parser],
+    )
+    query_parser.add_argument("query", choices=("ping", "info", "shortcuts"))
+    query_parser.add_argument(
+        "--socket", type=str, help="Unix socket of the server"
+    )
+
+    # Snapshots of the library state
+    snapshot_parser = subparsers.add_parser(
+        "snapshot",
+        help="Save the libraries, games, users and shortcuts to a file",
+        parents=[parent_parser],
+    )
+    snapshot_parser.add_argument("file", help="Snapshot file to write")
+    snapshot_parser.add_argument(
+        "--previous",
+        type=str,
+        help="Earlier snapshot whose data is reused for unchanged files",
+    )
+    diff_parser = subparsers.add_parser(
+        "diff",
+        help="Show what changed between two snapshots",
+        parents=[parent_parser],
+    )
+    diff_parser.add_argument("old", help="Older snapshot file")
+    diff_parser.add_argument("new", help="Newer snapshot file")
+
+    # Offline inventory of many Steam installs
+    scan_parser = subparsers.add_parser(
+        "scan",
+        help="Inventory several Steam installs (or home directories) "
+        "in parallel",
+        parents=[parent_parser],
+    )
+    scan_parser.add_argument(
+        "roots",
+        nargs="+",
+        help="Steam install directories, or home directories containing one",
+    )
+    scan_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="Number of worker processes (default: one per CPU)",
+    )
+    scan_parser.add_argument(
+        "--format",
+        choices=("jsonl", "sqlite"),
+        default="jsonl",
+        help="Report format (default: jsonl)",
+    )
+    scan_parser.add_argument(
+        "--report",
+        type=str,
+        help="Report file, required for sqlite (default: stdout)",
+    )
+
     args = parser.parse_args()
     if not args.command:
         parser.print_help()
         parser.exit()
+    if args.command == "view":
+        if not args.hex and (
+            args.offset is not None or args.length is not None
+        ):
+            view_parser.error("--offset and --length require --hex")
+        if args.offset is None:
+            args.offset = 0
+    args.profile = getattr(args, "profile", False)
+    args.profile_dump = getattr(args, "profile_dump", None)
 
     return args
 
 
+def _run_library_command(args, logger):
+    """Run one of the commands that work on the local Steam install"""
+    from steam_vdf import install, users
+
+    # Everything about the Steam install is resolved (and every VDF file
+    # parsed) at most once per invocation
+    steam = install.SteamInstall(args)
+
+    if args.command == "info":
+        utils.display_steam_info(args, steam.root, steam)
+    elif args.command == "list-shortcuts":
+        users.list_shortcuts(args, steam.root, steam)
+    elif args.command == "delete-shortcut":
+        if args.match:
+            deleted = users.delete_matching_shortcuts(args, steam.root, steam)
+            if deleted and not (args.dry_run or args.no_restart):
+                utils.restart_steam()
+        else:
+            users.delete_shortcut(args, steam.root, steam)
+            utils.restart_steam()
+    elif args.command == "serve":
+        from steam_vdf import daemon
+
+        daemon.serve(args, steam.root)
+    elif args.command == "add-shortcut":
+        users.add_shortcut(args, steam.root, steam)
+        utils.restart_steam()
+    elif args.command == "import-shortcuts":
+        added = users.import_shortcuts(args, steam.root, steam)
+        if added and not args.no_restart:
+            utils.restart_steam()
+    elif args.command == "snapshot":
+        from steam_vdf import snapshot
+
+        previous = None
+        if args.previous:
+            previous = snapshot.Snapshot.load(args.previous)
+        snapshot.take_snapshot(steam, previous).save(args.file)
+        logger.info("Saved snapshot to %s", args.file)
+
+
+def _run_profiled(args, logger):
+    """
+    Run the command with the requested instrumentation: per-phase timings
+    and counters with --profile, a cProfile run with --profile-dump
+    """
+    from steam_vdf import profiling
+
+    profiler = None
+    if args.profile_dump:
+        import cProfile
+
+        profiler = cProfile.Profile()
+    stdout = sys.stdout
+    if args.profile:
+        profiling.enable()
+        sys.stdout = profiling.TimedStream(stdout)
+
+    try:
+        with profiling.phase(args.command):
+            if profiler is not None:
+                profiler.runcall(_run_command, args, logger)
+            else:
+                _run_command(args, logger)
+    finally:
+        if args.profile:
+            sys.stdout.flush()
+            sys.stdout = stdout
+            profiling.disable()
+            print(
+                profiling.format_report(profiling.report(), args.output),
+                file=sys.stderr,
+            )
+        if profiler is not None:
+            profiler.dump_stats(args.profile_dump)
+            logger.info(
+                "Saved profile to %s, read it with: python -m pstats %s",
+                args.profile_dump,
+                args.profile_dump,
+            )
+
+
+def _run_command(args, logger):
+    """Dispatch to the selected command"""
+    if args.command == "view":
+        for vdf_file in args.files:
+            if len(args.files) > 1:
+                print(f"==> {vdf_file} <==")
+            utils.view_vdf(
+                vdf_file,
+                args.output,
+                hex_dump=args.hex,
+                offset=args.offset,
+                length=args.length,
+            )
+    elif args.command == "restart-steam":
+        utils.restart_steam()
+    elif args.command == "query":
+        import json
+
+        from steam_vdf import daemon
+
+        try:
+            response = daemon.query(args.query, args.socket)
+        except (ConnectionRefusedError, FileNotFoundError):
+            logger.error("No steam-vdf server is running")
+            sys.exit(1)
+        print(json.dumps(response, indent=2))
+    elif args.command == "diff":
+        from steam_vdf import snapshot
+
+        try:
+            old = snapshot.Snapshot.load(args.old)
+            new = snapshot.Snapshot.load(args.new)
+        except (OSError, ValueError) as e:
+            logger.error("Could not read snapshot: %s", e)
+            sys.exit(1)
+        snapshot.write_diff(snapshot.diff_snapshots(old, new), args.output)
+    elif args.command == "scan":
+        from steam_vdf import scan
+
+        if args.format == scan.SQLITE and not args.report:
+            logger.error("--report is required with --format sqlite")
+            sys.exit(1)
+        if scan.scan(args.roots, args.format, args.report, args.jobs):
+            sys.exit(1)
+    else:
+        _run_library_command(args, logger)
+
+
 def main():
     """
     Main function to handle command line arguments and execute the appropriate actions.
@@ -104,24 +435,10 @@ def main():
     utils.complete_path.matches = []
 
     # Handle commands from parsers
-    if args.command == "info":
-        selected_library = users.find_steam_library(args)
-        utils.display_steam_info(args, selected_library)
-    elif args.command == "view":
-        utils.view_vdf(args.file, args.output)
-    elif args.command == "list-shortcuts":
-        selected_library = users.find_steam_library(args)
-        users.list_shortcuts(args, selected_library)
-    elif args.command == "delete-shortcut":
-        selected_library = users.find_steam_library(args)
-        users.delete_shortcut(args, selected_library)
-        utils.restart_steam()
-    elif args.command == "restart-steam":
-        utils.restart_steam()
-    elif args.command == "add-shortcut":
-        selected_library = users.find_steam_library(args)
-        users.add_shortcut(args, selected_library)
-        utils.restart_steam()
+    if args.profile or args.profile_dump:
+        _run_profiled(args, logger)
+    else:
+        _run_command(args, logger)
 
     logger.info("Exiting Steam VDF tool")
     logger.info("Make sure you restart steam for any changes to take effect")
@@ -0,0 +1,445 @@
+import ctypes
+import ctypes.util
+import json
+import logging
+import os
+import select
+import signal
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+
+from steam_vdf import cache, install, storage, users
+
+logger = logging.getLogger("cli")
+
+SOCKET_NAME = "steam-vdf.sock"
+POLL_INTERVAL = 2.0
+
+# inotify(7) event masks
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ONLYDIR = 0x01000000
+
+WATCH_MASK = (
+    IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_ONLYDIR
+)
+
+
+def get_socket_path():
+    """
+    Return the default query socket path: in $XDG_RUNTIME_DIR if it is
+    set, otherwise in the steam-vdf cache directory
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, SOCKET_NAME)
+    return os.path.join(cache.get_cache_dir(), SOCKET_NAME)
+
+
+class InotifyWatcher:
+    """
+    Directory watcher on Linux inotify, called through ctypes.
+    read() returns the (directory, name) pairs that changed.
+    """
+
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1: {os.strerror(err)}")
+        self._dirs = {}
+
+    def watch(self, path):
+        wd = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(path), WATCH_MASK
+        )
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        self._dirs[wd] = path
+
+    def read(self, timeout):
+        """
+        Wait up to timeout seconds for changes. Returns a list of
+        (directory, name) pairs; (None, None) means events were lost and
+        everything should be treated as changed.
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        changes = []
+        pos = 0
+        while pos < len(data):
+            wd, mask, _, length = self._EVENT.unpack_from(data, pos)
+            pos += self._EVENT.size
+            name = data[pos : pos + length].rstrip(b"\x00")
+            pos += length
+
+            if mask & IN_Q_OVERFLOW:
+                changes.append((None, None))
+            elif wd in self._dirs:
+                changes.append((self._dirs[wd], os.fsdecode(name)))
+        return changes
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """
+    Fallback watcher for systems without inotify: compares the mtime and
+    size of the entries of every watched directory each interval
+    """
+
+    def __init__(self, interval=POLL_INTERVAL):
+        self.interval = interval
+        self._snapshots = {}
+        self._last_poll = time.monotonic()
+
+    def watch(self, path):
+        self._snapshots[path] = self._snapshot(path)
+
+    def read(self, timeout):
+        """
+        Wait at most timeout seconds for the next poll. Polls run once per
+        interval however often read() is called; until one is due, read()
+        returns no changes.
+        """
+        due = self._last_poll + self.interval
+        remaining = due - time.monotonic()
+        if remaining > 0:
+            time.sleep(min(timeout, remaining))
+            if time.monotonic() < due:
+                return []
+        self._last_poll = time.monotonic()
+
+        changes = []
+        for path, before in self._snapshots.items():
+            after = self._snapshot(path)
+            for name in before.keys() | after.keys():
+                if before.get(name) != after.get(name):
+                    changes.append((path, name))
+            self._snapshots[path] = after
+        return changes
+
+    def close(self):
+        self._snapshots.clear()
+
+    @staticmethod
+    def _snapshot(path):
+        try:
+            with os.scandir(path) as entries:
+                snapshot = {}
+                for entry in entries:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    snapshot[entry.name] = (st.st_mtime_ns, st.st_size)
+                return snapshot
+        except OSError:
+            return {}
+
+
+def open_watcher(poll_interval=POLL_INTERVAL, use_inotify=True):
+    """Return an inotify watcher if possible, a polling one otherwise"""
+    if use_inotify and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher()
+        except (OSError, AttributeError) as e:
+            logger.warning("inotify unavailable, polling instead: %s", e)
+    return PollingWatcher(poll_interval)
+
+
+class LibraryModel:
+    """
+    In-memory model of a Steam install: library folders, users, installed
+    games and every user's shortcuts.
+
+    load() builds it from scratch; apply() updates the part affected by a
+    changed file, re-reading only that file where possible. All access
+    goes through a lock, so queries can be answered from other threads.
+    """
+
+    def __init__(self, args, root=None):
+        self.args = args
+        self._root = root
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.updated = None
+        self.libraries = []
+        self.users = {}
+        self.games = {}
+        self.shortcuts = {}
+
+    def load(self):
+        """(Re)build the whole model"""
+        steam = install.SteamInstall(self.args, root=self._root)
+        libraries = steam.library_folders
+        accounts = {
+            user_dir: steam.user_names.get(user_dir, {})
+            for user_dir in steam.user_dirs
+        }
+        games = {}
+        for library in libraries:
+            for manifest_path in storage.list_manifests(library):
+                record = storage.read_manifest(manifest_path)
+                if record:
+                    record.library = library
+                    games[manifest_path] = record
+        shortcuts = {
+            user_dir: users.read_shortcuts(
+                self._shortcuts_path(steam, user_dir)
+            )
+            for user_dir in accounts
+        }
+
+        with self.lock:
+            self._steam = steam
+            self.libraries = libraries
+            self.users = accounts
+            self.games = games
+            self.shortcuts = shortcuts
+            self._touch()
+
+    def watch_paths(self):
+        """Directories whose changes affect the model"""
+        steam = self._steam
+        paths = [
+            os.path.join(steam.root, "config"),
+            steam.userdata_path,
+        ]
+        paths.extend(
+            os.path.join(steam.userdata_path, user_dir, "config")
+            for user_dir in self.users
+        )
+        paths.extend(
+            os.path.join(library, "steamapps") for library in self.libraries
+        )
+        return [path for path in paths if os.path.isdir(path)]
+
+    def apply(self, directory, name):
+        """
+        Update the model for a change to name in directory. Returns True
+        if the model was rebuilt, in which case the watched directories
+        may have changed as well.
+        """
+        steam = self._steam
+        if directory is None or self._needs_reload(directory, name):
+            logger.info("Reloading Steam library model")
+            self.load()
+            return True
+
+        path = os.path.join(directory, name)
+        parent = os.path.dirname(directory)
+        if name.startswith("appmanifest_") and name.endswith(".acf"):
+            record = None
+            if os.path.exists(path):
+                record = storage.read_manifest(path)
+            with self.lock:
+                if record:
+                    record.library = os.path.dirname(directory)
+                    self.games[path] = record
+                else:
+                    self.games.pop(path, None)
+                self._touch()
+        elif name == "shortcuts.vdf" and (
+            os.path.dirname(parent) == steam.userdata_path
+        ):
+            user_dir = os.path.basename(parent)
+            shortcuts = users.read_shortcuts(path)
+            with self.lock:
+                self.shortcuts[user_dir] = shortcuts
+                self._touch()
+        return False
+
+    def _needs_reload(self, directory, name):
+        steam = self._steam
+        if directory == steam.userdata_path:
+            # A user was added or removed
+            return True
+        if name == "libraryfolders.vdf":
+            return True
+        return directory == os.path.join(steam.root, "config") and name in (
+            "loginusers.vdf",
+            "config.vdf",
+        )
+
+    def query(self, name):
+        """Answer a query with a JSON-serializable dict"""
+        with self.lock:
+            if name == "ping":
+                return {"generation": self.generation}
+            if name == "info":
+                games = sorted(
+                    self.games.values(),
+                    key=lambda game: game.raw_size,
+                    reverse=True,
+                )
+                return {
+                    "generation": self.generation,
+                    "updated": self.updated,
+                    "libraries": list(self.libraries),
+                    "users": dict(self.users),
+                    "games": [game.as_dict() for game in games],
+                }
+            if name == "shortcuts":
+                return {
+                    "generation": self.generation,
+                    "updated": self.updated,
+                    "shortcuts": {
+                        user_dir: list(shortcuts)
+                        for user_dir, shortcuts in self.shortcuts.items()
+                    },
+                }
+        raise ValueError(f"Unknown query: {name!r}")
+
+    def _touch(self):
+        self.generation += 1
+        self.updated = time.time()
+
+    @staticmethod
+    def _shortcuts_path(steam, user_dir):
+        return os.path.join(
+            steam.userdata_path, user_dir, "config", "shortcuts.vdf"
+        )
+
+
+class _QueryHandler(socketserver.StreamRequestHandler):
+    """One JSON request per line in, one JSON response per line out"""
+
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response = self.server.model.query(request.get("query"))
+            except Exception as e:
+                response = {"error": str(e)}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class QueryServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server answering queries from a LibraryModel"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, model):
+        self.model = model
+        _remove_stale_socket(socket_path)
+        super().__init__(socket_path, _QueryHandler)
+        os.chmod(socket_path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def _remove_stale_socket(socket_path):
+    """Remove a socket left behind by a daemon that is no longer running"""
+    if not os.path.exists(socket_path):
+        os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+        return
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(socket_path)
+            return
+    raise RuntimeError(f"steam-vdf is already serving on {socket_path}")
+
+
+def serve(args, steam_root=None):
+    """
+    Build the library model, keep it up to date from filesystem events
+    and answer queries on a Unix socket until interrupted
+    """
+    socket_path = args.socket or get_socket_path()
+    model = LibraryModel(args, root=steam_root)
+    model.load()
+
+    watcher = open_watcher(
+        args.poll_interval or POLL_INTERVAL, not args.no_inotify
+    )
+    watched = set()
+
+    def watch_all():
+        for path in model.watch_paths():
+            if path not in watched:
+                try:
+                    watcher.watch(path)
+                    watched.add(path)
+                except OSError as e:
+                    logger.warning("Cannot watch %s: %s", path, e)
+
+    watch_all()
+    # Stop cleanly (removing the socket) when terminated by a supervisor
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    server = QueryServer(socket_path, model)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    logger.info(
+        "Serving %d games and %d users on %s (watching %d directories)",
+        len(model.games),
+        len(model.users),
+        socket_path,
+        len(watched),
+    )
+
+    try:
+        while True:
+            for directory, name in watcher.read(timeout=1.0):
+                logger.debug(
+                    "Changed: %s", os.path.join(directory or "", name or "")
+                )
+                try:
+                    if model.apply(directory, name):
+                        watch_all()
+                except Exception as e:
+                    logger.error("Error updating model: %s", e)
+    except KeyboardInterrupt:
+        logger.info("Stopping server")
+    finally:
+        server.shutdown()
+        server.server_close()
+        watcher.close()
+
+
+def query(name, socket_path=None, timeout=5.0):
+    """Send one query to a running daemon and return its response"""
+    socket_path = socket_path or get_socket_path()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps({"query": name}).encode("utf-8") + b"\n")
+        with sock.makefile("rb") as f:
+            response = json.loads(f.readline())
+    if "error" in response:
+        raise RuntimeError(response["error"])
+    return response
@@ -0,0 +1,192 @@
+import datetime
+import json
+import re
+import sys
+from collections.abc import Mapping
+
+from steam_vdf.parser import END, START, VALUE
+
+# Characters vdf.dumps escapes in keys and string values
+_ESCAPE_RE = re.compile(r"[\n\t\v\b\r\f\a\\?\"']")
+_ESCAPE_MAP = {
+    "\n": r"\n",
+    "\t": r"\t",
+    "\v": r"\v",
+    "\b": r"\b",
+    "\r": r"\r",
+    "\f": r"\f",
+    "\a": r"\a",
+    "\\": r"\\",
+    "?": r"\?",
+    '"': r"\"",
+    "'": r"\'",
+}
+
+WRITE_BUFFER_SIZE = 64 * 1024
+
+# Values of -o/--output that ask for a structured result instead of text
+JSON = "json"
+NDJSON = "ndjson"
+STRUCTURED_OUTPUTS = (JSON, NDJSON)
+
+HEXDUMP_LINE_BYTES = 16
+# Bytes formatted per block; each block is converted with a couple of
+# C-level calls instead of per-byte Python code
+HEXDUMP_BLOCK_BYTES = HEXDUMP_LINE_BYTES * 4096
+
+# Printable ASCII maps to itself, everything else to "."
+_HEXDUMP_ASCII = bytes(b if 32 <= b <= 126 else ord(".") for b in range(256))
+
+
+def _escape(text):
+    return _ESCAPE_RE.sub(lambda m: _ESCAPE_MAP[m.group()], text)
+
+
+def iter_mapping_events(mapping):
+    """
+    Walk a (possibly lazy) Mapping depth first and yield the same
+    ("start", key, None) / ("value", key, value) / ("end", None, None)
+    events as parser.iter_events. Child mappings are only accessed while
+    they are being walked, so a BinaryVDF is never decoded all at once.
+    """
+    stack = [iter(mapping.items())]
+    while stack:
+        for key, value in stack[-1]:
+            if isinstance(value, Mapping):
+                yield START, key, None
+                stack.append(iter(value.items()))
+                break
+            yield VALUE, key, value
+        else:
+            stack.pop()
+            if stack:
+                yield END, None, None
+
+
+def iter_json(events, indent=2):
+    """
+    Turn an event stream into chunks of JSON text, formatted like
+    json.dumps(tree, indent=indent) on the equivalent tree. With indent
+    None everything is on one line. Duplicate keys are written as they
+    occur instead of being merged.
+    """
+    if indent is None:
+        newline, separator, indent = "", ", ", 0
+    else:
+        newline, separator = "\n", ",\n"
+    # Whether the innermost open object has any members yet
+    has_members = [False]
+    yield "{"
+
+    for event, key, value in events:
+        if event == END:
+            if has_members.pop():
+                yield newline + " " * (indent * len(has_members)) + "}"
+            else:
+                yield "}"
+            continue
+
+        prefix = separator if has_members[-1] else newline
+        has_members[-1] = True
+        member = prefix + " " * (indent * len(has_members)) + json.dumps(key)
+        if event == START:
+            has_members.append(False)
+            yield member + ": {"
+        else:
+            yield member + ": " + json.dumps(value)
+
+    yield newline + "}" if has_members[0] else "}"
+
+
+def iter_vdf(events):
+    """
+    Turn an event stream into chunks of text VDF, formatted like
+    vdf.dumps(tree, pretty=True) on the equivalent tree
+    """
+    depth = 0
+    for event, key, value in events:
+        if event == END:
+            depth -= 1
+            yield "\t" * depth + "}\n"
+            continue
+
+        line_indent = "\t" * depth
+        if event == START:
+            depth += 1
+            yield f'{line_indent}"{_escape(key)}"\n{line_indent}{{\n'
+        else:
+            if isinstance(value, str):
+                value = _escape(value)
+            yield f'{line_indent}"{_escape(key)}" "{value}"\n'
+
+
+def iter_hexdump(data, start=0, end=None, base_offset=0):
+    """
+    Format data[start:end] (bytes or an mmap) as a canonical hex
+    dump, one chunk of text per block. Line offsets are start plus
+    base_offset, so a window of a file is labelled with file offsets.
+    """
+    end = len(data) if end is None else min(end, len(data))
+    hex_width = HEXDUMP_LINE_BYTES * 3
+    for block_start in range(start, end, HEXDUMP_BLOCK_BYTES):
+        block = data[block_start : min(block_start + HEXDUMP_BLOCK_BYTES, end)]
+        hex_text = block.hex(" ")
+        ascii_text = block.translate(_HEXDUMP_ASCII).decode("ascii")
+        yield "".join(
+            f"{base_offset + block_start + i:08x}  "
+            f"{hex_text[i * 3 : (i + HEXDUMP_LINE_BYTES) * 3 - 1]:<{hex_width}}"
+            f"  |{ascii_text[i : i + HEXDUMP_LINE_BYTES]}|\n"
+            for i in range(0, len(block), HEXDUMP_LINE_BYTES)
+        )
+
+
+def write_chunks(chunks, out, buffer_size=WRITE_BUFFER_SIZE):
+    """
+    Write text chunks to out, joined into writes of about buffer_size
+    characters so output starts early without a write call per chunk
+    """
+    pending = []
+    size = 0
+    for chunk in chunks:
+        pending.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            out.write("".join(pending))
+            pending = []
+            size = 0
+    out.write("".join(pending))
+    out.flush()
+
+
+def is_structured(args):
+    """Whether the command line asked for JSON or NDJSON output"""
+    return getattr(args, "output", None) in STRUCTURED_OUTPUTS
+
+
+def _json_default(value):
+    # Records are serialized through their as_dict(), dates as ISO 8601
+    if hasattr(value, "as_dict"):
+        return value.as_dict()
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def write_result(result, output_type, records=(), out=None):
+    """
+    Write the result of a command with a single write: the result as one
+    JSON document, or for NDJSON each of records (typically flattened from
+    the result) as one compact JSON object per line. Records such as
+    GameRecord are written through their as_dict() and datetimes as ISO
+    8601 strings.
+    """
+    if output_type == NDJSON:
+        text = "".join(
+            json.dumps(record, default=_json_default) + "\n"
+            for record in records
+        )
+    else:
+        text = json.dumps(result, indent=2, default=_json_default) + "\n"
+    out = sys.stdout if out is None else out
+    out.write(text)
+    out.flush()
@@ -0,0 +1,89 @@
+import struct
+
+TEXT_VDF = "text"
+BINARY_VDF = "binary"
+APPINFO = "appinfo"
+PACKAGEINFO = "packageinfo"
+JSON = "json"
+UNKNOWN = "unknown"
+
+TEXT_FORMATS = (TEXT_VDF, JSON)
+
+# Bytes read from the start of a file to decide its format
+SNIFF_SIZE = 4096
+
+# Little-endian magic numbers at the start of appinfo.vdf and
+# packageinfo.vdf, by format version
+APPINFO_MAGICS = {
+    0x07564426: 26,
+    0x07564427: 27,
+    0x07564428: 28,
+    0x07564429: 29,
+}
+PACKAGEINFO_MAGICS = {
+    0x06565527: 39,
+    0x06565528: 40,
+}
+
+_MAGIC = struct.Struct("<I")
+
+# Control characters that never appear in text files
+_CONTROL_BYTES = bytes(b for b in range(32) if b not in b"\t\n\v\f\r")
+
+# Type bytes a binary KeyValues file can start with (a map, a value or
+# the end of an empty root map)
+_BINARY_FIRST_BYTES = frozenset(range(0x00, 0x09)) | {0x0A, 0x0B}
+
+_UTF8_BOM = b"\xef\xbb\xbf"
+
+
+def sniff(head):
+    """
+    Return the format of a file from its first bytes (up to SNIFF_SIZE):
+    TEXT_VDF, BINARY_VDF, APPINFO, PACKAGEINFO, JSON or UNKNOWN.
+    Empty files are TEXT_VDF, like an empty text VDF document.
+    """
+    if len(head) >= _MAGIC.size:
+        magic = _MAGIC.unpack_from(head)[0]
+        if magic in APPINFO_MAGICS:
+            return APPINFO
+        if magic in PACKAGEINFO_MAGICS:
+            return PACKAGEINFO
+
+    if _is_text(head):
+        start = head[3:] if head.startswith(_UTF8_BOM) else head
+        if start.lstrip()[:1] in (b"{", b"["):
+            return JSON
+        return TEXT_VDF
+
+    if head[0] in _BINARY_FIRST_BYTES and b"\x00" in head:
+        return BINARY_VDF
+    return UNKNOWN
+
+
+def sniff_file(fp):
+    """
+    Sniff the format of a binary file object opened for reading, leaving
+    it positioned where it was so the same handle can then be parsed
+    """
+    position = fp.tell()
+    head = fp.read(SNIFF_SIZE)
+    fp.seek(position)
+    return sniff(head)
+
+
+def _is_text(head):
+    """Whether head looks like the start of a UTF-8 text file"""
+    if b"\x00" in head:
+        return False
+    # Control characters are deleted in one pass; any change means binary
+    if len(head.translate(None, _CONTROL_BYTES)) != len(head):
+        return False
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # The sniffed block may end in the middle of a character
+        return (
+            e.reason == "unexpected end of data" and e.start >= len(head) - 3
+        )
+    return True
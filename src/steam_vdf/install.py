@@ -0,0 +1,120 @@
+import logging
+import os
+
+import vdf
+
+from steam_vdf import profiling, users
+
+logger = logging.getLogger("cli")
+
+
+class VDFCache:
+    """
+    Parsed text VDF files, keyed on path and revalidated against the
+    file's modification time and size on every lookup
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, path):
+        """
+        Return the parsed contents of path and whether it was parsed by
+        this call (False when served from the cache)
+        """
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        profiling.count(profiling.STAT_CALLS)
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        cached = self._entries.get(path)
+        if cached is not None and cached[0] == stamp:
+            self.hits += 1
+            return cached[1], False
+
+        self.misses += 1
+        logger.debug("Parsing VDF file: %s", path)
+        with open(path, "r", encoding="utf-8") as f:
+            profiling.count_parsed(f)
+            data = vdf.load(f)
+        self._entries[path] = (stamp, data)
+        return data, True
+
+    def clear(self):
+        self._entries.clear()
+
+
+class SteamInstall:
+    """
+    One Steam installation, shared by everything a command does.
+
+    The Steam root, library folders, user directories and user names are
+    resolved on first use and then kept, and text VDF files are read
+    through a VDFCache, so a single invocation never probes the same paths
+    or parses the same file twice. Pass root to skip the search for it.
+    """
+
+    def __init__(self, args, root=None):
+        self.args = args
+        self.vdf_cache = VDFCache()
+        self._root = root
+        self._library_folders = None
+        self._user_dirs = None
+        self._user_names = None
+
+    @property
+    def root(self):
+        """Path of the main Steam library (the Steam install itself)"""
+        if self._root is None:
+            self._root = users.find_steam_library(self.args)
+        return self._root
+
+    @property
+    def userdata_path(self):
+        return os.path.join(self.root, "userdata")
+
+    @property
+    def library_folders(self):
+        """Every Steam library folder, the main one first"""
+        if self._library_folders is None:
+            self._library_folders = users.find_steam_library_folders(
+                self.args, steam=self
+            )
+        return self._library_folders
+
+    @property
+    def user_dirs(self):
+        """Names of the directories under userdata (Steam32 IDs)"""
+        if self._user_dirs is None:
+            userdata_path = self.userdata_path
+            if os.path.isdir(userdata_path):
+                self._user_dirs = [
+                    d
+                    for d in os.listdir(userdata_path)
+                    if os.path.isdir(os.path.join(userdata_path, d))
+                ]
+            else:
+                self._user_dirs = []
+        return self._user_dirs
+
+    @property
+    def user_names(self):
+        """Account names by Steam32 and Steam64 ID, see get_steam_user_names"""
+        if self._user_names is None:
+            self._user_names = users.get_steam_user_names(
+                self.args, self.root, steam=self
+            )
+        return self._user_names
+
+    def load_vdf(self, path):
+        """
+        Parse a text VDF file, or return the cached result if it has not
+        changed since it was last parsed. Newly parsed files are dumped to
+        JSON when --dump-vdfs is given.
+        """
+        data, parsed = self.vdf_cache.load(path)
+        if parsed:
+            users.dump_vdf_to_json(self.args, data, path)
+        return data
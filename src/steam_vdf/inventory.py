@@ -0,0 +1,217 @@
+import array
+import heapq
+
+from humanize import naturalsize
+
+# Sizes are unsigned 64-bit, last played times signed 64-bit (0 when
+# unknown) and libraries are stored as indexes into Inventory.libraries
+_SIZE_TYPECODE = "Q"
+_TIME_TYPECODE = "q"
+_LIBRARY_TYPECODE = "H"
+
+
+class GameRecord:
+    """
+    One installed game. The human readable size is only formatted when
+    it is asked for. Records also support item access (record["size"],
+    record["raw_size"], ...) so they can be used where a dict is expected.
+    """
+
+    __slots__ = ("app_id", "name", "raw_size", "library", "last_played")
+
+    def __init__(self, app_id, name, raw_size, library=None, last_played=0):
+        self.app_id = app_id
+        self.name = name
+        self.raw_size = raw_size
+        self.library = library
+        self.last_played = last_played
+
+    @property
+    def size(self):
+        return naturalsize(self.raw_size)
+
+    def __getitem__(self, key):
+        if key not in _GAME_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __eq__(self, other):
+        if not isinstance(other, GameRecord):
+            return NotImplemented
+        return all(
+            getattr(self, name) == getattr(other, name)
+            for name in self.__slots__
+        )
+
+    def __repr__(self):
+        return (
+            f"GameRecord(app_id={self.app_id!r}, name={self.name!r}, "
+            f"raw_size={self.raw_size!r}, library={self.library!r})"
+        )
+
+    def as_dict(self):
+        """JSON-serializable dict with the formatted size"""
+        record = {
+            "name": self.name,
+            "app_id": self.app_id,
+            "size": self.size,
+            "raw_size": self.raw_size,
+        }
+        if self.library is not None:
+            record["library"] = self.library
+        if self.last_played:
+            record["last_played"] = self.last_played
+        return record
+
+
+_GAME_KEYS = frozenset(GameRecord.__slots__) | {"size"}
+
+
+class DirectoryRecord:
+    """Total size of a directory tree, formatted only on display"""
+
+    __slots__ = ("path", "raw_size")
+
+    def __init__(self, path, raw_size):
+        self.path = path
+        self.raw_size = raw_size
+
+    @property
+    def size(self):
+        return naturalsize(self.raw_size)
+
+    def __getitem__(self, key):
+        if key not in ("path", "raw_size", "size"):
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __eq__(self, other):
+        if not isinstance(other, DirectoryRecord):
+            return NotImplemented
+        return (self.path, self.raw_size) == (other.path, other.raw_size)
+
+    def __repr__(self):
+        return f"DirectoryRecord({self.path!r}, {self.raw_size!r})"
+
+    def as_dict(self):
+        return {
+            "path": self.path,
+            "size": self.size,
+            "raw_size": self.raw_size,
+        }
+
+
+class Inventory:
+    """
+    Columnar store of installed games.
+
+    Sizes, last played times and library indexes live in parallel typed
+    arrays, and names and app IDs in plain lists, so a row costs a few
+    machine words instead of a dict. Sorting, filtering and totals work
+    on the columns and return row indexes; GameRecord objects are only
+    built by row() for the rows that are displayed.
+
+    push(), count, total and largest() make it a drop-in for an unbounded
+    TopN.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.app_ids = []
+        self.names = []
+        self.raw_sizes = array.array(_SIZE_TYPECODE)
+        self.last_played = array.array(_TIME_TYPECODE)
+        self.library_ids = array.array(_LIBRARY_TYPECODE)
+        self.libraries = []
+        self._library_index = {}
+
+    @classmethod
+    def from_records(cls, records):
+        inventory = cls()
+        for record in records:
+            inventory.add(record)
+        return inventory
+
+    def add(self, record):
+        """Append a GameRecord"""
+        library_id = self._library_index.get(record.library)
+        if library_id is None:
+            library_id = self._library_index[record.library] = len(
+                self.libraries
+            )
+            self.libraries.append(record.library)
+        self.app_ids.append(record.app_id)
+        self.names.append(record.name)
+        self.raw_sizes.append(record.raw_size)
+        self.last_played.append(record.last_played or 0)
+        self.library_ids.append(library_id)
+        self.total += record.raw_size
+
+    push = add
+
+    def __len__(self):
+        return len(self.app_ids)
+
+    @property
+    def count(self):
+        return len(self.app_ids)
+
+    def largest(self):
+        """Return every row as a GameRecord, largest first"""
+        return list(self.rows(self.order_by()))
+
+    def row(self, i):
+        """Build the GameRecord of row i"""
+        return GameRecord(
+            self.app_ids[i],
+            self.names[i],
+            self.raw_sizes[i],
+            self.libraries[self.library_ids[i]],
+            self.last_played[i],
+        )
+
+    def rows(self, indexes=None):
+        """Yield a GameRecord per row, in the order of indexes if given"""
+        if indexes is None:
+            indexes = range(len(self))
+        for i in indexes:
+            yield self.row(i)
+
+    def order_by(self, column="raw_sizes", reverse=True, limit=None):
+        """
+        Return row indexes sorted on a column (an attribute name such as
+        "raw_sizes", "last_played" or "names"). With a limit only the first
+        limit rows are selected, using a bounded heap.
+        """
+        values = getattr(self, column)
+        indexes = range(len(self))
+        if limit is not None:
+            select = heapq.nlargest if reverse else heapq.nsmallest
+            return select(limit, indexes, key=values.__getitem__)
+        return sorted(indexes, key=values.__getitem__, reverse=reverse)
+
+    def where(self, min_size=None, library=None, indexes=None):
+        """Return the indexes of the rows matching every given condition"""
+        if indexes is None:
+            indexes = range(len(self))
+        if library is not None:
+            library_id = self._library_index.get(library)
+            ids = self.library_ids
+            indexes = [i for i in indexes if ids[i] == library_id]
+        if min_size is not None:
+            sizes = self.raw_sizes
+            indexes = [i for i in indexes if sizes[i] >= min_size]
+        return list(indexes)
+
+    def total_size(self, indexes=None):
+        if indexes is None:
+            return self.total
+        sizes = self.raw_sizes
+        return sum(sizes[i] for i in indexes)
+
+    def size_by_library(self):
+        """Return {library: total raw size}"""
+        totals = [0] * len(self.libraries)
+        for library_id, size in zip(self.library_ids, self.raw_sizes):
+            totals[library_id] += size
+        return dict(zip(self.libraries, totals))
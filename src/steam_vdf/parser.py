@@ -0,0 +1,229 @@
+import re
+
+# One token per match. Quoted strings may contain escaped quotes and
+# span lines; a quote that is not closed before the end of the text read
+# so far is completed by the next block.
+_TOKEN_RE = re.compile(
+    r'"(?P<quoted>(?:\\.|[^\\"])*)"'
+    r"|(?P<open>\{)"
+    r"|(?P<close>\})"
+    r"|(?P<comment>//[^\n]*)"
+    r"|(?P<condition>\[[^\]\n]*\])"
+    r'|(?P<bare>[^\s{}"\[]+)'
+    r'|(?P<unterminated>")'
+)
+
+_OPEN_TOKEN = ("open", None)
+_CLOSE_TOKEN = ("close", None)
+
+# Characters read from the file at a time when tokenizing
+TOKENIZE_BLOCK_SIZE = 64 * 1024
+
+_UNESCAPE_RE = re.compile(r"\\[ntvbrfa\\?\"']")
+_UNESCAPE_MAP = {
+    r"\n": "\n",
+    r"\t": "\t",
+    r"\v": "\v",
+    r"\b": "\b",
+    r"\r": "\r",
+    r"\f": "\f",
+    r"\a": "\a",
+    r"\\": "\\",
+    r"\?": "?",
+    r"\"": '"',
+    r"\'": "'",
+}
+
+START = "start"
+VALUE = "value"
+END = "end"
+
+
+def _unescape(text):
+    if "\\" not in text:
+        return text
+    return _UNESCAPE_RE.sub(lambda m: _UNESCAPE_MAP[m.group()], text)
+
+
+def iter_tokens(fp):
+    """
+    Tokenize a text VDF file object.
+    Yields ("string", text), ("open", None) and ("close", None) tuples.
+    Comments and [$PLATFORM] conditionals are dropped.
+
+    The file is read in blocks of whole lines and each block is scanned
+    with a single regex pass, so memory use is bounded by the block size
+    (or the longest quoted string) rather than the file size.
+    """
+    pending = ""
+    first = True
+    while True:
+        block = fp.read(TOKENIZE_BLOCK_SIZE)
+        if first:
+            block = block.lstrip("\ufeff")
+            first = False
+        text = pending + block if pending else block
+
+        # Only complete lines are scanned until the end of the file
+        end = len(text) if not block else text.rfind("\n") + 1
+        rest = end
+        for match in _TOKEN_RE.finditer(text, 0, end):
+            kind = match.lastgroup
+            if kind == "quoted":
+                yield "string", match.group("quoted")
+            elif kind == "bare":
+                yield "string", match.group("bare")
+            elif kind == "open":
+                yield _OPEN_TOKEN
+            elif kind == "close":
+                yield _CLOSE_TOKEN
+            elif kind == "unterminated":
+                if not block:
+                    raise SyntaxError("vdf: unexpected EOF (open quote?)")
+                # The string continues in the next block
+                rest = match.start()
+                break
+
+        if not block:
+            return
+        pending = text[rest:]
+
+
+def iter_events(fp, prune=None):
+    """
+    Parse a text VDF file object into a flat stream of events:
+
+        ("start", key, None)  a map named key begins
+        ("value", key, value) a string key/value pair
+        ("end", None, None)   the innermost open map ends
+
+    Nothing is materialized, so memory use does not depend on file size.
+    If prune is given, it is called with the list of map keys leading to
+    every map that is about to start (including its own key); when it
+    returns True the whole subtree is skipped without producing events.
+    Raises SyntaxError for malformed input.
+    """
+    tokens = iter_tokens(fp)
+    stack = []
+    key = None
+
+    for kind, text in tokens:
+        if kind == "string":
+            if key is None:
+                key = _unescape(text)
+            else:
+                yield VALUE, key, _unescape(text)
+                key = None
+        elif kind == "open":
+            if key is None:
+                raise SyntaxError("vdf: '{' without a key")
+
+            stack.append(key)
+            if prune is not None and prune(stack):
+                stack.pop()
+                _skip_block(tokens)
+            else:
+                yield START, key, None
+            key = None
+        else:
+            if key is not None:
+                raise SyntaxError(f"vdf: key {key!r} has no value")
+            if not stack:
+                raise SyntaxError("vdf: one too many closing brackets")
+            stack.pop()
+            yield END, None, None
+
+    if key is not None or stack:
+        raise SyntaxError("vdf: unexpected EOF (unclosed bracket?)")
+
+
+def _skip_block(tokens):
+    """Consume tokens up to and including the close of the current map"""
+    depth = 1
+    for kind, _ in tokens:
+        if kind == "open":
+            depth += 1
+        elif kind == "close":
+            depth -= 1
+            if depth == 0:
+                return
+    raise SyntaxError("vdf: unexpected EOF (unclosed bracket?)")
+
+
+def extract_fields(fp, path, keys):
+    """
+    Read selected string values from a text VDF without parsing all of it.
+
+    Returns a {key: value} dict for those of keys that are found directly
+    inside the map at path (a sequence of map names starting at the root,
+    e.g. ("AppState",)). Maps below path are skipped, and reading stops as
+    soon as every key has been found or the target map is closed.
+    """
+    path = list(path)
+    depth = len(path)
+    wanted = set(keys)
+    found = {}
+    stack = []
+
+    def prune(keys_so_far):
+        # Skip anything that is not on the way to, or at, the target map
+        return len(keys_so_far) > depth or (
+            keys_so_far != path[: len(keys_so_far)]
+        )
+
+    for event, key, value in iter_events(fp, prune=prune):
+        if event == START:
+            stack.append(key)
+        elif event == END:
+            if len(stack) == depth:
+                break
+            stack.pop()
+        elif key in wanted and len(stack) == depth:
+            found[key] = value
+            if len(found) == len(wanted):
+                break
+
+    return found
+
+
+def iter_child_fields(fp, path, keys):
+    """
+    Read selected values from every map directly inside the map at path.
+
+    Yields a (name, {key: value}) pair per child map, holding those of
+    keys found directly in it. path is a sequence of map names starting
+    at the root; None matches any name and names are compared ignoring
+    case, as Steam is not consistent about it. Maps off the path and
+    below the children are skipped, and reading stops as soon as the map
+    at path is closed.
+    """
+    path = [None if name is None else name.casefold() for name in path]
+    depth = len(path)
+    wanted = {key.casefold(): key for key in keys}
+
+    def prune(keys_so_far):
+        # Maps above the target were checked when they started, so only
+        # the innermost key needs to be compared
+        level = len(keys_so_far)
+        if level > depth:
+            return level > depth + 1
+        expected = path[level - 1]
+        return expected is not None and expected != keys_so_far[-1].casefold()
+
+    level = 0
+    child = fields = None
+    for event, key, value in iter_events(fp, prune=prune):
+        if event == START:
+            level += 1
+            if level == depth + 1:
+                child, fields = key, {}
+        elif event == END:
+            if level == depth + 1:
+                yield child, fields
+            elif level == depth:
+                return
+            level -= 1
+        elif level == depth + 1:
+            name = wanted.get(key.casefold())
+            if name is not None:
+                fields[name] = value
@@ -0,0 +1,295 @@
+import asyncio
+import logging
+import os
+import signal
+import subprocess
+import time
+
+import psutil
+
+from steam_vdf import profiling
+
+logger = logging.getLogger("cli")
+
+STOP_TIMEOUT = 10  # Maximum seconds to wait for Steam to exit
+START_TIMEOUT = 60  # Maximum seconds to wait for Steam to start
+
+# Delays between readiness checks grow from the first to the second value
+POLL_DELAYS = (0.05, 0.5)
+
+# Seconds a located Steam PID (or its absence) is trusted
+LOCATE_TTL = 1.0
+
+PROC_PATH = "/proc"
+
+
+class RestartError(Exception):
+    """Steam could not be started again"""
+
+
+def get_pid_file():
+    """Path of the pid file the Steam client writes on Linux"""
+    return os.path.expanduser("~/.steam/steam.pid")
+
+
+def get_pipe_path():
+    """Path of the IPC pipe the Steam client creates once it is running"""
+    return os.path.expanduser("~/.steam/steam.pipe")
+
+
+def pid_alive(pid):
+    """Whether a process with this PID exists"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_pid_file(path=None):
+    """
+    Return the PID recorded in Steam's pid file if that process is still
+    alive, None otherwise
+    """
+    try:
+        with open(path or get_pid_file(), "r") as f:
+            pid = int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+    return pid if pid > 0 and pid_alive(pid) else None
+
+
+def _process_name(pid):
+    """Name of a process, from /proc/<pid>/comm where available"""
+    try:
+        with open(os.path.join(PROC_PATH, str(pid), "comm"), "r") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        if os.path.isdir(PROC_PATH):
+            return None
+    except OSError:
+        return None
+    try:
+        return psutil.Process(pid).name()
+    except psutil.Error:
+        return None
+
+
+def _is_steam_name(name):
+    return name is not None and name.lower() == "steam"
+
+
+class SteamLocator:
+    """
+    Finds the PID of the running Steam client.
+
+    The PID in Steam's pid file is checked first and only trusted if
+    that process is named steam. Otherwise the process table is scanned
+    once: /proc directly on Linux, psutil elsewhere. The answer, including
+    "not running", is cached for ttl seconds.
+    """
+
+    def __init__(self, ttl=LOCATE_TTL, pid_file=None):
+        self.ttl = ttl
+        self.pid_file = pid_file
+        self._pid = None
+        self._checked = None
+
+    def find(self, max_age=None):
+        """
+        Return the PID of the running Steam client or None. A cached answer
+        is used if it is at most max_age (default: ttl) seconds old.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        now = time.monotonic()
+        if self._checked is not None and now - self._checked <= max_age:
+            return self._pid
+
+        pid = self._from_pid_file()
+        if pid is None:
+            with profiling.phase("process scan"):
+                pid = self._scan()
+        self._pid = pid
+        self._checked = time.monotonic()
+        logger.debug("Located Steam process: %s", pid)
+        return pid
+
+    def invalidate(self):
+        self._checked = None
+
+    def _from_pid_file(self):
+        pid = read_pid_file(self.pid_file)
+        if pid is not None and _is_steam_name(_process_name(pid)):
+            return pid
+        return None
+
+    @staticmethod
+    def _scan():
+        if os.path.isdir(PROC_PATH):
+            with os.scandir(PROC_PATH) as entries:
+                for entry in entries:
+                    if entry.name.isdigit() and _is_steam_name(
+                        _process_name(entry.name)
+                    ):
+                        return int(entry.name)
+            return None
+
+        for proc in psutil.process_iter(["name"]):
+            if _is_steam_name(proc.info["name"]):
+                return proc.pid
+        return None
+
+
+_locator = SteamLocator()
+
+
+def find_steam_pid(max_age=None):
+    """
+    Return the PID of the running Steam client or None, using a shared
+    SteamLocator (see there)
+    """
+    return _locator.find(max_age)
+
+
+def stop_steam(pid, sig=signal.SIGTERM):
+    """Signal the Steam client to exit"""
+    _locator.invalidate()
+    os.kill(pid, sig)
+
+
+async def wait_for_exit(pid, timeout):
+    """
+    Wait until the process pid has exited. Uses a pidfd where the
+    platform has one (Linux 5.3+), so no polling is involved; otherwise
+    probes the PID with signal 0 at growing intervals.
+    Returns False if it is still running after timeout seconds.
+    """
+    loop = asyncio.get_running_loop()
+    pidfd = None
+    if hasattr(os, "pidfd_open"):
+        try:
+            pidfd = os.pidfd_open(pid)
+        except ProcessLookupError:
+            return True
+        except OSError as e:
+            logger.debug("pidfd_open failed, polling instead: %s", e)
+
+    if pidfd is not None:
+        exited = loop.create_future()
+        loop.add_reader(
+            pidfd, lambda: exited.done() or exited.set_result(None)
+        )
+        try:
+            await asyncio.wait_for(exited, timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            loop.remove_reader(pidfd)
+            os.close(pidfd)
+
+    return await _poll(lambda: not pid_alive(pid), timeout)
+
+
+async def wait_until_ready(launcher, previous_pid, timeout):
+    """
+    Wait until a newly started Steam client is up: its pid file names a
+    live steam process other than previous_pid and its IPC pipe exists. Where
+    Steam has never written a pid file, a running steam process is enough.
+
+    launcher is the Popen of the start command. It is reaped without
+    blocking on every check; if it fails before Steam is ready,
+    RestartError is raised.
+    Returns False if Steam is not ready after timeout seconds.
+    """
+    pipe_path = get_pipe_path()
+    # Even a stale pid file shows that this Steam client writes one
+    use_pid_file = os.path.exists(get_pid_file())
+
+    def ready():
+        returncode = launcher.poll()
+        if returncode:
+            raise RestartError(
+                f"Steam launcher exited with status {returncode}"
+            )
+        if use_pid_file:
+            pid = read_pid_file()
+            # Like SteamLocator, only trust the pid if it is still Steam:
+            # a recycled pid next to a leftover pipe is not a running client
+            return (
+                pid is not None
+                and pid != previous_pid
+                and os.path.exists(pipe_path)
+                and _is_steam_name(_process_name(pid))
+            )
+        return find_steam_pid(max_age=0) is not None
+
+    return await _poll(ready, timeout)
+
+
+async def _poll(condition, timeout):
+    """Check condition() at growing intervals until it is true"""
+    deadline = time.monotonic() + timeout
+    delay, max_delay = POLL_DELAYS
+    while not condition():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        await asyncio.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+    return True
+
+
+async def restart_steam(
+    command=("steam",),
+    stop_timeout=STOP_TIMEOUT,
+    start_timeout=START_TIMEOUT,
+):
+    """
+    Stop Steam if it is running, start it again and wait until it is
+    ready.
+
+    Returns False if the running Steam could not be stopped. Raises
+    RestartError if it could not be started again.
+    """
+    previous_pid = find_steam_pid(max_age=0)
+    if previous_pid is not None:
+        logger.info("Stopping Steam...")
+        logger.debug("Terminating Steam process %s", previous_pid)
+        try:
+            stop_steam(previous_pid)
+            logger.debug("Successfully signalled Steam process")
+        except ProcessLookupError:
+            logger.warning("No Steam process found to terminate")
+        except Exception as e:
+            logger.error(f"Error terminating Steam: {str(e)}")
+            return False
+
+        if not await wait_for_exit(previous_pid, stop_timeout):
+            logger.warning(
+                "Steam did not exit within %s seconds", stop_timeout
+            )
+
+    logger.info("Starting Steam...")
+    try:
+        launcher = subprocess.Popen(
+            list(command),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+        logger.debug("Steam start command issued")
+    except Exception as e:
+        raise RestartError(
+            f"Error starting Steam. Please restart manually: {e}"
+        ) from e
+
+    logger.debug("Waiting for Steam to start...")
+    if not await wait_until_ready(launcher, previous_pid, start_timeout):
+        raise RestartError(
+            f"Steam did not start within {start_timeout} seconds"
+        )
+    logger.debug("Steam successfully restarted")
+    return True
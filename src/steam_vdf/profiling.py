@@ -0,0 +1,178 @@
+import contextlib
+import json
+import os
+import threading
+import time
+
+# Counter names used by the instrumented modules
+FILES_PARSED = "files_parsed"
+BYTES_READ = "bytes_read"
+STAT_CALLS = "stat_calls"
+DIRS_WALKED = "dirs_walked"
+
+# Phase that collects the time spent writing to stdout
+OUTPUT_PHASE = "terminal output"
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+_enabled = False
+_started = None
+_lock = threading.Lock()
+_counters = {}
+_phases = {}  # phase path -> [calls, seconds]
+_local = threading.local()
+
+
+def enable():
+    """Start collecting timings and counters"""
+    global _enabled, _started
+    reset()
+    _enabled = True
+    _started = time.perf_counter()
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    global _started
+    with _lock:
+        _counters.clear()
+        _phases.clear()
+    _started = time.perf_counter()
+
+
+def count(name, n=1):
+    """Add n to a counter. Does nothing unless profiling is enabled."""
+    if _enabled:
+        with _lock:
+            _counters[name] = _counters.get(name, 0) + n
+
+
+def count_parsed(f):
+    """Count one parsed file and its size, given its path or open file"""
+    if _enabled:
+        try:
+            size = _file_size(f)
+        except (OSError, ValueError):
+            size = 0
+        with _lock:
+            _counters[FILES_PARSED] = _counters.get(FILES_PARSED, 0) + 1
+            _counters[BYTES_READ] = _counters.get(BYTES_READ, 0) + size
+
+
+def phase(name):
+    """
+    Context manager timing a phase of the command. Phases started inside
+    another phase (in the same thread) are reported as its children, e.g.
+    "info/storage/manifests". Costs one flag check when profiling is off.
+    """
+    if not _enabled:
+        return _NULL_CONTEXT
+    return _timed(name)
+
+
+@contextlib.contextmanager
+def _timed(name):
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    stack.append(name)
+    path = "/".join(stack)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stack.pop()
+        with _lock:
+            entry = _phases.setdefault(path, [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+
+
+class TimedStream:
+    """
+    Wraps a text stream (normally sys.stdout) and adds the time spent in
+    write and flush to the terminal output phase
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text):
+        start = time.perf_counter()
+        try:
+            return self._stream.write(text)
+        finally:
+            _add_output_time(time.perf_counter() - start)
+
+    def flush(self):
+        start = time.perf_counter()
+        try:
+            return self._stream.flush()
+        finally:
+            _add_output_time(time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def _add_output_time(elapsed):
+    if _enabled:
+        with _lock:
+            entry = _phases.setdefault(OUTPUT_PHASE, [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+
+
+def _file_size(f):
+    if isinstance(f, (str, bytes, os.PathLike)):
+        return os.path.getsize(f)
+    return os.fstat(f.fileno()).st_size
+
+
+def report():
+    """Return the collected timings and counters as a dict"""
+    with _lock:
+        phases = {
+            path: {"calls": calls, "seconds": seconds}
+            for path, (calls, seconds) in _phases.items()
+        }
+        counters = dict(_counters)
+    return {
+        "wall_seconds": time.perf_counter() - _started,
+        "phases": phases,
+        "counters": counters,
+    }
+
+
+def format_report(data, output_type="text"):
+    """
+    Render a report() dict as JSON or as an indented table of phases,
+    followed by the counters
+    """
+    if output_type == "json":
+        return json.dumps(data, indent=2)
+
+    lines = [f"Profile (wall time {data['wall_seconds'] * 1000:.1f} ms):"]
+    # Sorting on the path components keeps every phase below its parent
+    phases = sorted(data["phases"].items(), key=lambda p: p[0].split("/"))
+    for path, entry in phases:
+        depth = path.count("/")
+        label = "  " * depth + path.rsplit("/", 1)[-1]
+        lines.append(
+            f"  {label:<40} {entry['seconds'] * 1000:10.1f} ms"
+            f"  {entry['calls']:6d} calls"
+        )
+    if data["counters"]:
+        lines.append("Counters:")
+        for name, value in sorted(data["counters"].items()):
+            lines.append(f"  {name:<40} {value:10d}")
+    return "\n".join(lines)
@@ -0,0 +1,352 @@
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+logger = logging.getLogger("cli")
+
+JSONL = "jsonl"
+SQLITE = "sqlite"
+
+# Where a Steam install lives below a home directory (or a snapshot of
+# one), most likely first
+STEAM_ROOT_CANDIDATES = (
+    ".local/share/Steam",
+    ".steam/steam",
+    ".steam/root",
+    ".var/app/com.valvesoftware.Steam/.local/share/Steam",
+)
+
+
+def resolve_steam_root(path):
+    """
+    Return the Steam install at path, or below path if it is a home
+    directory, or None if there is none
+    """
+    path = os.path.abspath(path)
+    if _is_steam_root(path):
+        return path
+    for candidate in STEAM_ROOT_CANDIDATES:
+        root = os.path.join(path, candidate)
+        if _is_steam_root(root):
+            return os.path.realpath(root)
+    return None
+
+
+def _is_steam_root(path):
+    return os.path.isdir(os.path.join(path, "steamapps")) or os.path.isdir(
+        os.path.join(path, "userdata")
+    )
+
+
+def _within(path, directory):
+    return path == directory or path.startswith(
+        directory.rstrip(os.sep) + os.sep
+    )
+
+
+def _recorded_prefix(recorded, source, root):
+    """
+    Return the directory the recorded library paths were relative to on
+    the machine they come from, and the directory it corresponds to here.
+
+    When scanning a home directory, the recorded path ending in the same
+    Steam directory (e.g. .local/share/Steam) gives the original home,
+    which maps to source. Otherwise the first recorded library, which is
+    the Steam install itself, maps to root.
+    """
+    if source != root:
+        relative = os.path.relpath(root, source)
+        for path in recorded:
+            path = os.path.normpath(path)
+            if path.endswith(os.sep + relative):
+                return path[: -len(relative) - 1] or os.sep, source
+    if recorded:
+        return os.path.normpath(recorded[0]), root
+    return root, root
+
+
+def rebase_library_folders(args, source, root, steam=None):
+    """
+    Return the library folders of the Steam install at root as paths on
+    this machine, and the recorded library paths that were skipped.
+
+    libraryfolders.vdf holds absolute paths from the machine the install
+    lives on, which for a mounted or copied home are not the paths it has
+    here. Recorded paths are moved from their original prefix to source
+    (or root); libraries outside it, or missing here, are skipped rather
+    than read from whatever happens to be at that path on this machine.
+    """
+    from steam_vdf import users
+
+    recorded = users.read_library_folder_paths(args, root, steam)
+    old_prefix, new_prefix = _recorded_prefix(recorded, source, root)
+    new_prefix = os.path.realpath(new_prefix)
+
+    libraries = [root]
+    skipped = []
+    for path in recorded:
+        normalized = os.path.normpath(path)
+        if not _within(normalized, old_prefix):
+            skipped.append(path)
+            continue
+        rebased = os.path.realpath(
+            new_prefix + normalized[len(old_prefix.rstrip(os.sep)) :]
+        )
+        if not _within(rebased, new_prefix) or not os.path.isdir(rebased):
+            skipped.append(path)
+        elif rebased not in libraries:
+            libraries.append(rebased)
+    return libraries, skipped
+
+
+def scan_root(path):
+    """
+    Build the report of one Steam install: its library folders, installed
+    games, users and their shortcuts. Runs in a worker process; errors are
+    returned in the report instead of being raised.
+    """
+    # Imported here so the parent process only pays for them if it scans
+    # in-process
+    from steam_vdf import install, storage, users
+
+    started = time.time()
+    report = {"source": path, "steam_root": None, "scanned_at": started}
+    source = os.path.realpath(path)
+    root = resolve_steam_root(source)
+    if root is None:
+        report["error"] = "No Steam install found"
+        return report
+    report["steam_root"] = root
+
+    try:
+        args = argparse.Namespace(
+            debug=False, dump_vdfs=False, output="json", user=None
+        )
+        steam = install.SteamInstall(args, root=root)
+
+        libraries, skipped = rebase_library_folders(args, source, root, steam)
+        for library in skipped:
+            logger.warning(
+                "Skipping library %s of %s, it is not in the scanned tree",
+                library,
+                path,
+            )
+        games = []
+        for library in libraries:
+            for game in storage.get_installed_games(library):
+                game.library = library
+                games.append(game.as_dict())
+
+        accounts = []
+        for user_dir in steam.user_dirs:
+            info = steam.user_names.get(user_dir, {})
+            shortcuts_vdf = os.path.join(
+                steam.userdata_path, user_dir, "config", "shortcuts.vdf"
+            )
+            accounts.append(
+                {
+                    "user_id": user_dir,
+                    "account_name": info.get("AccountName"),
+                    "persona_name": info.get("PersonaName"),
+                    "shortcuts": users.read_shortcuts(shortcuts_vdf),
+                }
+            )
+    except Exception as e:
+        report["error"] = f"{type(e).__name__}: {e}"
+        return report
+
+    report.update(
+        libraries=libraries,
+        skipped_libraries=skipped,
+        games=games,
+        users=accounts,
+        total_game_size=sum(game["raw_size"] for game in games),
+        duration=time.time() - started,
+    )
+    return report
+
+
+def iter_reports(paths, jobs=None):
+    """
+    Scan every path on a process pool of jobs workers (default: one per
+    CPU) and yield the reports in the order the scans finish
+    """
+    if jobs == 1:
+        for path in paths:
+            yield scan_root(path)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(scan_root, path): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                # The worker itself died, e.g. it was killed
+                yield {
+                    "source": futures[future],
+                    "steam_root": None,
+                    "scanned_at": time.time(),
+                    "error": f"{type(e).__name__}: {e}",
+                }
+
+
+class JSONLinesWriter:
+    """Writes one JSON report per line, flushed as soon as it is written"""
+
+    def __init__(self, out):
+        self.out = out
+
+    def write(self, report):
+        self.out.write(json.dumps(report) + "\n")
+        self.out.flush()
+
+    def close(self):
+        pass
+
+
+class SQLiteWriter:
+    """
+    Writes reports into a SQLite database, one transaction per Steam
+    install. Rescanning a source replaces its previous rows.
+    """
+
+    TABLES = ("installs", "libraries", "games", "users", "shortcuts")
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS installs (
+            source TEXT PRIMARY KEY,
+            steam_root TEXT,
+            scanned_at REAL,
+            duration REAL,
+            total_game_size INTEGER,
+            error TEXT
+        );
+        CREATE TABLE IF NOT EXISTS libraries (
+            source TEXT, path TEXT
+        );
+        CREATE TABLE IF NOT EXISTS games (
+            source TEXT, library TEXT, app_id TEXT, name TEXT,
+            raw_size INTEGER
+        );
+        CREATE TABLE IF NOT EXISTS users (
+            source TEXT, user_id TEXT, account_name TEXT, persona_name TEXT
+        );
+        CREATE TABLE IF NOT EXISTS shortcuts (
+            source TEXT, user_id TEXT, app_id INTEGER, name TEXT, exe TEXT,
+            start_dir TEXT, launch_options TEXT, hidden INTEGER, tags TEXT
+        );
+    """
+
+    def __init__(self, db_path):
+        self._conn = sqlite3.connect(db_path)
+        self._conn.executescript(self.SCHEMA)
+
+    def write(self, report):
+        source = report["source"]
+        with self._conn:
+            for table in self.TABLES:
+                self._conn.execute(
+                    f"DELETE FROM {table} WHERE source = ?", (source,)
+                )
+            self._conn.execute(
+                "INSERT INTO installs VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    source,
+                    report["steam_root"],
+                    report["scanned_at"],
+                    report.get("duration"),
+                    report.get("total_game_size"),
+                    report.get("error"),
+                ),
+            )
+            self._conn.executemany(
+                "INSERT INTO libraries VALUES (?, ?)",
+                [(source, path) for path in report.get("libraries", [])],
+            )
+            self._conn.executemany(
+                "INSERT INTO games VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        source,
+                        game.get("library"),
+                        game["app_id"],
+                        game["name"],
+                        game["raw_size"],
+                    )
+                    for game in report.get("games", [])
+                ],
+            )
+            for user in report.get("users", []):
+                self._conn.execute(
+                    "INSERT INTO users VALUES (?, ?, ?, ?)",
+                    (
+                        source,
+                        user["user_id"],
+                        user["account_name"],
+                        user["persona_name"],
+                    ),
+                )
+                self._conn.executemany(
+                    "INSERT INTO shortcuts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            source,
+                            user["user_id"],
+                            shortcut["app_id"],
+                            shortcut["name"],
+                            shortcut["exe"],
+                            shortcut["start_dir"],
+                            shortcut["launch_options"],
+                            shortcut["hidden"],
+                            json.dumps(shortcut["tags"]),
+                        )
+                        for shortcut in user["shortcuts"]
+                    ],
+                )
+
+    def close(self):
+        self._conn.close()
+
+
+def scan(paths, output_format=JSONL, output=None, jobs=None):
+    """
+    Scan the Steam installs at paths in parallel and write a consolidated
+    report as JSON Lines (to output, or stdout) or into the SQLite
+    database at output. Each install is written as soon as its scan
+    finishes. Returns the number of installs that could not be scanned.
+    """
+    if output_format == SQLITE:
+        if not output:
+            raise ValueError("A database path is needed for SQLite output")
+        writer = SQLiteWriter(output)
+        out = None
+    else:
+        out = open(output, "w", encoding="utf-8") if output else sys.stdout
+        writer = JSONLinesWriter(out)
+
+    failed = 0
+    try:
+        for report in iter_reports(paths, jobs=jobs):
+            if report.get("error"):
+                failed += 1
+                logger.error(
+                    "Could not scan %s: %s", report["source"], report["error"]
+                )
+            else:
+                logger.info(
+                    "Scanned %s: %d games, %d users",
+                    report["source"],
+                    len(report["games"]),
+                    len(report["users"]),
+                )
+            writer.write(report)
+    finally:
+        writer.close()
+        if out is not None and out is not sys.stdout:
+            out.close()
+    return failed
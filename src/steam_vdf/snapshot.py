@@ -0,0 +1,421 @@
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import sys
+import time
+
+import vdf
+from humanize import naturalsize
+
+from steam_vdf import binary, emit, parser, profiling, storage, users
+
+logger = logging.getLogger("cli")
+
+SNAPSHOT_FORMAT = "steam-vdf-snapshot"
+SNAPSHOT_VERSION = 1
+
+# Kinds of file entries
+MANIFEST = "manifest"
+SHORTCUTS = "shortcuts"
+LOCALCONFIG = "localconfig"
+
+# AppState fields kept per installed game
+SNAPSHOT_MANIFEST_FIELDS = (
+    "appid",
+    "name",
+    "SizeOnDisk",
+    "buildid",
+    "LastUpdated",
+)
+
+# Changes reported by diff
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+
+class FileEntry:
+    """
+    One VDF file of a snapshot: its content hash and the data extracted
+    from it. The data is kept as the JSON text it was stored as and only
+    decoded when it is asked for, so files whose hash did not change are
+    never decoded.
+    """
+
+    __slots__ = ("kind", "digest", "raw", "_data")
+
+    def __init__(self, kind, digest, raw=None, data=None):
+        self.kind = kind
+        self.digest = digest
+        self.raw = raw
+        self._data = data
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = json.loads(self.raw)
+        return self._data
+
+    def encoded(self):
+        if self.raw is None:
+            self.raw = json.dumps(self.data, separators=(",", ":"))
+        return self.raw
+
+
+class Snapshot:
+    """
+    The state of a Steam install at one point in time.
+
+    header holds the Steam root, library folders and users; files maps the
+    path of every appmanifest, shortcuts.vdf and localconfig.vdf to a
+    FileEntry.
+
+    On disk a snapshot is gzip-compressed text: a JSON header line followed
+    by one line per file with its SHA-1, kind, JSON-encoded path and the
+    extracted data as compact JSON, tab separated.
+    """
+
+    def __init__(self, header, files):
+        self.header = header
+        self.files = files
+
+    @classmethod
+    def load(cls, path):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("format") != SNAPSHOT_FORMAT:
+                raise ValueError(f"{path} is not a steam-vdf snapshot")
+            if header.get("version") != SNAPSHOT_VERSION:
+                raise ValueError(
+                    f"Unsupported snapshot version {header.get('version')}"
+                )
+            files = {}
+            for line in f:
+                digest, kind, file_path, raw = line.rstrip("\n").split("\t", 3)
+                files[json.loads(file_path)] = FileEntry(kind, digest, raw)
+        return cls(header, files)
+
+    def save(self, path):
+        """Write the snapshot to path, replacing it atomically"""
+        buf = io.BytesIO()
+        # mtime=0 keeps the output identical for identical snapshots
+        with gzip.GzipFile(fileobj=buf, mode="wb", mtime=0) as gz:
+            with io.TextIOWrapper(gz, encoding="utf-8") as out:
+                out.write(json.dumps(self.header) + "\n")
+                for file_path, entry in sorted(self.files.items()):
+                    out.write(
+                        f"{entry.digest}\t{entry.kind}\t"
+                        f"{json.dumps(file_path)}\t{entry.encoded()}\n"
+                    )
+        binary.atomic_write(path, [buf.getvalue()])
+
+
+def _hash_file(path):
+    """Return the content of a file and its SHA-1 hex digest"""
+    with open(path, "rb") as f:
+        content = f.read()
+    profiling.count(profiling.BYTES_READ, len(content))
+    return content, hashlib.sha1(content).hexdigest()
+
+
+def _int_field(fields, key):
+    """Return a numeric manifest field, or 0 if it is missing or invalid"""
+    try:
+        return int(fields.get(key, 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _read_manifest_data(content, library):
+    text = content.decode("utf-8", errors="replace")
+    try:
+        fields = parser.extract_fields(
+            io.StringIO(text), ("AppState",), SNAPSHOT_MANIFEST_FIELDS
+        )
+    except SyntaxError:
+        try:
+            fields = vdf.loads(text).get("AppState", {})
+        except SyntaxError as e:
+            logger.error("Error reading manifest in %s: %s", library, e)
+            fields = {}
+    return {
+        "app_id": fields.get("appid", "Unknown"),
+        "name": fields.get("name", "Unknown"),
+        "size": _int_field(fields, "SizeOnDisk"),
+        "build_id": fields.get("buildid"),
+        "last_updated": _int_field(fields, "LastUpdated"),
+        "library": library,
+    }
+
+
+def _iter_files(steam):
+    """Yield (path, kind, context) for every file a snapshot covers"""
+    for library in steam.library_folders:
+        for manifest_path in storage.list_manifests(library):
+            yield manifest_path, MANIFEST, library
+    for user_dir in steam.user_dirs:
+        config = os.path.join(steam.userdata_path, user_dir, "config")
+        yield os.path.join(config, "shortcuts.vdf"), SHORTCUTS, user_dir
+        yield os.path.join(config, "localconfig.vdf"), LOCALCONFIG, user_dir
+
+
+def _extract(kind, context, content):
+    """
+    Return the data of one changed file, parsed from the same content the
+    hash was computed from
+    """
+    profiling.count(profiling.FILES_PARSED)
+    if kind == MANIFEST:
+        return _read_manifest_data(content, context)
+    if kind == SHORTCUTS:
+        try:
+            shortcuts = users.shortcut_entries(vdf.binary_loads(content))
+        except Exception as e:
+            logger.error("Error reading shortcuts of user %s: %s", context, e)
+            shortcuts = []
+        return {"user_id": context, "shortcuts": shortcuts}
+
+    text = io.StringIO(content.decode("utf-8", errors="replace"))
+    try:
+        recent_games = users.read_recent_games(text, users.RECENT_GAMES_COUNT)
+    except Exception as e:
+        logger.error("Error reading localconfig.vdf of %s: %s", context, e)
+        recent_games = []
+    return {
+        "user_id": context,
+        "recent_games": [
+            {
+                "app_id": game["app_id"],
+                "last_played": int(game["last_played"].timestamp()),
+            }
+            for game in recent_games
+        ],
+    }
+
+
+def take_snapshot(steam, previous=None):
+    """
+    Build a Snapshot of a SteamInstall. Every file is hashed; with a
+    previous Snapshot, files whose hash has not changed keep their stored
+    data instead of being parsed again.
+    """
+    header = {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "created": time.time(),
+        "steam_root": steam.root,
+        "libraries": list(steam.library_folders),
+        "users": {},
+    }
+    for user_dir in steam.user_dirs:
+        info = steam.user_names.get(user_dir, {})
+        header["users"][user_dir] = {
+            "persona_name": info.get("PersonaName"),
+            "account_name": info.get("AccountName"),
+        }
+
+    old_files = previous.files if previous is not None else {}
+    files = {}
+    reused = 0
+    with profiling.phase("snapshot files"):
+        for path, kind, context in _iter_files(steam):
+            try:
+                content, digest = _hash_file(path)
+            except OSError:
+                continue
+            old = old_files.get(path)
+            if old is not None and old.digest == digest:
+                files[path] = old
+                reused += 1
+                continue
+            data = _extract(kind, context, content)
+            files[path] = FileEntry(kind, digest, data=data)
+
+    logger.debug(
+        "Snapshot of %d files, %d unchanged since the previous one",
+        len(files),
+        reused,
+    )
+    return Snapshot(header, files)
+
+
+def diff_snapshots(old, new):
+    """
+    Compare two snapshots and return a list of changes, each a dict with
+    "change" (added, removed or changed), "type" (library, user, game,
+    shortcut or recent_game) and the fields of the entry.
+
+    Files with the same hash in both snapshots are skipped without
+    decoding their data, so the cost is a hash comparison per file plus
+    work proportional to the entries of the files that changed.
+    """
+    changes = []
+
+    old_libraries = set(old.header["libraries"])
+    new_libraries = set(new.header["libraries"])
+    for library in sorted(new_libraries - old_libraries):
+        changes.append({"change": ADDED, "type": "library", "path": library})
+    for library in sorted(old_libraries - new_libraries):
+        changes.append({"change": REMOVED, "type": "library", "path": library})
+
+    old_users = old.header["users"]
+    new_users = new.header["users"]
+    for user_id in sorted(new_users.keys() - old_users.keys()):
+        changes.append(
+            {
+                "change": ADDED,
+                "type": "user",
+                "user_id": user_id,
+                **new_users[user_id],
+            }
+        )
+    for user_id in sorted(old_users.keys() - new_users.keys()):
+        changes.append(
+            {
+                "change": REMOVED,
+                "type": "user",
+                "user_id": user_id,
+                **old_users[user_id],
+            }
+        )
+
+    for path, entry in new.files.items():
+        before = old.files.get(path)
+        if before is None:
+            changes.extend(_diff_file(entry.kind, None, entry.data))
+        elif before.digest != entry.digest:
+            changes.extend(_diff_file(entry.kind, before.data, entry.data))
+    for path, entry in old.files.items():
+        if path not in new.files:
+            changes.extend(_diff_file(entry.kind, entry.data, None))
+
+    return changes
+
+
+def _diff_file(kind, before, after):
+    if kind == MANIFEST:
+        return _diff_manifest(before, after)
+    if kind == SHORTCUTS:
+        return _diff_keyed(
+            "shortcut",
+            before,
+            after,
+            "shortcuts",
+            lambda s: (s["name"], s["exe"]),
+        )
+    return _diff_keyed(
+        "recent_game",
+        before,
+        after,
+        "recent_games",
+        lambda game: game["app_id"],
+    )
+
+
+def _diff_manifest(before, after):
+    if before is None:
+        return [{"change": ADDED, "type": "game", **after}]
+    if after is None:
+        return [{"change": REMOVED, "type": "game", **before}]
+    changed = {
+        key: [before.get(key), value]
+        for key, value in after.items()
+        if before.get(key) != value
+    }
+    if not changed:
+        return []
+    return [
+        {
+            "change": CHANGED,
+            "type": "game",
+            "app_id": after["app_id"],
+            "name": after["name"],
+            "library": after["library"],
+            "size_delta": after["size"] - before["size"],
+            "fields": changed,
+        }
+    ]
+
+
+def _diff_keyed(entry_type, before, after, key, identity):
+    """Diff the entries of one user's file, matched on identity()"""
+    user_id = (after or before)["user_id"]
+    old = {identity(e): e for e in before[key]} if before else {}
+    new = {identity(e): e for e in after[key]} if after else {}
+
+    changes = []
+    for ident, entry in new.items():
+        previous = old.get(ident)
+        if previous is None:
+            change = ADDED
+        elif previous != entry:
+            change = CHANGED
+        else:
+            continue
+        changes.append(
+            {"change": change, "type": entry_type, "user_id": user_id, **entry}
+        )
+    for ident, entry in old.items():
+        if ident not in new:
+            changes.append(
+                {
+                    "change": REMOVED,
+                    "type": entry_type,
+                    "user_id": user_id,
+                    **entry,
+                }
+            )
+    return changes
+
+
+_CHANGE_MARKS = {ADDED: "+", REMOVED: "-", CHANGED: "~"}
+
+
+def format_change(change):
+    """Render one change as a line of text"""
+    mark = _CHANGE_MARKS[change["change"]]
+    kind = change["type"]
+    if kind == "library":
+        return f"{mark} library {change['path']}"
+    if kind == "user":
+        name = change["persona_name"] or change["account_name"]
+        line = f"{mark} user {change['user_id']}"
+        return f"{line} ({name})" if name else line
+    if kind == "game":
+        line = f"{mark} game {change['name']} (ID: {change['app_id']})"
+        if change["change"] != CHANGED:
+            return f"{line}, {naturalsize(change['size'])}"
+        details = []
+        if change["size_delta"]:
+            sign = "+" if change["size_delta"] > 0 else "-"
+            details.append(
+                f"size {sign}{naturalsize(abs(change['size_delta']))}"
+            )
+        if "build_id" in change["fields"]:
+            old_build, new_build = change["fields"]["build_id"]
+            details.append(f"build {old_build} -> {new_build}")
+        return f"{line}: {', '.join(details) or 'updated'}"
+    if kind == "shortcut":
+        return f"{mark} shortcut {change['name']} (user {change['user_id']})"
+    return (
+        f"{mark} recent game {change['app_id']} " f"(user {change['user_id']})"
+    )
+
+
+def write_diff(changes, output_type, out=None):
+    """
+    Write the changes as text, one line each, or as JSON or NDJSON (one
+    change per line) with a single write
+    """
+    if output_type in emit.STRUCTURED_OUTPUTS:
+        emit.write_result({"changes": changes}, output_type, changes, out)
+        return
+    out = sys.stdout if out is None else out
+    if changes:
+        out.write("".join(format_change(change) + "\n" for change in changes))
+    else:
+        out.write("No changes\n")
+    out.flush()
@@ -1,111 +1,573 @@
+import heapq
 import logging
 import os
+import queue
 import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 import vdf
 from humanize import naturalsize  # Add this import
 
+from steam_vdf import appinfo, cache, inventory, parser, profiling
+
 logger = logging.getLogger("cli")
 
+# AppState keys read from each appmanifest
+MANIFEST_FIELDS = ("appid", "name", "SizeOnDisk")
 
-def analyze_storage(args, steam_library):
-    storage_info = get_library_storage_info(steam_library)
-    if storage_info:
-        print("\nStorage Information:")
-        print(f"Total: {storage_info['total']}")
-        print(f"Used: {storage_info['used']}")
-        print(f"Free: {storage_info['free']}")
 
-    installed_games = get_installed_games(steam_library)
-    if installed_games:
-        # Sort the games list by size in descending order
-        sorted_games = sorted(
-            installed_games, key=lambda x: x["raw_size"], reverse=True
-        )
+class TopN:
+    """
+    Keep the n largest records seen so far in a bounded min-heap, along
+    with the running count and total size of every record pushed.
+    With n=None every record is kept.
+    """
 
-        # Only take top 20 if --all is not specified
-        if not args.all:
-            sorted_games = sorted_games[:20]
-            print("\nInstalled Games (Top 20 by size):")
-        else:
-            print(f"\nInstalled Games (All {len(sorted_games)} games):")
+    def __init__(self, n, key="raw_size"):
+        self.n = n
+        self.key = key
+        self.count = 0
+        self.total = 0
+        self._heap = []
+
+    def push(self, record):
+        value = record[self.key]
+        self.count += 1
+        self.total += value
+        # The negated sequence number breaks ties in favour of records
+        # seen first, and keeps the dicts themselves from being compared
+        item = (value, -self.count, record)
+        if self.n is None or len(self._heap) < self.n:
+            heapq.heappush(self._heap, item)
+        elif item > self._heap[0]:
+            heapq.heapreplace(self._heap, item)
+
+    def largest(self):
+        """Return the kept records, largest first"""
+        return [record for _, _, record in sorted(self._heap, reverse=True)]
+
+
+class _Progress:
+    """Transient status line on stderr, only shown on interactive terminals"""
+
+    INTERVAL = 0.1  # Seconds between redraws
 
-        total_size = sum(game["raw_size"] for game in installed_games)
+    def __init__(self):
+        self.enabled = sys.stderr.isatty()
+        self._last = 0.0
 
-        # Find the longest game name for padding
-        max_name_length = max(len(game["name"]) for game in sorted_games)
+    def update(self, message):
+        """
+        Redraw the status line with message(), which is only called (and
+        its sizes formatted) when a redraw is actually due
+        """
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if now - self._last < self.INTERVAL:
+            return
+        self._last = now
+        sys.stderr.write(f"\r\033[K{message()}")
+        sys.stderr.flush()
 
-        # Print header with extra spacing
-        print(f"{'Size':>12}    {'Game Name':<{max_name_length}}    {'(ID)':<12}")
-        print("-" * (12 + 4 + max_name_length + 4 + 12))  # Separator line
+    def clear(self):
+        if self.enabled:
+            sys.stderr.write("\r\033[K")
+            sys.stderr.flush()
 
-        # Print each game with aligned columns and extra spacing
-        for game in sorted_games:
+
+def analyze_storage(args, steam_library, libraries=None):
+    """
+    Print storage usage for the Steam install at steam_library. If a list
+    of libraries is given, installed games are read from all of them.
+    """
+    # Reuse directory and manifest results from previous runs when possible
+    index = None if args.no_cache else cache.SizeIndex.open_default()
+    progress = _Progress()
+    try:
+        with profiling.phase("disk usage"):
+            storage_info = get_library_storage_info(steam_library)
+        if storage_info:
+            print("\nStorage Information:")
+            print(f"Total: {storage_info['total']}")
+            print(f"Used: {storage_info['used']}")
+            print(f"Free: {storage_info['free']}")
+
+        games, sorted_games = _read_games(
+            args, steam_library, libraries, index, progress
+        )
+        if games.count:
+            if not args.all:
+                print("\nInstalled Games (Top 20 by size):")
+            else:
+                print(f"\nInstalled Games (All {games.count} games):")
+
+            # Find the longest game name for padding
+            max_name_length = max(len(game.name) for game in sorted_games)
+
+            # Print header with extra spacing
             print(
-                f"{game['size']:>12}    "
-                f"{game['name']:<{max_name_length}}    "
-                f"(ID: {game['app_id']})"
+                f"{'Size':>12}    {'Game Name':<{max_name_length}}    {'(ID)':<12}"
             )
+            print("-" * (12 + 4 + max_name_length + 4 + 12))  # Separator line
 
-        print("-" * (12 + 4 + max_name_length + 4 + 12))
-        print(f"\nTotal space used by all games: {naturalsize(total_size)}")
-    else:
-        print("No games installed")
-
-    # Add the non-Steam usage display
-    print("\nLargest Non-Steam Directories (Top 20):")
-    print("-" * 70)  # Increased separator length
-    sizes = get_non_steam_usage(steam_library)
-    if sizes:
-        total_non_steam = sum(item["raw_size"] for item in sizes)
-        for item in sizes[:20]:  # Always show top 20 for non-Steam directories
-            # Get relative path from home directory if possible
-            home = str(Path.home())
-            display_path = item["path"].replace(home, "~")
-            print(f"{item['size']:>12}    {display_path}")
+            # Print each game with aligned columns and extra spacing
+            for game in sorted_games:
+                print(
+                    f"{game.size:>12}    "
+                    f"{game.name:<{max_name_length}}    "
+                    f"(ID: {game.app_id})"
+                )
+
+            print("-" * (12 + 4 + max_name_length + 4 + 12))
+            print(
+                f"\nTotal space used by all games: {naturalsize(games.total)}"
+            )
+        else:
+            print("No games installed")
+
+        # Add the non-Steam usage display
+        print("\nLargest Non-Steam Directories (Top 20):")
         print("-" * 70)  # Increased separator length
-        print(
-            f"Total size of all non-Steam directories: {naturalsize(total_non_steam)}"
+        sizes = _size_non_steam_directories(steam_library, index, progress)
+
+        if sizes.count:
+            home = str(Path.home())
+            for item in sizes.largest():
+                # Get relative path from home directory if possible
+                display_path = item.path.replace(home, "~")
+                print(f"{item.size:>12}    {display_path}")
+            print("-" * 70)  # Increased separator length
+            print(
+                f"Total size of all non-Steam directories: {naturalsize(sizes.total)}"
+            )
+        else:
+            print("No accessible non-Steam directories found")
+    finally:
+        if index is not None:
+            index.close()
+
+
+def collect_storage(args, steam_library, libraries=None):
+    """
+    Return the storage usage that analyze_storage prints as a dict: disk
+    usage, the installed games largest first (all of them with --all,
+    otherwise the top 20), the largest non-Steam directories and totals.
+    Games and directories are GameRecord and DirectoryRecord objects.
+    """
+    index = None if args.no_cache else cache.SizeIndex.open_default()
+    progress = _Progress()
+    try:
+        with profiling.phase("disk usage"):
+            storage_info = get_library_storage_info(steam_library)
+        games, sorted_games = _read_games(
+            args, steam_library, libraries, index, progress
         )
+        sizes = _size_non_steam_directories(steam_library, index, progress)
+    finally:
+        if index is not None:
+            index.close()
+
+    return {
+        "disk": storage_info,
+        "game_count": games.count,
+        "total_game_size": games.total,
+        "games": sorted_games,
+        "non_steam_directories": sizes.largest(),
+        "total_non_steam_size": sizes.total,
+    }
+
+
+def iter_storage_records(storage):
+    """Flatten a collect_storage() dict into NDJSON records"""
+    if storage["disk"]:
+        yield {"type": "disk", **storage["disk"]}
+    for game in storage["games"]:
+        yield {"type": "game", **game.as_dict()}
+    for item in storage["non_steam_directories"]:
+        yield {"type": "directory", **item.as_dict()}
+    yield {
+        "type": "storage_totals",
+        "game_count": storage["game_count"],
+        "total_game_size": storage["total_game_size"],
+        "total_non_steam_size": storage["total_non_steam_size"],
+    }
+
+
+def _read_games(args, steam_library, libraries, index, progress):
+    """
+    Read the installed games and return the collection they were pushed
+    to along with its rows largest first, with unknown names filled in
+    """
+    # Only keep the top 20 by size in memory if --all is not specified;
+    # otherwise every game goes into a columnar inventory
+    games = inventory.Inventory() if args.all else TopN(20)
+    if libraries:
+        installed_games = get_installed_games_all(libraries, index=index)
     else:
-        print("No accessible non-Steam directories found")
+        installed_games = iter_installed_games(steam_library, index=index)
+    with profiling.phase("manifests"):
+        for game in installed_games:
+            games.push(game)
+            progress.update(
+                lambda: f"Reading manifests: {games.count} games, "
+                f"{naturalsize(games.total)} so far"
+            )
+    progress.clear()
+
+    sorted_games = games.largest() if games.count else []
+    _fill_unknown_names(steam_library, sorted_games)
+    return games, sorted_games
+
+
+def _size_non_steam_directories(steam_library, index, progress):
+    """Return a TopN of the 20 largest directories next to Steam"""
+    sizes = TopN(20)  # Always show top 20 for non-Steam directories
+    largest = 0
+    with profiling.phase("non-Steam directories"):
+        for item in iter_non_steam_usage(steam_library, index=index):
+            sizes.push(item)
+            largest = max(largest, item.raw_size)
+            progress.update(
+                lambda: f"Sized {sizes.count} directories, "
+                f"{naturalsize(sizes.total)} so far "
+                f"(largest: {naturalsize(largest)})"
+            )
+    progress.clear()
+    return sizes
+
+
+def _fill_unknown_names(steam_library, games):
+    """Name games whose manifest has no name from the appinfo cache"""
+    unknown = [game.app_id for game in games if game.name == "Unknown"]
+    if not unknown:
+        return
+    with profiling.phase("app names"):
+        names = appinfo.resolve_app_names(steam_library, unknown)
+    for game in games:
+        if game.name == "Unknown" and game.app_id in names:
+            game.name = names[game.app_id]
+
+
+def get_installed_games(library_path, index=None):
+    """
+    Read the installed games of a library from its appmanifest files.
+    If a SizeIndex is given, manifests whose mtime and size are unchanged
+    since the last run are not parsed again.
+    """
+    return list(iter_installed_games(library_path, index=index))
+
+
+def iter_installed_games(library_path, index=None):
+    """
+    Generator version of get_installed_games, yielding one record per
+    appmanifest as soon as it has been read
+    """
+    for manifest_path in list_manifests(library_path):
+        record = read_manifest(manifest_path, index)
+        if record:
+            yield record
+
+    if index:
+        index.commit()
+
+
+def get_installed_games_all(libraries, max_workers=8, index=None):
+    """
+    Read the installed games of every library concurrently and merge them
+    into one inventory.
+
+    Listing the steamapps directories and parsing the manifests both run
+    on a bounded thread pool, so a slow SD card or network mount does not
+    hold up the other libraries. Each record gets a "library" key. If the
+    same app ID shows up in several libraries (e.g. a stale manifest),
+    the copy from the library listed first is kept.
+    """
+    results = queue.Queue()
+    jobs = {}
+    games = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for position, library in enumerate(libraries):
+            future = executor.submit(list_manifests, library)
+            jobs[future] = ("list", position, library)
+            future.add_done_callback(results.put)
+
+        while jobs:
+            future = results.get()
+            kind, position, library = jobs.pop(future)
+
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.error("Error reading library %s: %s", library, e)
+                continue
+
+            if kind == "list":
+                for manifest_path in result:
+                    parse = executor.submit(
+                        read_manifest, manifest_path, index
+                    )
+                    jobs[parse] = ("manifest", position, library)
+                    parse.add_done_callback(results.put)
+            elif result:
+                result.library = library
+                key = result["app_id"]
+                if key == "Unknown":
+                    key = (library, result["name"])
+
+                if key in games:
+                    kept_position, kept = games[key]
+                    logger.debug(
+                        "App %s found in both %s and %s",
+                        result["app_id"],
+                        kept["library"],
+                        library,
+                    )
+                    if kept_position <= position:
+                        continue
+                games[key] = (position, result)
+
+    if index:
+        index.commit()
 
+    return [record for _, record in games.values()]
 
-def get_installed_games(library_path):
+
+def list_manifests(library_path):
+    """Return the paths of all appmanifest files in a library"""
     apps_path = os.path.join(library_path, "steamapps")
-    installed_games = []
-
-    if os.path.exists(apps_path):
-        for file in os.listdir(apps_path):
-            if file.startswith("appmanifest_"):
-                manifest_path = os.path.join(apps_path, file)
-                try:
-                    with open(manifest_path, "r", encoding="utf-8") as f:
-                        manifest = vdf.load(f)
-                        app_data = manifest.get("AppState", {})
-                        size_on_disk = int(app_data.get("SizeOnDisk", 0))
-                        installed_games.append(
-                            {
-                                "name": app_data.get("name", "Unknown"),
-                                "app_id": app_data.get("appid", "Unknown"),
-                                "size": naturalsize(size_on_disk),
-                                "raw_size": size_on_disk,
-                            }
-                        )
-                except Exception as e:
-                    logger.error(f"Error reading manifest {file}: {str(e)}")
-
-    return installed_games
-
-
-def get_non_steam_usage(steam_path):
+    if not os.path.exists(apps_path):
+        return []
+
+    profiling.count(profiling.DIRS_WALKED)
+    return [
+        entry.path
+        for entry in os.scandir(apps_path)
+        if entry.name.startswith("appmanifest_")
+    ]
+
+
+def read_manifest(manifest_path, index=None):
+    """
+    Read the name, app ID and size from one appmanifest file.
+    Returns None if the manifest cannot be read.
+    """
+    try:
+        st = os.stat(manifest_path)
+        profiling.count(profiling.STAT_CALLS)
+        cached = index.lookup_manifest(manifest_path, st) if index else None
+        if cached:
+            name, app_id, size_on_disk = cached
+        else:
+            app_data = _parse_manifest(manifest_path)
+            name = app_data.get("name", "Unknown")
+            app_id = app_data.get("appid", "Unknown")
+            size_on_disk = int(app_data.get("SizeOnDisk", 0))
+            if index:
+                index.update_manifest(
+                    manifest_path, st, name, app_id, size_on_disk
+                )
+    except Exception as e:
+        logger.error(
+            f"Error reading manifest {os.path.basename(manifest_path)}: "
+            f"{str(e)}"
+        )
+        return None
+
+    return inventory.GameRecord(app_id, name, size_on_disk)
+
+
+def _scan_tree_size(path, index=None):
+    """
+    Sum the size of all regular files below path.
+
+    Uses an explicit stack of os.scandir iterators so each file costs a
+    single lstat (DirEntry.stat with follow_symlinks=False), and file types
+    come from the cached d_type instead of extra isdir/islink calls.
+    Symlinks are never followed or counted.
+
+    With a SizeIndex, directories whose inode and mtime match the index
+    are not listed again; their stored file total is reused and only
+    their subdirectories are visited.
+    """
+    total = 0
+    # Counted locally and reported once, to keep the loop cheap
+    dirs_walked = stat_calls = 0
+    stack = [path]
+    while stack:
+        current = stack.pop()
+
+        if index is not None:
+            stat_calls += 1
+            try:
+                st = os.stat(current, follow_symlinks=False)
+            except OSError:
+                continue
+
+            cached = index.lookup_dir(current, st)
+            if cached is not None:
+                files_size, subdirs = cached
+                total += files_size
+                stack.extend(os.path.join(current, name) for name in subdirs)
+                continue
+
+        files_size = 0
+        subdirs = []
+        dirs_walked += 1
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            stat_calls += 1
+                            files_size += entry.stat(
+                                follow_symlinks=False
+                            ).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+
+        total += files_size
+        if index is not None:
+            _refresh_index_entry(index, current, st, files_size, subdirs)
+
+    profiling.count(profiling.DIRS_WALKED, dirs_walked)
+    profiling.count(profiling.STAT_CALLS, stat_calls)
+    return total
+
+
+def _refresh_index_entry(index, path, st, files_size, subdirs):
+    """Store a re-listed directory and drop subtrees that disappeared"""
+    previous = index.stored_subdirs(path)
+    if previous:
+        for name in set(previous) - set(subdirs):
+            index.remove_tree(os.path.join(path, name))
+    index.update_dir(path, st, files_size, subdirs)
+
+
+def _size_record(path, total):
+    if total > 0:  # Only include if it has size
+        return inventory.DirectoryRecord(path, total)
+    return None
+
+
+def _parse_manifest(manifest_path):
+    """
+    Return the AppState fields of an appmanifest that we display.
+
+    The fast path only tokenizes the file up to the fields it needs and
+    skips nested sections such as InstalledDepots; files it cannot handle
+    go through a full vdf.load instead.
+    """
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            profiling.count_parsed(f)
+            app_data = parser.extract_fields(f, ("AppState",), MANIFEST_FIELDS)
+        if len(app_data) == len(MANIFEST_FIELDS):
+            return app_data
+    except SyntaxError as e:
+        logger.debug("Fast manifest parse failed for %s: %s", manifest_path, e)
+
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        profiling.count_parsed(f)
+        return vdf.load(f).get("AppState", {})
+
+
+def get_directory_sizes(paths, max_workers=None, index=None):
+    """
+    Compute the total size of each directory in paths in parallel.
+
+    Work is fanned out across the immediate subdirectories of every path,
+    so a single huge directory does not serialize the scan behind one
+    thread. Returns a list of DirectoryRecord objects for the
+    directories with a non-zero size, largest first.
+    """
+    return sorted(
+        iter_directory_sizes(paths, max_workers=max_workers, index=index),
+        key=lambda x: x.raw_size,
+        reverse=True,
+    )
+
+
+def iter_directory_sizes(paths, max_workers=None, index=None):
+    """
+    Generator version of get_directory_sizes, yielding each record as soon
+    as every subtree of that directory has been sized (in completion order)
+    """
+    totals = {}
+    pending = {}
+    futures = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for path in paths:
+            totals[path] = 0
+            pending[path] = 0
+            profiling.count(profiling.DIRS_WALKED)
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                future = executor.submit(
+                                    _scan_tree_size, entry.path, index
+                                )
+                                futures[future] = path
+                                pending[path] += 1
+                            elif entry.is_file(follow_symlinks=False):
+                                profiling.count(profiling.STAT_CALLS)
+                                totals[path] += entry.stat(
+                                    follow_symlinks=False
+                                ).st_size
+                        except OSError:
+                            continue
+            except OSError as e:
+                logger.debug("Skipping unreadable directory %s: %s", path, e)
+                continue
+
+            # Directories without subdirectories are already complete
+            if pending[path] == 0:
+                record = _size_record(path, totals[path])
+                if record:
+                    yield record
+
+        for future in as_completed(futures):
+            path = futures[future]
+            totals[path] += future.result()
+            pending[path] -= 1
+            if pending[path] == 0:
+                record = _size_record(path, totals[path])
+                if record:
+                    yield record
+
+    if index is not None:
+        index.commit()
+
+
+def get_non_steam_usage(steam_path, index=None):
     """Get sizes of directories on same drive as Steam, excluding Steam directory"""
+    return sorted(
+        iter_non_steam_usage(steam_path, index=index),
+        key=lambda x: x.raw_size,
+        reverse=True,
+    )
+
+
+def iter_non_steam_usage(steam_path, index=None):
+    """
+    Generator version of get_non_steam_usage, yielding directories in the
+    order their sizes become known
+    """
     steam_path = os.path.abspath(steam_path)
     parent_dir = os.path.dirname(steam_path)
 
-    sizes = []
-
     # Ignore known steam paths
     ignored_dirs = [
         steam_path,
@@ -114,31 +576,15 @@ def get_non_steam_usage(steam_path):
     # Convert the ignored directories list to a set for fast lookup
     ignored_dirs_set = set(ignored_dirs)
 
+    candidates = []
     for entry in os.scandir(parent_dir):
-        if entry.is_dir() and entry.path not in ignored_dirs_set:
-            try:
-                total = 0
-                for dirpath, dirnames, filenames in os.walk(entry.path):
-                    try:
-                        for f in filenames:
-                            fp = os.path.join(dirpath, f)
-                            if not os.path.islink(fp):
-                                total += os.path.getsize(fp)
-                    except (PermissionError, FileNotFoundError):
-                        continue
-
-                if total > 0:  # Only include if it has size
-                    sizes.append(
-                        {
-                            "path": entry.path,
-                            "size": naturalsize(total),
-                            "raw_size": total,
-                        }
-                    )
-            except (PermissionError, FileNotFoundError):
-                continue
+        try:
+            if entry.is_dir() and entry.path not in ignored_dirs_set:
+                candidates.append(entry.path)
+        except OSError:
+            continue
 
-    return sorted(sizes, key=lambda x: x["raw_size"], reverse=True)
+    yield from iter_directory_sizes(candidates, index=index)
 
 
 def get_library_storage_info(library_path):
@@ -148,6 +594,9 @@ def get_library_storage_info(library_path):
             "total": naturalsize(total),
             "used": naturalsize(used),
             "free": naturalsize(free),
+            "raw_total": total,
+            "raw_used": used,
+            "raw_free": free,
         }
     except Exception as e:
         logger.error(f"Error getting storage info: {str(e)}")
@@ -1,19 +1,46 @@
 #!/usr/bin/env python
 
+import csv
 import datetime
+import fnmatch
+import heapq
 import json
 import logging
 import os
 import platform
+import re
+from collections.abc import Mapping
 
 import vdf
 
-from steam_vdf import utils
+from steam_vdf import appinfo, binary, emit, parser, profiling, utils
 
 logger = logging.getLogger("cli")
 
+# Fields accepted by import-shortcuts
+SHORTCUT_IMPORT_FIELDS = (
+    "name",
+    "exe",
+    "start_dir",
+    "launch_options",
+    "icon",
+    "tags",
+    "hidden",
+)
 
-def add_shortcut(args, selected_library):
+# Number of games get_recent_games returns by default
+RECENT_GAMES_COUNT = 5
+
+# Map in localconfig.vdf holding per-app data such as LastPlayed; the root
+# key is "UserLocalConfigStore"
+LOCALCONFIG_APPS_PATH = (None, "Software", "Valve", "Steam", "apps")
+
+# Recent games by (localconfig.vdf path, count), with the file's
+# (mtime_ns, size) at the time it was read
+_recent_games_cache = {}
+
+
+def add_shortcut(args, selected_library, steam=None):
     """
     Add a shortcut to the shortcuts.vdf file.
     """
@@ -24,11 +51,7 @@ def add_shortcut(args, selected_library):
         print("No Steam user data found.")
         exit(1)
 
-    user_dirs = [
-        d
-        for d in os.listdir(shortcuts_vdf)
-        if os.path.isdir(os.path.join(shortcuts_vdf, d))
-    ]
+    user_dirs = _list_user_dirs(shortcuts_vdf, steam)
 
     if not user_dirs:
         logger.error("No Steam users found in userdata directory")
@@ -36,7 +59,7 @@ def add_shortcut(args, selected_library):
         exit(1)
 
     if len(user_dirs) > 1:
-        user_names = get_steam_user_names(args, selected_library)
+        user_names = _get_user_names(args, selected_library, steam)
         print("\nMultiple Steam users found. Please choose one:")
         for idx, user_dir in enumerate(user_dirs, 1):
             user_info = user_names.get(
@@ -69,7 +92,7 @@ def add_shortcut(args, selected_library):
                 logger.info("Please enter a valid number")
     else:
         user_dir = user_dirs[0]
-        user_names = get_steam_user_names(args, selected_library)
+        user_names = _get_user_names(args, selected_library, steam)
         account_name = user_names.get(user_dir, "Unknown Account")
         logger.info(f"Using only available user: {user_dir} ({account_name})")
 
@@ -79,20 +102,222 @@ def add_shortcut(args, selected_library):
 
     try:
         if os.path.exists(shortcuts_vdf):
-            with open(shortcuts_vdf, "r", encoding="utf-8"):
-                shortcuts = load_shortcuts_file(args, shortcuts_vdf)
-                new_entry = add_shortcut_entry()
-                if new_entry:
-                    shortcuts = add_shortcut_to_shortcuts(shortcuts, new_entry)
-                    if save_shortcuts(shortcuts_vdf, shortcuts):
-                        logger.info("Shortcut added successfully")
-                    else:
-                        logger.error("Failed to save shortcuts")
+            new_entry = add_shortcut_entry()
+            if new_entry:
+                if append_shortcut(shortcuts_vdf, new_entry) is not None:
+                    logger.info("Shortcut added successfully")
+                    if args.dump_vdfs:
+                        dump_vdf_to_json(
+                            args, binary.load(shortcuts_vdf), shortcuts_vdf
+                        )
+                else:
+                    logger.error("Failed to save shortcuts")
     except Exception as e:
         logger.error("Error loading shortcuts.vdf: %s", e)
         exit(1)
 
 
+def import_shortcuts(args, selected_library, steam=None):
+    """
+    Add every shortcut described in a JSON or CSV file for the selected
+    users without prompting.
+
+    All entries are validated before anything is written, and each user's
+    shortcuts.vdf is written once. Entries that already exist for a user
+    (same name and executable) are skipped, so imports can be re-run.
+    Returns the number of shortcuts added.
+    """
+    try:
+        rows = read_shortcut_import_file(args.file, args.format)
+    except (OSError, ValueError) as e:
+        logger.error("Error reading %s: %s", args.file, e)
+        return 0
+
+    entries, errors = validate_shortcut_rows(rows)
+    if errors:
+        for error in errors:
+            logger.error(error)
+        logger.error("No shortcuts imported, fix the errors above first")
+        return 0
+    if not entries:
+        logger.info("No shortcuts found in %s", args.file)
+        return 0
+
+    userdata_path = os.path.join(selected_library, "userdata")
+    user_dirs = _select_user_dirs(userdata_path, args.user, steam)
+    if not user_dirs:
+        return 0
+
+    added = 0
+    for user_dir in user_dirs:
+        shortcuts_vdf = os.path.join(
+            userdata_path, user_dir, "config", "shortcuts.vdf"
+        )
+        try:
+            existing = _existing_shortcut_keys(shortcuts_vdf)
+        except (OSError, SyntaxError, ValueError) as e:
+            logger.error(
+                "Skipping user %s, cannot read %s: %s",
+                user_dir,
+                shortcuts_vdf,
+                e,
+            )
+            continue
+        new_entries = [
+            entry
+            for entry in entries
+            if (entry["appname"], entry["exe"].strip('"')) not in existing
+        ]
+        skipped = len(entries) - len(new_entries)
+
+        if new_entries:
+            indices = append_shortcuts(shortcuts_vdf, new_entries)
+            if indices is None:
+                logger.error(
+                    "Failed to import shortcuts for user %s", user_dir
+                )
+                continue
+            added += len(indices)
+
+        print(
+            f"User {user_dir}: added {len(new_entries)} shortcuts"
+            + (f", skipped {skipped} existing" if skipped else "")
+        )
+
+    return added
+
+
+def _select_user_dirs(userdata_path, requested=None, steam=None):
+    """
+    Return the user directories to operate on: the requested Steam user
+    IDs, or every user if none were requested. Returns an empty list (and
+    logs why) if there is nothing to operate on.
+    """
+    if not os.path.exists(userdata_path):
+        logger.error("No userdata directory found at: %s", userdata_path)
+        return []
+
+    user_dirs = _list_user_dirs(userdata_path, steam)
+    if requested:
+        unknown = [user for user in requested if user not in user_dirs]
+        if unknown:
+            logger.error("Unknown Steam user(s): %s", ", ".join(unknown))
+            return []
+        user_dirs = list(requested)
+
+    if not user_dirs:
+        logger.error("No Steam users found in userdata directory")
+    return user_dirs
+
+
+def read_shortcut_import_file(path, file_format=None):
+    """
+    Read shortcut definitions from a JSON or CSV file.
+
+    JSON files hold a list of objects (or {"shortcuts": [...]}); CSV files
+    have a header row. The format defaults to the file extension.
+    Returns a list of dicts with the raw values.
+    """
+    if file_format is None:
+        file_format = "csv" if path.lower().endswith(".csv") else "json"
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if file_format == "csv":
+            return list(csv.DictReader(f))
+
+        data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("shortcuts")
+        if not isinstance(data, list):
+            raise ValueError("expected a list of shortcuts")
+        return data
+
+
+def validate_shortcut_rows(rows):
+    """
+    Validate rows from a shortcut import file and build shortcut entries.
+
+    Recognised fields are name and exe (required), start_dir,
+    launch_options, icon, tags (a list, or ";"-separated in CSV) and
+    hidden. Returns (entries, errors); entries is only complete when
+    errors is empty.
+    """
+    entries = []
+    errors = []
+    seen = set()
+
+    for number, row in enumerate(rows, 1):
+        if not isinstance(row, dict):
+            errors.append(f"Entry {number}: expected an object")
+            continue
+
+        unknown = set(row) - set(SHORTCUT_IMPORT_FIELDS)
+        if unknown:
+            errors.append(
+                f"Entry {number}: unknown field(s) "
+                f"{', '.join(sorted(str(field) for field in unknown))}"
+            )
+
+        name = str(row.get("name") or "").strip()
+        exe_path = os.path.expanduser(str(row.get("exe") or "").strip())
+        if not name:
+            errors.append(f"Entry {number}: missing name")
+        if not exe_path:
+            errors.append(f"Entry {number}: missing exe")
+        elif not os.path.isabs(exe_path):
+            errors.append(f"Entry {number}: exe must be an absolute path")
+        if not name or not exe_path:
+            continue
+
+        if (name, exe_path) in seen:
+            errors.append(f"Entry {number}: duplicate of an earlier entry")
+            continue
+        seen.add((name, exe_path))
+
+        if not os.path.isfile(exe_path):
+            logger.warning("Entry %s: %s does not exist", number, exe_path)
+
+        tags = row.get("tags") or []
+        if isinstance(tags, str):
+            tags = [tag.strip() for tag in tags.split(";") if tag.strip()]
+        elif not isinstance(tags, list):
+            errors.append(f"Entry {number}: tags must be a list")
+            continue
+
+        hidden = row.get("hidden") or False
+        if isinstance(hidden, str):
+            hidden = hidden.strip().lower() in ("1", "true", "yes")
+
+        start_dir = str(row.get("start_dir") or "").strip() or None
+        entries.append(
+            make_shortcut_entry(
+                name,
+                exe_path,
+                os.path.expanduser(start_dir) if start_dir else None,
+                launch_options=str(row.get("launch_options") or ""),
+                icon=str(row.get("icon") or ""),
+                tags=[str(tag) for tag in tags],
+                hidden=bool(hidden),
+            )
+        )
+
+    return entries, errors
+
+
+def _existing_shortcut_keys(shortcuts_vdf):
+    """Return the (name, exe) pairs already present in a shortcuts.vdf"""
+    if not os.path.exists(shortcuts_vdf):
+        return set()
+
+    keys = set()
+    with binary.BinaryVDF(shortcuts_vdf) as doc:
+        for shortcut in doc.root.get("shortcuts", {}).values():
+            name = shortcut.get("appname", shortcut.get("AppName"))
+            exe_path = shortcut.get("exe", shortcut.get("Exe", ""))
+            keys.add((name, exe_path.strip('"')))
+    return keys
+
+
 def dump_vdf_to_json(args, vdf_data, vdf_path):
     """
     Dump VDF data to JSON file in /tmp directory
@@ -128,7 +353,7 @@ def dump_vdf_to_json(args, vdf_data, vdf_path):
         return False
 
 
-def delete_shortcut(args, library_path):
+def delete_shortcut(args, library_path, steam=None):
     """
     Delete an existing shortcut after selecting user and shortcut
     """
@@ -137,17 +362,13 @@ def delete_shortcut(args, library_path):
         logger.error("No userdata directory found at: %s", userdata_path)
         return False
 
-    user_dirs = [
-        d
-        for d in os.listdir(userdata_path)
-        if os.path.isdir(os.path.join(userdata_path, d))
-    ]
+    user_dirs = _list_user_dirs(userdata_path, steam)
 
     if not user_dirs:
         logger.error("No Steam users found in userdata directory")
         return False
 
-    user_names = get_steam_user_names(args, library_path)
+    user_names = _get_user_names(args, library_path, steam)
 
     # Present user selection
     print("\nAvailable Steam users:")
@@ -196,118 +417,245 @@ def delete_shortcut(args, library_path):
         return False
 
     try:
-        with open(shortcuts_vdf, "rb") as f:
-            shortcuts = vdf.binary_load(f)
+        # Browse the file through the lazy reader; it is only decoded in
+        # full once a shortcut has actually been chosen for deletion
+        with binary.BinaryVDF(shortcuts_vdf) as doc:
+            shortcuts = doc.root
+            if not shortcuts or "shortcuts" not in shortcuts:
+                logger.error("No shortcuts found")
+                return False
 
-        if not shortcuts or "shortcuts" not in shortcuts:
-            logger.error("No shortcuts found")
-            return False
+            selection = _choose_shortcut_to_delete(shortcuts["shortcuts"])
+    except Exception as e:
+        logger.error("Error reading shortcuts file: %s", e)
+        return False
+
+    if selection is None:
+        return False
+    shortcut_id, shortcut_name = selection
+
+    try:
+        shortcuts = binary.load(shortcuts_vdf)
+
+        # Delete the shortcut
+        del shortcuts["shortcuts"][shortcut_id]
+
+        # Save the modified shortcuts back to file
+        binary.atomic_write(shortcuts_vdf, [vdf.binary_dumps(shortcuts)])
+
+        logger.info("Successfully deleted shortcut: %s", shortcut_name)
+        print(f"\nSuccessfully deleted shortcut: {shortcut_name}")
+
+        # Dump updated shortcuts to JSON
+        json_path = os.path.join(
+            "/tmp", f"steam-shortcuts-{selected_user}.json"
+        )
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(shortcuts, f, indent=4)
+        logger.info("Updated shortcuts dumped to JSON at: %s", json_path)
+
+        return True
+    except Exception as e:
+        logger.error("Error deleting shortcut: %s", e)
+        return False
+
+
+def delete_matching_shortcuts(args, library_path, steam=None):
+    """
+    Delete every shortcut matching args.match without prompting.
+
+    The remaining shortcuts are renumbered from 0 and each user's
+    shortcuts.vdf is written once, atomically. Kept entries are copied
+    byte for byte, only their index keys are re-encoded.
+    With args.dry_run the matches are only listed.
+    Returns the number of shortcuts deleted (or that would be deleted).
+    """
+    matches = _shortcut_matcher(args.match)
+    userdata_path = os.path.join(library_path, "userdata")
+
+    deleted = 0
+    for user_dir in _select_user_dirs(userdata_path, args.user, steam):
+        shortcuts_vdf = os.path.join(
+            userdata_path, user_dir, "config", "shortcuts.vdf"
+        )
+        if not os.path.exists(shortcuts_vdf):
+            continue
+
+        try:
+            removed = _remove_shortcuts(shortcuts_vdf, matches, args.dry_run)
+        except Exception as e:
+            logger.error(
+                "Error deleting shortcuts for user %s: %s", user_dir, e
+            )
+            continue
+
+        for name in removed:
+            prefix = "Would delete" if args.dry_run else "Deleted"
+            print(f"{prefix} shortcut for user {user_dir}: {name}")
+        deleted += len(removed)
+
+    if not deleted:
+        logger.info("No shortcuts matched '%s'", args.match)
+    return deleted
 
-        # Show available shortcuts
-        print("\nAvailable shortcuts:")
-        print("-" * 50)
-
-        shortcut_list = []
-        for idx, shortcut in shortcuts["shortcuts"].items():
-            shortcut_list.append((idx, shortcut))
-            exe_path = shortcut.get("Exe", "Unknown").strip('"')
-            start_dir = shortcut.get("StartDir", "Unknown").strip('"')
-            print()
-            print(
-                f"{len(shortcut_list)}. {shortcut.get('AppName', 'Unknown')}:"
+
+def _shortcut_matcher(pattern):
+    """
+    Build a predicate for shortcut entries from a --match pattern: a
+    shortcut app ID, a glob matched against the executable path, or a
+    regular expression searched for in the shortcut name
+    """
+    if pattern.lstrip("-").isdigit():
+        app_id = int(pattern)
+
+        def matches(shortcut):
+            value = shortcut.get("appid")
+            # Shortcut app IDs are stored signed but shown unsigned
+            return isinstance(value, int) and app_id in (
+                value,
+                value & 0xFFFFFFFF,
             )
-            print(f"    Executable: {exe_path}")
-            print(f"    Start Dir: {start_dir}")
 
-        print("\n" + "-" * 50)
+        return matches
 
-        # Get shortcut selection
-        while True:
-            try:
-                choice = input(
-                    "\nEnter number of shortcut to delete (or 'q' to quit): "
-                ).strip()
-                if choice.lower() == "q":
-                    logger.info("Delete operation cancelled by user")
-                    return False
+    try:
+        name_re = re.compile(pattern, re.IGNORECASE)
+    except re.error:
+        name_re = None
 
-                choice_idx = int(choice) - 1
-                if 0 <= choice_idx < len(shortcut_list):
-                    shortcut_id = shortcut_list[choice_idx][0]
-                    shortcut_name = shortcuts["shortcuts"][shortcut_id].get(
-                        "AppName", "Unknown"
-                    )
+    def matches(shortcut):
+        name = shortcut.get("appname", shortcut.get("AppName", ""))
+        exe_path = shortcut.get("exe", shortcut.get("Exe", "")).strip('"')
+        if fnmatch.fnmatchcase(exe_path, pattern):
+            return True
+        return name_re is not None and bool(name_re.search(name))
 
-                    # Confirm deletion
-                    confirm = (
-                        input(
-                            f"\nAre you sure you want to "
-                            f"delete '{shortcut_name}'? (y/N): "
-                        )
-                        .strip()
-                        .lower()
-                    )
-                    if confirm != "y":
-                        logger.info("Delete operation cancelled by user")
-                        return False
+    return matches
 
-                    # Delete the shortcut
-                    del shortcuts["shortcuts"][shortcut_id]
 
-                    # Save the modified shortcuts back to file
-                    with open(shortcuts_vdf, "wb") as f:
-                        vdf.binary_dump(shortcuts, f)
+def _remove_shortcuts(shortcuts_vdf, matches, dry_run=False):
+    """
+    Remove the entries of one shortcuts.vdf for which matches() is true
+    and renumber the rest. Returns the names of the removed shortcuts.
+    """
+    removed = []
+    kept = []
+    with binary.BinaryVDF(shortcuts_vdf) as doc:
+        shortcuts = doc.root.get("shortcuts")
+        if not isinstance(shortcuts, binary.BinaryVDFMap):
+            return removed
+
+        start = shortcuts.start_offset()
+        end = shortcuts.end_offset()
+        if start is None:
+            raise ValueError("duplicate shortcuts sections")
+
+        for entry in shortcuts.entries():
+            shortcut = entry.value
+            if isinstance(shortcut, Mapping) and matches(shortcut):
+                removed.append(
+                    shortcut.get("appname", shortcut.get("AppName", "Unknown"))
+                )
+            else:
+                kept.append(entry)
+
+        if not removed or dry_run:
+            return removed
 
-                    logger.info(
-                        "Successfully deleted shortcut: %s", shortcut_name
-                    )
-                    print(f"\nSuccessfully deleted shortcut: {shortcut_name}")
+        chunks = [doc.read_bytes(0, start)]
+        chunks.extend(entry.encode(str(idx)) for idx, entry in enumerate(kept))
+        chunks.append(doc.read_bytes(end))
 
-                    # Dump updated shortcuts to JSON
-                    json_path = os.path.join(
-                        "/tmp", f"steam-shortcuts-{selected_user}.json"
-                    )
-                    with open(json_path, "w", encoding="utf-8") as f:
-                        json.dump(shortcuts, f, indent=4)
-                    logger.info(
-                        "Updated shortcuts dumped to JSON at: %s", json_path
-                    )
+    # The mapping is closed before the file is replaced
+    binary.atomic_write(shortcuts_vdf, chunks)
+    return removed
 
-                    return True
-                else:
-                    print("Invalid selection. Please try again.")
-            except ValueError:
-                print("Please enter a valid number.")
-            except (KeyboardInterrupt, EOFError):
-                logger.info("\nOperation cancelled by user")
-                return False
-            except Exception as e:
-                logger.error("Error deleting shortcut: %s", e)
-                return False
 
-    except Exception as e:
-        logger.error("Error reading shortcuts file: %s", e)
-        return False
+def _choose_shortcut_to_delete(shortcuts):
+    """
+    Show the given shortcuts map and ask which entry to delete.
+    Returns (shortcut_id, shortcut_name) or None if cancelled.
+    """
+    # Show available shortcuts
+    print("\nAvailable shortcuts:")
+    print("-" * 50)
+
+    shortcut_list = []
+    for idx, shortcut in shortcuts.items():
+        shortcut_list.append((idx, shortcut))
+        exe_path = shortcut.get("Exe", "Unknown").strip('"')
+        start_dir = shortcut.get("StartDir", "Unknown").strip('"')
+        print()
+        print(f"{len(shortcut_list)}. {shortcut.get('AppName', 'Unknown')}:")
+        print(f"    Executable: {exe_path}")
+        print(f"    Start Dir: {start_dir}")
 
+    print("\n" + "-" * 50)
 
-def list_shortcuts(args, library_path):
+    # Get shortcut selection
+    while True:
+        try:
+            choice = input(
+                "\nEnter number of shortcut to delete (or 'q' to quit): "
+            ).strip()
+            if choice.lower() == "q":
+                logger.info("Delete operation cancelled by user")
+                return None
+
+            choice_idx = int(choice) - 1
+            if 0 <= choice_idx < len(shortcut_list):
+                shortcut_id, shortcut = shortcut_list[choice_idx]
+                shortcut_name = shortcut.get("AppName", "Unknown")
+
+                # Confirm deletion
+                confirm = (
+                    input(
+                        f"\nAre you sure you want to "
+                        f"delete '{shortcut_name}'? (y/N): "
+                    )
+                    .strip()
+                    .lower()
+                )
+                if confirm != "y":
+                    logger.info("Delete operation cancelled by user")
+                    return None
+
+                return shortcut_id, shortcut_name
+            else:
+                print("Invalid selection. Please try again.")
+        except ValueError:
+            print("Please enter a valid number.")
+        except (KeyboardInterrupt, EOFError):
+            logger.info("\nOperation cancelled by user")
+            return None
+
+
+def list_shortcuts(args, library_path, steam=None):
     """List existing non-Steam game shortcuts"""
     userdata_path = os.path.join(library_path, "userdata")
     if not os.path.exists(userdata_path):
         logger.error("No userdata directory found at: %s", userdata_path)
         return False
 
-    user_dirs = [
-        d
-        for d in os.listdir(userdata_path)
-        if os.path.isdir(os.path.join(userdata_path, d))
-    ]
+    user_dirs = _list_user_dirs(userdata_path, steam)
 
     if not user_dirs:
         logger.error("No Steam users found in userdata directory")
         return False
 
-    user_names = get_steam_user_names(args, library_path)
+    user_names = _get_user_names(args, library_path, steam)
+
+    if emit.is_structured(args):
+        accounts = [
+            _shortcuts_account(userdata_path, user_dir, user_names)
+            for user_dir in user_dirs
+        ]
+        emit.write_result(
+            {"users": accounts},
+            args.output,
+            iter_account_records(accounts, "shortcuts", "shortcut"),
+        )
+        return True
 
     for user_dir in user_dirs:
         shortcuts_vdf = os.path.join(
@@ -337,42 +685,9 @@ def list_shortcuts(args, library_path):
 
         print(f"Loading shortcuts from: {shortcuts_vdf}")
         try:
-            with open(shortcuts_vdf, "rb") as f:
-                shortcuts = vdf.binary_load(f)
-
-            if not shortcuts or "shortcuts" not in shortcuts:
-                print("  No shortcuts found")
-                continue
-
-            print("\n  Found shortcuts:")
-            print("  " + "-" * 50)
-
-            for idx, shortcut in shortcuts["shortcuts"].items():
-                exe_path = shortcut.get("Exe", "Unknown").strip('"')
-                app_name = shortcut.get("AppName", "Unknown")
-                start_dir = shortcut.get("StartDir", "Unknown").strip('"')
-                app_id = shortcut.get("appid", "Unknown")
-
-                print(f"\n  Shortcut #{idx}")
-                print("  " + "-" * 20)
-                print(f"    Name: {app_name}")
-                print(f"    Executable: {exe_path}")
-                print(f"    Start Dir: {start_dir}")
-                print(f"    App ID: {app_id}")
-
-                # Only print these if they exist
-                if launch_opts := shortcut.get("LaunchOptions"):
-                    print(f"    Launch Options: {launch_opts}")
-                if shortcut.get("IsHidden", 0) == 1:
-                    print("    [Hidden]")
-                if icon := shortcut.get("icon"):
-                    print(f"    Icon: {icon}")
-                if tags := shortcut.get("tags"):
-                    print("    Tags:", ", ".join(tags.values()))
-                print("  " + "-" * 20)
-
-            print()  # Extra newline for spacing between users
-
+            profiling.count_parsed(shortcuts_vdf)
+            with binary.BinaryVDF(shortcuts_vdf) as doc:
+                _print_shortcuts(doc.root)
         except Exception as e:
             logger.error(
                 "Error reading shortcuts for user %s: %s", persona_name, e
@@ -381,6 +696,116 @@ def list_shortcuts(args, library_path):
     return True
 
 
+def _shortcuts_account(userdata_path, user_dir, user_names):
+    """The shortcuts of one user, as written by list-shortcuts -o json"""
+    user_info = _get_user_info_from_names(user_dir, user_names) or {}
+    shortcuts_vdf = os.path.join(
+        userdata_path, user_dir, "config", "shortcuts.vdf"
+    )
+    return {
+        "user_id": user_dir,
+        "persona_name": user_info.get("PersonaName"),
+        "account_name": user_info.get("AccountName"),
+        "shortcuts": read_shortcuts(shortcuts_vdf),
+    }
+
+
+def iter_account_records(accounts, key, record_type):
+    """
+    Flatten accounts into NDJSON records: one "user" record per account,
+    followed by one record_type record (tagged with the user_id) for each
+    entry of its key list
+    """
+    for account in accounts:
+        user = {k: v for k, v in account.items() if k != key}
+        yield {"type": "user", **user}
+        for entry in account[key]:
+            yield {
+                "type": record_type,
+                "user_id": account["user_id"],
+                **entry,
+            }
+
+
+def read_shortcuts(shortcuts_vdf):
+    """
+    Read the shortcuts of one shortcuts.vdf into a list of plain dicts.
+    Returns an empty list if the file is missing or unreadable.
+    """
+    if not os.path.exists(shortcuts_vdf):
+        return []
+
+    try:
+        profiling.count_parsed(shortcuts_vdf)
+        with binary.BinaryVDF(shortcuts_vdf) as doc:
+            return shortcut_entries(doc.root)
+    except Exception as e:
+        logger.error("Error reading %s: %s", shortcuts_vdf, e)
+        return []
+
+
+def shortcut_entries(root):
+    """
+    Convert a parsed shortcuts.vdf tree (a BinaryVDF root or the dict of
+    vdf.binary_loads) into the list of plain dicts read_shortcuts returns
+    """
+    shortcuts = []
+    for idx, shortcut in root.get("shortcuts", {}).items():
+        tags = shortcut.get("tags", {})
+        shortcuts.append(
+            {
+                "index": idx,
+                "name": shortcut.get(
+                    "AppName", shortcut.get("appname", "Unknown")
+                ),
+                "exe": shortcut.get("Exe", shortcut.get("exe", "")).strip('"'),
+                "start_dir": shortcut.get("StartDir", "").strip('"'),
+                "app_id": shortcut.get("appid"),
+                "launch_options": shortcut.get("LaunchOptions", ""),
+                "hidden": shortcut.get("IsHidden", 0) == 1,
+                "icon": shortcut.get("icon", ""),
+                "tags": list(tags.values()),
+            }
+        )
+    return shortcuts
+
+
+def _print_shortcuts(shortcuts):
+    """Print the entries of a shortcuts.vdf tree for one user"""
+    if not shortcuts or "shortcuts" not in shortcuts:
+        print("  No shortcuts found")
+        return
+
+    print("\n  Found shortcuts:")
+    print("  " + "-" * 50)
+
+    for idx, shortcut in shortcuts["shortcuts"].items():
+        exe_path = shortcut.get("Exe", "Unknown").strip('"')
+        app_name = shortcut.get("AppName", "Unknown")
+        start_dir = shortcut.get("StartDir", "Unknown").strip('"')
+        app_id = shortcut.get("appid", "Unknown")
+
+        print(f"\n  Shortcut #{idx}")
+        print("  " + "-" * 20)
+        print(f"    Name: {app_name}")
+        print(f"    Executable: {exe_path}")
+        print(f"    Start Dir: {start_dir}")
+        print(f"    App ID: {app_id}")
+
+        # Only print these if they exist
+        if launch_opts := shortcut.get("LaunchOptions"):
+            print(f"    Launch Options: {launch_opts}")
+        if shortcut.get("IsHidden", 0) == 1:
+            print("    [Hidden]")
+        if icon := shortcut.get("icon"):
+            print(f"    Icon: {icon}")
+        if tags := shortcut.get("tags"):
+            print("    Tags:", ", ".join(tags.values()))
+        print("  " + "-" * 20)
+
+    print()  # Extra newline for spacing between users
+
+
 def _process_loginusers_data(login_data, user_names):
     """Process user data from loginusers.vdf"""
     if "users" not in login_data:
@@ -443,10 +868,12 @@ def _process_config_data(config_data, user_names):
         logger.error("Error processing config data: %s", e)
 
 
-def get_steam_user_names(args, steam_path):
+def get_steam_user_names(args, steam_path, steam=None):
     """
     Get Steam account names from both loginusers.vdf and config.vdf
     Returns a dictionary mapping user IDs to account names
+    If steam (a SteamInstall) is given, the files are read through its
+    VDF cache.
     """
     logger.debug("Attempting to read Steam user names")
     user_names = {}
@@ -455,10 +882,8 @@ def get_steam_user_names(args, steam_path):
     login_file = os.path.join(steam_path, "config", "loginusers.vdf")
     try:
         if os.path.exists(login_file):
-            with open(login_file, "r", encoding="utf-8") as f:
-                login_data = vdf.load(f)
-                dump_vdf_to_json(args, login_data, login_file)
-                _process_loginusers_data(login_data, user_names)
+            login_data = _load_text_vdf(args, login_file, steam)
+            _process_loginusers_data(login_data, user_names)
     except Exception as e:
         logger.error("Error reading loginusers.vdf: %s", e)
 
@@ -466,91 +891,141 @@ def get_steam_user_names(args, steam_path):
     config_file = os.path.join(steam_path, "config", "config.vdf")
     try:
         if os.path.exists(config_file):
-            with open(config_file, "r", encoding="utf-8") as f:
-                config_data = vdf.load(f)
-                dump_vdf_to_json(args, config_data, config_file)
-                _process_config_data(config_data, user_names)
+            config_data = _load_text_vdf(args, config_file, steam)
+            _process_config_data(config_data, user_names)
     except Exception as e:
         logger.error("Error reading config.vdf: %s", e)
 
     return user_names
 
 
-def _get_steam_config_from_localconfig(config):
-    """Extract Steam config from localconfig data structure"""
-    return config.get("Software", {}).get("Valve", {}).get("Steam", {})
+def _load_text_vdf(args, path, steam=None):
+    """Parse a text VDF file, through the SteamInstall cache if given"""
+    if steam is not None:
+        return steam.load_vdf(path)
+    with open(path, "r", encoding="utf-8") as f:
+        profiling.count_parsed(f)
+        data = vdf.load(f)
+    dump_vdf_to_json(args, data, path)
+    return data
+
 
+def _get_user_names(args, steam_path, steam=None):
+    """Return the Steam user names, resolved once per SteamInstall"""
+    if steam is not None and steam.root == steam_path:
+        return steam.user_names
+    return get_steam_user_names(args, steam_path)
 
-def _create_game_entry(app_id, app_data):
-    """Create a game entry from app data"""
+
+def _list_user_dirs(userdata_path, steam=None):
+    """Return the user directories found in a userdata directory"""
+    if steam is not None and steam.userdata_path == userdata_path:
+        return steam.user_dirs
+    return [
+        d
+        for d in os.listdir(userdata_path)
+        if os.path.isdir(os.path.join(userdata_path, d))
+    ]
+
+
+def _create_game_entry(app_id, last_played):
+    """Create a game entry from an app ID and its LastPlayed timestamp"""
     return {
         "app_id": app_id,
-        "last_played": datetime.datetime.fromtimestamp(
-            int(app_data["LastPlayed"])
-        ),
+        "last_played": datetime.datetime.fromtimestamp(last_played),
     }
 
 
-def get_recent_games(userdata_path, user_id):
+def read_recent_games(f, count):
+    """
+    Return the count most recently played games of an open localconfig.vdf,
+    reading only the LastPlayed values below Software/Valve/Steam/apps
+    """
+    last_played = []
+    for app_id, fields in parser.iter_child_fields(
+        f, LOCALCONFIG_APPS_PATH, ("LastPlayed",)
+    ):
+        try:
+            last_played.append((int(fields["LastPlayed"]), app_id))
+        except (KeyError, ValueError):
+            continue
+
+    return [
+        _create_game_entry(app_id, timestamp)
+        for timestamp, app_id in heapq.nlargest(
+            count, last_played, key=lambda entry: entry[0]
+        )
+    ]
+
+
+def get_recent_games(
+    userdata_path, user_id, steam=None, count=RECENT_GAMES_COUNT
+):
     """
-    Get the last 5 played games for a user
+    Get the last count (default 5) played games for a user.
+
+    localconfig.vdf is not fully parsed: only the LastPlayed values of the
+    apps section are read and a bounded heap keeps the most recent ones.
+    The result is cached per file until its mtime or size changes.
     """
     config_path = os.path.join(
         userdata_path, user_id, "config", "localconfig.vdf"
     )
-    recent_games = []
-
-    if not os.path.exists(config_path):
-        return recent_games
-
     try:
-        with open(config_path, "r", encoding="utf-8") as f:
-            config = vdf.load(f)
-            steam_config = _get_steam_config_from_localconfig(config)
+        st = os.stat(config_path)
+    except OSError:
+        return []
+    profiling.count(profiling.STAT_CALLS)
 
-            if "apps" not in steam_config:
-                return recent_games
+    # --dump-vdfs still needs the whole file
+    if steam is not None and steam.args.dump_vdfs:
+        steam.load_vdf(config_path)
 
-            # Process each app's data
-            for app_id, app_data in steam_config["apps"].items():
-                if "LastPlayed" in app_data:
-                    game_entry = _create_game_entry(app_id, app_data)
-                    recent_games.append(game_entry)
+    key = (config_path, count)
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _recent_games_cache.get(key)
+    if cached is not None and cached[0] == stamp:
+        return list(cached[1])
 
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            profiling.count_parsed(f)
+            recent_games = read_recent_games(f, count)
     except Exception as e:
         logger.error("Error reading localconfig.vdf: %s", e)
+        return []
 
-    # Sort by last played time and return top 5
-    return sorted(recent_games, key=lambda x: x["last_played"], reverse=True)[
-        :5
-    ]
+    _recent_games_cache[key] = (stamp, recent_games)
+    return list(recent_games)
 
 
-def _format_user_display(user_dir, user_info):
-    """Format the user display string"""
-    if not user_info:
-        return f"\t- {user_dir} - Unknown Account"
+def _format_user_display(account):
+    """Format the user display string of a collect_user_info() entry"""
+    user_dir = account["user_id"]
+    persona_name = account["persona_name"]
+    account_name = account["account_name"]
 
-    persona_name = user_info["PersonaName"]
-    account_name = user_info["AccountName"]
+    if persona_name is None:
+        return f"\t- {user_dir} - Unknown Account"
 
-    if account_name != "Unknown Account":
+    if account_name not in (None, "Unknown Account"):
         return f"\t- {user_dir} - {persona_name} ({account_name})"
 
     return f"\t- {user_dir} - {persona_name}"
 
 
 def _display_recent_games(games):
-    """Display recent games for a user"""
+    """Display recent games for a user, with their names where known"""
     if not games:
         return
 
     print("\n  Recent Games:")
     for game in games:
-        print(
-            f"\t- App ID {game['app_id']}, "
-            f"Last played: {game['last_played']}"
-        )
+        name = game.get("name")
+        label = f"App ID {game['app_id']}"
+        if name:
+            label = f"{name} ({label})"
+        print(f"\t- {label}, Last played: {game['last_played']}")
 
 
 def _get_user_info_from_names(user_dir, user_names):
@@ -563,36 +1038,75 @@ def _get_user_info_from_names(user_dir, user_names):
     return user_info
 
 
-def get_user_info(args, selected_library):
-    """Display user account information"""
+def collect_user_info(args, selected_library, steam=None):
+    """
+    Return the accounts found under userdata as a list of dicts with
+    user_id, persona_name, account_name and recent_games (each with
+    app_id, name and last_played). Names that are unknown are None.
+    Returns None if there is no userdata directory.
+    """
     userdata_path = os.path.join(selected_library, "userdata")
 
     if not os.path.exists(userdata_path):
+        return None
+
+    user_dirs = _list_user_dirs(userdata_path, steam)
+    if not user_dirs:
+        return []
+
+    with profiling.phase("user names"):
+        user_names = _get_user_names(args, selected_library, steam)
+    with profiling.phase("recent games"):
+        recent_games = {
+            user_dir: get_recent_games(userdata_path, user_dir, steam)
+            for user_dir in user_dirs
+        }
+    # Names for the games of every user come from one appinfo.vdf lookup
+    with profiling.phase("app names"):
+        app_names = appinfo.resolve_app_names(
+            selected_library,
+            {
+                game["app_id"]
+                for games in recent_games.values()
+                for game in games
+            },
+        )
+
+    accounts = []
+    for user_dir in user_dirs:
+        user_info = _get_user_info_from_names(user_dir, user_names) or {}
+        accounts.append(
+            {
+                "user_id": user_dir,
+                "persona_name": user_info.get("PersonaName"),
+                "account_name": user_info.get("AccountName"),
+                "recent_games": [
+                    dict(game, name=app_names.get(game["app_id"]))
+                    for game in recent_games[user_dir]
+                ],
+            }
+        )
+    return accounts
+
+
+def get_user_info(args, selected_library, steam=None):
+    """Display user account information"""
+    accounts = collect_user_info(args, selected_library, steam)
+
+    if accounts is None:
         print("\nNo Steam userdata directory found")
         return
 
-    user_dirs = [
-        d
-        for d in os.listdir(userdata_path)
-        if os.path.isdir(os.path.join(userdata_path, d))
-    ]
-
-    if not user_dirs:
+    if not accounts:
         print("\nNo Steam accounts found")
         print()
         return
 
-    user_names = get_steam_user_names(args, selected_library)
     print("\nSteam Accounts:")
 
-    for user_dir in user_dirs:
-        # Get and display user info
-        user_info = _get_user_info_from_names(user_dir, user_names)
-        print(_format_user_display(user_dir, user_info))
-
-        # Display recent games
-        recent_games = get_recent_games(userdata_path, user_dir)
-        _display_recent_games(recent_games)
+    for account in accounts:
+        print(_format_user_display(account))
+        _display_recent_games(account["recent_games"])
 
     print()
 
@@ -627,25 +1141,44 @@ def add_shortcut_entry():
     launch_options = input("Enter launch options (optional): ").strip()
 
     # Create the shortcut entry
-    entry = {
+    return make_shortcut_entry(
+        app_name, exe_path, start_dir, launch_options=launch_options
+    )
+
+
+def make_shortcut_entry(
+    app_name,
+    exe_path,
+    start_dir=None,
+    launch_options="",
+    icon="",
+    tags=(),
+    hidden=False,
+):
+    """
+    Build a shortcuts.vdf entry with Steam's default settings.
+    The start directory defaults to the executable's directory.
+    """
+    if start_dir is None:
+        start_dir = os.path.dirname(exe_path)
+
+    return {
         "appname": app_name,
         "exe": f'"{exe_path}"',
         "StartDir": f'"{start_dir}"',
-        "icon": "",
+        "icon": icon,
         "ShortcutPath": "",
         "LaunchOptions": launch_options,
-        "IsHidden": 0,
+        "IsHidden": 1 if hidden else 0,
         "AllowDesktopConfig": 1,
         "AllowOverlay": 1,
         "OpenVR": 0,
         "Devkit": 0,
         "DevkitGameID": "",
         "LastPlayTime": 0,
-        "tags": {},
+        "tags": {str(idx): tag for idx, tag in enumerate(tags)},
     }
 
-    return entry
-
 
 def add_shortcut_to_shortcuts(shortcuts, new_entry):
     """
@@ -668,18 +1201,89 @@ def add_shortcut_to_shortcuts(shortcuts, new_entry):
     return shortcuts
 
 
+def append_shortcut(shortcuts_vdf, new_entry):
+    """
+    Append a shortcut entry to a shortcuts.vdf file.
+    Returns the index of the new entry, or None on failure.
+    """
+    indices = append_shortcuts(shortcuts_vdf, [new_entry])
+    return indices[0] if indices else None
+
+
+def append_shortcuts(shortcuts_vdf, new_entries):
+    """
+    Append shortcut entries to a shortcuts.vdf file in a single write.
+
+    Only the new entries are encoded; they are spliced in before the end
+    marker of the "shortcuts" map and the file is replaced atomically, so
+    the existing entries are never decoded or re-encoded. New indices
+    follow the highest existing one, which the reader records while
+    indexing the file, so files whose keys are out of order are safe too.
+    Missing files are created, and files that do not have the usual
+    layout are rewritten in full instead.
+    Returns the list of new indices, or None on failure.
+    """
+    try:
+        if not os.path.exists(shortcuts_vdf):
+            logger.debug("Creating %s", shortcuts_vdf)
+            os.makedirs(os.path.dirname(shortcuts_vdf), exist_ok=True)
+            shortcuts = {"shortcuts": {}}
+            for new_entry in new_entries:
+                add_shortcut_to_shortcuts(shortcuts, new_entry)
+            binary.atomic_write(shortcuts_vdf, [vdf.binary_dumps(shortcuts)])
+            return list(range(len(new_entries)))
+
+        with binary.BinaryVDF(shortcuts_vdf) as doc:
+            shortcuts = doc.root.get("shortcuts")
+            if not isinstance(shortcuts, binary.BinaryVDFMap):
+                shortcuts = None
+            else:
+                max_index = shortcuts.max_index()
+                next_index = 0 if max_index is None else max_index + 1
+                offset = shortcuts.end_offset()
+
+        if shortcuts is None:
+            logger.debug("No shortcuts map in %s, rewriting", shortcuts_vdf)
+            shortcuts = binary.load(shortcuts_vdf)
+            for new_entry in new_entries:
+                add_shortcut_to_shortcuts(shortcuts, new_entry)
+            binary.atomic_write(shortcuts_vdf, [vdf.binary_dumps(shortcuts)])
+            ids = {id(new_entry) for new_entry in new_entries}
+            return [
+                int(idx)
+                for idx, entry in shortcuts["shortcuts"].items()
+                if id(entry) in ids
+            ]
+
+        indices = list(range(next_index, next_index + len(new_entries)))
+        binary.insert_bytes(
+            shortcuts_vdf,
+            offset,
+            b"".join(
+                binary.encode_entry(str(idx), new_entry)
+                for idx, new_entry in zip(indices, new_entries)
+            ),
+        )
+        for idx, new_entry in zip(indices, new_entries):
+            logger.info(
+                f"Added new shortcut '{new_entry['appname']}' at index {idx}"
+            )
+        return indices
+    except Exception as e:
+        logger.error("Error saving shortcuts: %s", e)
+        return None
+
+
 def load_shortcuts_file(args, shortcuts_vdf):
     """
     Load shortcuts.vdf file using binary mode
     """
     try:
         if os.path.exists(shortcuts_vdf):
-            with open(shortcuts_vdf, "rb") as f:  # Use binary mode
-                shortcuts = vdf.binary_load(
-                    f
-                )  # Use vdf.binary_load instead of vdf.load
-                dump_vdf_to_json(args, shortcuts, shortcuts_vdf)
-                return shortcuts
+            profiling.count_parsed(shortcuts_vdf)
+            shortcuts = binary.load(shortcuts_vdf)
+            dump_vdf_to_json(args, shortcuts, shortcuts_vdf)
+            return shortcuts
         else:
             logger.debug("No shortcuts.vdf found at: %s", shortcuts_vdf)
             return {"shortcuts": []}
@@ -690,11 +1294,10 @@ def load_shortcuts_file(args, shortcuts_vdf):
 
 def save_shortcuts(shortcuts_vdf, shortcuts):
     """
-    Save the shortcuts back to the VDF file
+    Save the shortcuts back to the VDF file, replacing it atomically
     """
     try:
-        with open(shortcuts_vdf, "wb") as f:
-            vdf.binary_dump(shortcuts, f)
+        binary.atomic_write(shortcuts_vdf, [vdf.binary_dumps(shortcuts)])
         logger.info("Successfully saved shortcuts to: %s", shortcuts_vdf)
         return True
     except Exception as e:
@@ -748,13 +1351,16 @@ def find_steam_library(args):
     exit(1)
 
 
-def find_steam_library_folders(args):
+def find_steam_library_folders(args, steam=None):
     """
     Find all Steam library folders including additional library folders.
     Returns a list of paths to all found Steam libraries.
+    If steam (a SteamInstall) is given, its root and VDF cache are used.
     """
     libraries = []
-    main_library = find_steam_library(args)
+    main_library = (
+        steam.root if steam is not None else find_steam_library(args)
+    )
 
     if not main_library:
         logger.warning("No main Steam library found")
@@ -762,7 +1368,21 @@ def find_steam_library_folders(args):
 
     libraries.append(main_library)
 
-    # Check for additional library folders in libraryfolders.vdf
+    for path in read_library_folder_paths(args, main_library, steam):
+        if os.path.exists(path) and path not in libraries:
+            logger.info("Found additional library at: %s", path)
+            libraries.append(path)
+
+    return libraries
+
+
+def read_library_folder_paths(args, main_library, steam=None):
+    """
+    Return the library paths listed in the libraryfolders.vdf files of the
+    Steam install at main_library, as recorded (they are not checked for
+    existence, and include the install itself)
+    """
+    paths = []
     vdf_paths = [
         os.path.join(main_library, "steamapps/libraryfolders.vdf"),
         os.path.join(main_library, "config/libraryfolders.vdf"),
@@ -773,27 +1393,24 @@ def find_steam_library_folders(args):
         if os.path.exists(vdf_path):
             try:
                 logger.debug("Reading VDF file: %s", vdf_path)
-                with open(vdf_path, "r", encoding="utf-8") as f:
-                    content = vdf.load(f)
-                    dump_vdf_to_json(args, content, vdf_path)
-
-                    # Process library folders
-                    if isinstance(content, dict):
-                        for key, value in content.items():
-                            if isinstance(value, dict) and "path" in value:
-                                path = value["path"]
-                                if (
-                                    os.path.exists(path)
-                                    and path not in libraries
-                                ):
-                                    logger.info(
-                                        "Found additional library at: %s", path
-                                    )
-                                    libraries.append(path)
+                content = _load_text_vdf(args, vdf_path, steam)
+
+                # Process library folders
+                if isinstance(content, dict):
+                    # Folders are listed under a top level "libraryfolders"
+                    # (or "LibraryFolders") key
+                    for key in ("libraryfolders", "LibraryFolders"):
+                        if isinstance(content.get(key), dict):
+                            content = content[key]
+                            break
+                    for key, value in content.items():
+                        if isinstance(value, dict) and "path" in value:
+                            if value["path"] not in paths:
+                                paths.append(value["path"])
             except Exception as e:
                 raise Exception("Error reading VDF file %s: %s", vdf_path, e)
 
-    return libraries
+    return paths
 
 
 def choose_library(libraries):
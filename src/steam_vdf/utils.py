@@ -1,16 +1,14 @@
 import datetime
+import io
+import itertools
 import json
 import logging
+import mmap
 import os
-import readline
-import subprocess
+import shutil
 import sys
-import time
 
-import psutil
-import vdf
-
-from steam_vdf import storage, users
+from steam_vdf import binary, emit, formats, parser, profiling
 
 logger = logging.getLogger("cli")
 
@@ -59,20 +57,13 @@ def complete_path(text, state):
 
 def is_steam_running():
     """Check if Steam process is running"""
-    for proc in psutil.process_iter(["name"]):
-        try:
-            # Check for both 'steam' and 'Steam' process names
-            if proc.info["name"].lower() == "steam":
-                logger.debug("Found running Steam process")
-                logger.debug(f"Process details: {proc.info}")
-                return True
-        except (
-            psutil.NoSuchProcess,
-            psutil.AccessDenied,
-            psutil.ZombieProcess,
-        ):
-            pass
-    return False
+    from steam_vdf import process
+
+    with profiling.phase("Steam process lookup"):
+        pid = process.find_steam_pid()
+    if pid is not None:
+        logger.debug("Found running Steam process: %s", pid)
+    return pid is not None
 
 
 def restart_steam():
@@ -80,69 +71,17 @@ def restart_steam():
     Restart Steam and wait for it to fully start up
     Returns True if successful, False otherwise
     """
-    MAX_WAIT_TIME = 60  # Maximum seconds to wait for Steam to start
-    CHECK_INTERVAL = 1  # Seconds between checks
+    import asyncio
+
+    from steam_vdf import process
 
     logger.info("Attempting to restart Steam...")
     try:
-        # Check if Steam is running first
-        if is_steam_running():
-            logger.info("Stopping Steam...")
-            logger.debug("Terminating existing Steam process")
-
-            # Kill existing Steam process
-            try:
-                subprocess.run(["killall", "steam"], check=True)
-                logger.debug("Successfully terminated Steam process")
-            except subprocess.CalledProcessError:
-                logger.warning("No Steam process found to terminate")
-            except Exception as e:
-                logger.error(f"Error terminating Steam: {str(e)}")
-                return False
-
-            # Wait for Steam to fully close
-            wait_time = 0
-            while is_steam_running() and wait_time < 10:
-                time.sleep(1)
-                wait_time += 1
-
-        # Start Steam in background
-        logger.info("Starting Steam...")
-        try:
-            subprocess.Popen(
-                ["steam"],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                start_new_session=True,
-            )
-            logger.debug("Steam start command issued")
-        except Exception as e:
-            logger.error(
-                "Error starting Steam. Please restart manually: %s", e
-            )
-            exit(1)
-
-        # Wait for Steam to start
-        logger.debug("Waiting for Steam to start...")
-        wait_time = 0
-        while wait_time < MAX_WAIT_TIME:
-            if is_steam_running():
-                logger.debug("Steam has successfully restarted!")
-                logger.debug("Steam successfully restarted")
-                return True
-
-            time.sleep(CHECK_INTERVAL)
-            wait_time += CHECK_INTERVAL
-
-            # Show a progress indicator
-            if wait_time % 5 == 0:
-                logger.debug(f"Still waiting... ({wait_time}s)")
-
-        # If we get here, Steam didn't start in time
-        logger.error(f"Steam did not start within {MAX_WAIT_TIME} seconds")
+        return asyncio.run(process.restart_steam())
+    except process.RestartError as e:
+        logger.error(str(e))
         logger.info("Please check Steam manually.")
         exit(1)
-
     except KeyboardInterrupt:
         logger.info("Restart operation cancelled by user")
         logger.info("Restart cancelled by user.")
@@ -174,8 +113,9 @@ def setup_logging(debug=False):
         if not os.path.exists(log_dir):
             os.makedirs(log_dir)
 
+        # The file is only opened when the first record is written
         file_handler = logging.FileHandler(
-            os.path.join(log_dir, "steam_vdf.log")
+            os.path.join(log_dir, "steam_vdf.log"), delay=True
         )
         file_handler.setLevel(
             logging.DEBUG
@@ -219,6 +159,8 @@ def prompt_path(prompt_text, is_file=True, default_path=None):
     """
     Prompt for a path with autocompletion
     """
+    import readline
+
     readline.set_completer_delims(" \t\n;")
     readline.parse_and_bind("tab: complete")
     readline.set_completer(complete_path)
@@ -269,74 +211,42 @@ def is_binary_file(file_path):
     logger.debug("Checking if file is binary")
     try:
         with open(file_path, "rb") as file:
-            chunk = file.read(1024)  # Read a small chunk of the file
-            if b"\0" in chunk:  # Null bytes are common in binary files
-                return True
-            # Check for non-ASCII characters
-            if any(byte > 127 for byte in chunk):
-                logger.debug(
-                    f"File {file_path} is not ASCII, treating as binary."
-                )
-                return True
-        logger.debug("Treating as non-binary file")
-        return False
+            file_format = formats.sniff_file(file)
+        logger.debug("File %s sniffed as %s", file_path, file_format)
+        return file_format not in formats.TEXT_FORMATS
     except Exception as e:
         print(f"Error reading file: {e}")
         return False
 
 
-def view_vdf(vdf_file, output_type):
+def view_vdf(vdf_file, output_type, hex_dump=False, offset=0, length=None):
     """
     View the contents of a VDF file
     Args:
         vdf_file (str): Path to the VDF file
         output_type (str): Type of output (json or raw)
+        hex_dump (bool): Show a hex dump instead of parsing the file
+        offset (int): First byte of the hex dump
+        length (int): Number of bytes to hex dump (default: to the end)
     """
     logger.debug(f"Viewing VDF file: {vdf_file}")
     try:
-        # First check if it's binary
-        if is_binary_file(vdf_file):
-            logger.debug("File is binary")
-            try:
-                with open(vdf_file, "rb") as f:
-                    content = f.read()
-                    try:
-                        parsed = vdf.binary_loads(content)
-                        if output_type == "json":
-                            print(json.dumps(parsed, indent=2))
-                        else:
-                            print(vdf.dumps(parsed, pretty=True))
-                    except Exception as e:
-                        logger.debug("Could not parse as VDF binary: %s", e)
-                        # If we can't parse it, just show hex dump for binary
-                        # files
-                        print("Binary file contents (hex dump):")
-                        for i in range(0, len(content), 16):
-                            chunk = content[i : i + 16]
-                            hex_values = " ".join(f"{b:02x}" for b in chunk)
-                            ascii_values = "".join(
-                                chr(b) if 32 <= b <= 126 else "."
-                                for b in chunk
-                            )
-                            print(
-                                f"{i:08x}  {hex_values:<48}  |{ascii_values}|"
-                            )
-            except Exception as e:
-                logger.error("Error reading binary file: %s", e)
-                sys.exit(1)
-        else:
-            logger.debug("File is text")
-            try:
-                with open(vdf_file, "r", encoding="utf-8") as f:
-                    content = f.read()
-                if output_type == "json":
-                    parsed = vdf.loads(content)
-                    print(json.dumps(parsed, indent=2))
-                else:
-                    print(content)
-            except Exception as e:
-                logger.error(f"Error reading text file: {e}")
-                sys.exit(1)
+        # The format is sniffed from the open file, which is then handed
+        # to the matching parser without being opened again
+        with open(vdf_file, "rb") as f:
+            if hex_dump:
+                _write_hex_dump(f, offset, length, sys.stdout)
+                return
+
+            file_format = formats.sniff_file(f)
+            logger.debug("File format: %s", file_format)
+            profiling.count_parsed(f)
+            if file_format in formats.TEXT_FORMATS:
+                _view_text(f, file_format, output_type)
+            else:
+                _view_binary(
+                    vdf_file, f, file_format, output_type, offset, length
+                )
 
     except FileNotFoundError:
         logger.error(f"File not found: {vdf_file}")
@@ -346,6 +256,94 @@ def view_vdf(vdf_file, output_type):
         sys.exit(1)
 
 
+def _view_text(f, file_format, output_type):
+    """Print a text VDF or JSON file from its open binary file object"""
+    text = io.TextIOWrapper(f, encoding="utf-8-sig")
+    try:
+        if file_format == formats.JSON:
+            if output_type == emit.JSON:
+                shutil.copyfileobj(text, sys.stdout)
+                sys.stdout.flush()
+                return
+            data = json.load(text)
+            if not isinstance(data, dict):
+                raise ValueError("JSON file does not contain an object")
+            _write_events(emit.iter_mapping_events(data), output_type)
+        elif output_type in emit.STRUCTURED_OUTPUTS:
+            _write_events(parser.iter_events(text), output_type)
+        else:
+            shutil.copyfileobj(text, sys.stdout)
+            sys.stdout.flush()
+    except Exception as e:
+        logger.error(f"Error reading text file: {e}")
+        sys.exit(1)
+
+
+def _view_binary(vdf_file, f, file_format, output_type, offset, length):
+    """Print a binary VDF file, or a hex dump if it cannot be parsed"""
+    try:
+        if file_format == formats.BINARY_VDF:
+            try:
+                with binary.BinaryVDF(vdf_file, fileobj=f) as doc:
+                    events = emit.iter_mapping_events(doc.root)
+                    _write_events(events, output_type)
+                return
+            except Exception as e:
+                logger.debug("Could not parse as VDF binary: %s", e)
+        elif file_format in (formats.APPINFO, formats.PACKAGEINFO):
+            from steam_vdf import appinfo
+
+            try:
+                with appinfo.AppInfo(vdf_file) as info:
+                    events = emit.iter_mapping_events(info)
+                    _write_events(events, output_type)
+                return
+            except Exception as e:
+                logger.debug("Could not parse as %s: %s", file_format, e)
+        # If we can't parse it, just show hex dump for binary files
+        print("Binary file contents (hex dump):")
+        _write_hex_dump(f, offset, length, sys.stdout)
+    except Exception as e:
+        logger.error("Error reading binary file: %s", e)
+        sys.exit(1)
+
+
+def write_hex_dump(file_path, offset=0, length=None, out=None):
+    """
+    Write a hex dump of length bytes of a file starting at offset (the
+    whole file by default) to out, stdout by default. The file is memory
+    mapped, so only the requested window is ever read.
+    """
+    with open(file_path, "rb") as f:
+        _write_hex_dump(f, offset, length, sys.stdout if out is None else out)
+
+
+def _write_hex_dump(f, offset, length, out):
+    if offset < 0 or (length is not None and length < 0):
+        raise ValueError("offset and length must not be negative")
+
+    size = os.fstat(f.fileno()).st_size
+    end = size if length is None else min(offset + length, size)
+    if offset >= end:
+        return
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        emit.write_chunks(emit.iter_hexdump(buf, offset, end), out)
+
+
+def _write_events(events, output_type):
+    """
+    Stream a VDF event stream to stdout as JSON (on one line for NDJSON)
+    or pretty text VDF. Nothing is materialized, so memory use does not
+    grow with the file.
+    """
+    if output_type in emit.STRUCTURED_OUTPUTS:
+        indent = None if output_type == emit.NDJSON else 2
+        chunks = itertools.chain(emit.iter_json(events, indent), ["\n"])
+    else:
+        chunks = emit.iter_vdf(events)
+    emit.write_chunks(chunks, sys.stdout)
+
+
 def get_steam_client_version():
     """
     Get Steam client version from manifest file.
@@ -412,17 +410,23 @@ def get_steam_client_version():
     return version, is_beta, timestamp
 
 
-def find_steam_libraries(args):
+def find_steam_libraries(args, steam=None):
     """
     Find Steam libraries based on the provided arguments
     Args:
         args: Parsed command-line arguments
+        steam: SteamInstall to resolve the libraries with, if any
     Returns:
         list: List of Steam library paths
     """
+    from steam_vdf import users
+
     logger.debug("Finding Steam libraries")
 
-    all_libraries = users.find_steam_library_folders(args)
+    if steam is not None:
+        all_libraries = steam.library_folders
+    else:
+        all_libraries = users.find_steam_library_folders(args)
     if not all_libraries:
         logger.error("No Steam libraries found")
         print("No Steam libraries found. Exiting.")
@@ -438,14 +442,21 @@ def find_steam_libraries(args):
     return selected_library
 
 
-def display_steam_info(args, this_steam_library):
+def display_steam_info(args, this_steam_library, steam=None):
     """
     Display Steam library and account information
     """
+    from steam_vdf import storage, users
+
     logger.info("Displaying Steam information")
 
+    if emit.is_structured(args):
+        _write_steam_info(args, this_steam_library, steam)
+        return
+
     # Display Steam info
-    version, is_beta, timestamp = get_steam_client_version()
+    with profiling.phase("client version"):
+        version, is_beta, timestamp = get_steam_client_version()
     if version:
         print("\nSteam Client Information:")
         print(f"\t- Steam Client Version: {version}")
@@ -465,8 +476,65 @@ def display_steam_info(args, this_steam_library):
         logger.error("Could not determine Steam client version")
 
     # Display user info
-    users.get_user_info(args, this_steam_library)
+    with profiling.phase("users"):
+        users.get_user_info(args, this_steam_library, steam)
 
     # Display storage information
     if args.analyze_storage:
-        storage.analyze_storage(args, this_steam_library)
+        libraries = _storage_libraries(args, steam)
+        with profiling.phase("storage"):
+            storage.analyze_storage(args, this_steam_library, libraries)
+
+
+def _storage_libraries(args, steam=None):
+    """The libraries to read games from, None for just the main one"""
+    from steam_vdf import users
+
+    if not args.all_libraries:
+        return None
+    if steam is not None:
+        return steam.library_folders
+    return users.find_steam_library_folders(args)
+
+
+def _write_steam_info(args, this_steam_library, steam=None):
+    """
+    Write what display_steam_info prints as one JSON document, or as NDJSON
+    records tagged with a "type" (client, user, recent_game and, with
+    --analyze-storage, disk, game, directory and storage_totals)
+    """
+    from steam_vdf import storage, users
+
+    with profiling.phase("client version"):
+        version, is_beta, timestamp = get_steam_client_version()
+    client = None
+    if version:
+        client = {"version": version, "beta": is_beta, "updated": timestamp}
+    else:
+        logger.error("Could not determine Steam client version")
+
+    with profiling.phase("users"):
+        accounts = users.collect_user_info(args, this_steam_library, steam)
+
+    result = {
+        "steam_root": this_steam_library,
+        "client": client,
+        "users": accounts or [],
+    }
+    if args.analyze_storage:
+        libraries = _storage_libraries(args, steam)
+        with profiling.phase("storage"):
+            result["storage"] = storage.collect_storage(
+                args, this_steam_library, libraries
+            )
+
+    def records():
+        if client:
+            yield {"type": "client", **client}
+        yield from users.iter_account_records(
+            result["users"], "recent_games", "recent_game"
+        )
+        if "storage" in result:
+            yield from storage.iter_storage_records(result["storage"])
+
+    emit.write_result(result, args.output, records())
@@ -0,0 +1,136 @@
+import json
+import struct
+from unittest.mock import patch
+
+import pytest
+import vdf
+
+from steam_vdf import appinfo, utils
+
+APPS = {
+    10: {"appinfo": {"appid": 10, "common": {"name": "Counter-Strike"}}},
+    440: {
+        "appinfo": {
+            "appid": 440,
+            "common": {"name": "Team Fortress 2", "type": "Game"},
+            "config": {"installdir": "Team Fortress 2"},
+        }
+    },
+    999: {"appinfo": {"appid": 999}},
+}
+
+
+def _encode_kv(data, table=None):
+    """Encode binary KeyValues, with keys from a table like appinfo v29"""
+
+    def key(name):
+        if table is None:
+            return name.encode() + b"\x00"
+        if name not in table:
+            table.append(name)
+        return struct.pack("<I", table.index(name))
+
+    out = b""
+    for name, value in data.items():
+        if isinstance(value, dict):
+            out += b"\x00" + key(name) + _encode_kv(value, table)
+        elif isinstance(value, int):
+            out += b"\x02" + key(name) + struct.pack("<i", value)
+        else:
+            out += b"\x01" + key(name) + value.encode() + b"\x00"
+    return out + b"\x08"
+
+
+def make_appinfo(version, apps=APPS):
+    magic = {27: 0x07564427, 28: 0x07564428, 29: 0x07564429}[version]
+    table = [] if version >= 29 else None
+    records = b""
+    for app_id, data in apps.items():
+        fields = struct.pack("<IIQ20sI", 2, 1700000000, 0, b"\x01" * 20, 7)
+        if version >= 28:
+            fields += b"\x02" * 20
+        body = fields + _encode_kv(data, table)
+        records += struct.pack("<II", app_id, len(body)) + body
+    records += struct.pack("<I", 0)
+
+    if table is None:
+        return struct.pack("<II", magic, 1) + records
+    strings = b"".join(name.encode() + b"\x00" for name in table)
+    table_offset = 16 + len(records)
+    return (
+        struct.pack("<IIq", magic, 1, table_offset)
+        + records
+        + struct.pack("<I", len(table))
+        + strings
+    )
+
+
+def make_packageinfo(packages):
+    out = struct.pack("<II", 0x06565528, 1)
+    for package_id, data in packages.items():
+        out += struct.pack("<I20sIQ", package_id, b"\x01" * 20, 3, 0)
+        out += vdf.binary_dumps({str(package_id): data})
+    return out + struct.pack("<I", 0xFFFFFFFF)
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+
+class TestAppInfo:
+    @pytest.mark.parametrize("version", [27, 28, 29])
+    def test_read_records(self, tmp_path, version):
+        path = tmp_path / "appinfo.vdf"
+        path.write_bytes(make_appinfo(version))
+
+        with appinfo.AppInfo(str(path)) as info:
+            assert info.version == version
+            assert list(info) == ["10", "440", "999"]
+            assert info["440"] == APPS[440]
+            assert info[10] == APPS[10]
+            assert "12" not in info
+            assert info.names(["10", "440", "999", "12"]) == {
+                "10": "Counter-Strike",
+                "440": "Team Fortress 2",
+            }
+
+    def test_sidecar_index(self, tmp_path):
+        path = tmp_path / "appinfo.vdf"
+        path.write_bytes(make_appinfo(29))
+        appinfo.AppInfo(str(path)).close()
+
+        # The index is read back instead of scanning the file again
+        with patch.object(appinfo.AppInfo, "_build_index") as build:
+            with appinfo.AppInfo(str(path)) as info:
+                assert info.name("440") == "Team Fortress 2"
+            build.assert_not_called()
+
+        # A changed file is indexed again
+        path.write_bytes(make_appinfo(29, {20: APPS[10]}))
+        with appinfo.AppInfo(str(path)) as info:
+            assert list(info) == ["20"]
+
+    def test_packageinfo(self, tmp_path):
+        packages = {0: {"packageid": 0}, 7: {"appids": {"0": 10, "1": 20}}}
+        path = tmp_path / "packageinfo.vdf"
+        path.write_bytes(make_packageinfo(packages))
+
+        with appinfo.AppInfo(str(path)) as info:
+            assert list(info) == ["0", "7"]
+            assert info["7"] == {"7": packages[7]}
+
+    def test_resolve_app_names(self, tmp_path):
+        (tmp_path / "appcache").mkdir()
+        (tmp_path / "appcache" / "appinfo.vdf").write_bytes(make_appinfo(28))
+        names = appinfo.resolve_app_names(str(tmp_path), ["440", "1"])
+        assert names == {"440": "Team Fortress 2"}
+        assert appinfo.resolve_app_names(str(tmp_path / "none"), ["1"]) == {}
+
+    def test_view(self, tmp_path, capsys):
+        path = tmp_path / "appinfo.vdf"
+        path.write_bytes(make_appinfo(29))
+        utils.view_vdf(str(path), "json")
+        assert json.loads(capsys.readouterr().out) == {
+            str(app_id): data for app_id, data in APPS.items()
+        }
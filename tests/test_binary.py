@@ -0,0 +1,98 @@
+import pytest
+import vdf
+
+from steam_vdf import binary
+
+
+class TestBinary:
+    @pytest.fixture
+    def shortcuts_data(self):
+        return {
+            "shortcuts": {
+                "0": {
+                    "appid": -123456,
+                    "AppName": "Custom Game 1",
+                    "Exe": '"/path/to/game1.exe"',
+                    "LastPlayTime": vdf.UINT_64(2**40),
+                    "Offset": vdf.INT_64(-(2**40)),
+                    "Color": vdf.COLOR(0x00FF00),
+                    "Pointer": vdf.POINTER(42),
+                    "Scale": 1.5,
+                    "tags": {"0": "favorite", "1": "emulator"},
+                },
+                "1": {"AppName": "Custom Game 2", "tags": {}},
+            }
+        }
+
+    @pytest.fixture
+    def shortcuts_file(self, tmp_path, shortcuts_data):
+        path = tmp_path / "shortcuts.vdf"
+        path.write_bytes(vdf.binary_dumps(shortcuts_data))
+        return str(path)
+
+    def test_load_matches_vdf(self, shortcuts_file):
+        with open(shortcuts_file, "rb") as f:
+            expected = vdf.binary_load(f)
+
+        result = binary.load(shortcuts_file)
+        assert result == expected
+        value = result["shortcuts"]["0"]["LastPlayTime"]
+        assert isinstance(value, vdf.UINT_64)
+
+    def test_lazy_access(self, shortcuts_file):
+        with binary.BinaryVDF(shortcuts_file) as doc:
+            shortcuts = doc.root["shortcuts"]
+            assert isinstance(shortcuts, binary.BinaryVDFMap)
+            assert list(shortcuts) == ["0", "1"]
+            assert len(shortcuts["0"]["tags"]) == 2
+            assert shortcuts["1"].get("AppName") == "Custom Game 2"
+            assert shortcuts["1"]["tags"].to_dict() == {}
+            assert "missing" not in shortcuts
+
+    def test_duplicate_maps_are_merged(self, tmp_path):
+        data = (
+            b"\x00root\x00\x01a\x00one\x00\x08"
+            b"\x00root\x00\x01b\x00two\x00\x08"
+            b"\x08"
+        )
+        path = tmp_path / "dup.vdf"
+        path.write_bytes(data)
+
+        assert binary.load(str(path)) == vdf.binary_loads(data)
+
+    def test_max_index(self, tmp_path):
+        data = {
+            "shortcuts": {
+                "0": {"tags": {"7": "nested"}},
+                "10": {},
+                "2": {},
+                "name": "not an index",
+            },
+            "empty": {},
+        }
+        path = tmp_path / "shortcuts.vdf"
+        path.write_bytes(vdf.binary_dumps(data))
+
+        with binary.BinaryVDF(str(path)) as doc:
+            assert doc.root["shortcuts"].last_key() == "name"
+            assert doc.root["shortcuts"].max_index() == 10
+            assert doc.root["shortcuts"]["0"]["tags"].max_index() == 7
+            assert doc.root["empty"].max_index() is None
+            assert doc.root.max_index() is None
+
+    def test_empty_file(self, tmp_path):
+        path = tmp_path / "empty.vdf"
+        path.write_bytes(b"")
+
+        assert binary.load(str(path)) == {}
+
+    @pytest.mark.parametrize(
+        "data",
+        [b"\x00shortcuts\x00\x01AppName\x00unterminated", b"\x00map\x00"],
+    )
+    def test_truncated(self, tmp_path, data):
+        path = tmp_path / "broken.vdf"
+        path.write_bytes(data)
+
+        with pytest.raises(SyntaxError):
+            binary.BinaryVDF(str(path))
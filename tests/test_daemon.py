@@ -0,0 +1,148 @@
+import os
+import sys
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+import vdf
+
+from steam_vdf import daemon
+
+
+class TestDaemon:
+    @pytest.fixture
+    def steam_root(self, tmp_path):
+        root = tmp_path / "Steam"
+        (root / "config").mkdir(parents=True)
+        (root / "steamapps").mkdir()
+        (root / "userdata" / "22202" / "config").mkdir(parents=True)
+        self._write_manifest(root, 10, "Game 10", 1000)
+        self._write_shortcuts(root, ["RetroArch"])
+        return root
+
+    @staticmethod
+    def _write_manifest(root, app_id, name, size):
+        path = root / "steamapps" / f"appmanifest_{app_id}.acf"
+        manifest = {
+            "AppState": {
+                "appid": str(app_id),
+                "name": name,
+                "SizeOnDisk": str(size),
+            }
+        }
+        path.write_text(vdf.dumps(manifest, pretty=True))
+        return path
+
+    @staticmethod
+    def _write_shortcuts(root, names):
+        path = root / "userdata" / "22202" / "config" / "shortcuts.vdf"
+        shortcuts = {
+            str(i): {"AppName": name, "Exe": f'"/usr/bin/{name.lower()}"'}
+            for i, name in enumerate(names)
+        }
+        path.write_bytes(vdf.binary_dumps({"shortcuts": shortcuts}))
+
+    @pytest.fixture
+    def model(self, steam_root):
+        model = daemon.LibraryModel(
+            MagicMock(dump_vdfs=False), root=str(steam_root)
+        )
+        model.load()
+        return model
+
+    def test_model_incremental_updates(self, steam_root, model):
+        steamapps = str(steam_root / "steamapps")
+        config = str(steam_root / "userdata" / "22202" / "config")
+        assert [g["name"] for g in model.query("info")["games"]] == ["Game 10"]
+
+        self._write_manifest(steam_root, 20, "Game 20", 5000)
+        assert model.apply(steamapps, "appmanifest_20.acf") is False
+        info = model.query("info")
+        assert [g["name"] for g in info["games"]] == ["Game 20", "Game 10"]
+        assert info["games"][0]["library"] == str(steam_root)
+
+        os.unlink(steam_root / "steamapps" / "appmanifest_10.acf")
+        model.apply(steamapps, "appmanifest_10.acf")
+        assert [g["name"] for g in model.query("info")["games"]] == ["Game 20"]
+
+        self._write_shortcuts(steam_root, ["RetroArch", "Dolphin"])
+        model.apply(config, "shortcuts.vdf")
+        shortcuts = model.query("shortcuts")["shortcuts"]["22202"]
+        assert [s["name"] for s in shortcuts] == ["RetroArch", "Dolphin"]
+        assert shortcuts[1]["exe"] == "/usr/bin/dolphin"
+
+    def test_model_reloads_for_new_user(self, steam_root, model):
+        assert str(steam_root / "userdata" / "22202" / "config") in (
+            model.watch_paths()
+        )
+        (steam_root / "userdata" / "33303" / "config").mkdir(parents=True)
+
+        assert model.apply(str(steam_root / "userdata"), "33303") is True
+        assert sorted(model.query("info")["users"]) == ["22202", "33303"]
+
+    @pytest.mark.parametrize(
+        "make_watcher",
+        [
+            lambda: daemon.PollingWatcher(interval=0.01),
+            pytest.param(
+                daemon.InotifyWatcher,
+                marks=pytest.mark.skipif(
+                    not sys.platform.startswith("linux"),
+                    reason="inotify is Linux only",
+                ),
+            ),
+        ],
+    )
+    def test_watcher(self, tmp_path, make_watcher):
+        watcher = make_watcher()
+        try:
+            watcher.watch(str(tmp_path))
+            (tmp_path / "shortcuts.vdf").write_bytes(b"\x08\x08")
+
+            changes = watcher.read(timeout=1.0)
+            assert (str(tmp_path), "shortcuts.vdf") in changes
+        finally:
+            watcher.close()
+
+    def test_polling_interval(self, tmp_path, monkeypatch):
+        clock = [1000.0]
+        monkeypatch.setattr(daemon.time, "monotonic", lambda: clock[0])
+        monkeypatch.setattr(
+            daemon.time,
+            "sleep",
+            lambda seconds: clock.__setitem__(0, clock[0] + seconds),
+        )
+        watcher = daemon.PollingWatcher(interval=5.0)
+        watcher.watch(str(tmp_path))
+        (tmp_path / "shortcuts.vdf").write_bytes(b"\x08\x08")
+
+        polls = []
+        snapshot = watcher._snapshot
+        monkeypatch.setattr(
+            watcher,
+            "_snapshot",
+            lambda path: polls.append(clock[0]) or snapshot(path),
+        )
+        # serve() reads with a one second timeout
+        results = [watcher.read(timeout=1.0) for _ in range(10)]
+
+        assert polls == [1005.0, 1010.0]
+        assert results[4] == [(str(tmp_path), "shortcuts.vdf")]
+        assert [r for i, r in enumerate(results) if i != 4] == [[]] * 9
+
+    def test_query_server(self, tmp_path, model):
+        socket_path = str(tmp_path / "test.sock")
+        server = daemon.QueryServer(socket_path, model)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            info = daemon.query("info", socket_path)
+            assert info["games"][0]["app_id"] == "10"
+            with pytest.raises(RuntimeError, match="Unknown query"):
+                daemon.query("bogus", socket_path)
+            with pytest.raises(RuntimeError, match="already serving"):
+                daemon.QueryServer(socket_path, model)
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert not os.path.exists(socket_path)
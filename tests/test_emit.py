@@ -0,0 +1,114 @@
+import datetime
+import io
+import json
+
+import pytest
+import vdf
+
+from steam_vdf import binary, emit, inventory, parser
+
+
+class TestEmit:
+    @pytest.fixture
+    def data(self):
+        return {
+            "AppState": {
+                "appid": "228980",
+                "name": 'Steamworks "Common"\tRedistributables',
+                "InstalledDepots": {
+                    "228983": {"manifest": "81249", "size": "157181797"}
+                },
+                "UserConfig": {},
+                "SizeOnDisk": "254853720",
+            },
+            "Empty": {},
+        }
+
+    def test_text_events(self, data):
+        text = vdf.dumps(data, pretty=True)
+
+        json_text = "".join(
+            emit.iter_json(parser.iter_events(io.StringIO(text)))
+        )
+        assert json_text == json.dumps(data, indent=2)
+
+        vdf_text = "".join(
+            emit.iter_vdf(parser.iter_events(io.StringIO(text)))
+        )
+        assert vdf_text == text
+
+        compact = "".join(
+            emit.iter_json(parser.iter_events(io.StringIO(text)), None)
+        )
+        assert compact == json.dumps(data)
+
+    def test_binary_events(self, tmp_path):
+        data = {
+            "shortcuts": {
+                "0": {
+                    "appid": -123456,
+                    "AppName": "Custom 'Game'",
+                    "LastPlayTime": vdf.UINT_64(2**40),
+                    "Scale": 1.5,
+                    "tags": {"0": "favorite"},
+                }
+            }
+        }
+        path = tmp_path / "shortcuts.vdf"
+        path.write_bytes(vdf.binary_dumps(data))
+
+        with binary.BinaryVDF(str(path)) as doc:
+            events = list(emit.iter_mapping_events(doc.root))
+            expected_vdf = vdf.dumps(doc.root, pretty=True)
+
+        assert "".join(emit.iter_json(events)) == json.dumps(data, indent=2)
+        assert "".join(emit.iter_vdf(events)) == expected_vdf
+
+    def test_empty(self):
+        assert "".join(emit.iter_json([])) == "{}"
+
+    def test_write_chunks(self):
+        out = io.StringIO()
+        emit.write_chunks((str(i) for i in range(10)), out, buffer_size=4)
+        assert out.getvalue() == "0123456789"
+
+    def test_write_result(self):
+        game = inventory.GameRecord("440", "Team Fortress 2", 2048)
+        played = datetime.datetime(2024, 1, 2, 3, 4, 5)
+        result = {"games": [game], "last_played": played}
+        records = [{"type": "game", "app_id": "440"}, {"type": "end"}]
+
+        out = io.StringIO()
+        emit.write_result(result, emit.JSON, records, out)
+        assert json.loads(out.getvalue()) == {
+            "games": [game.as_dict()],
+            "last_played": "2024-01-02T03:04:05",
+        }
+
+        out = io.StringIO()
+        emit.write_result(result, emit.NDJSON, records, out)
+        assert out.getvalue().splitlines() == [
+            json.dumps(record) for record in records
+        ]
+
+    @staticmethod
+    def _reference_hexdump(content, base=0):
+        lines = []
+        for i in range(0, len(content), 16):
+            chunk = content[i : i + 16]
+            hex_values = " ".join(f"{b:02x}" for b in chunk)
+            ascii_values = "".join(
+                chr(b) if 32 <= b <= 126 else "." for b in chunk
+            )
+            lines.append(
+                f"{base + i:08x}  {hex_values:<48}  |{ascii_values}|\n"
+            )
+        return "".join(lines)
+
+    @pytest.mark.parametrize("start,end", [(0, None), (5, 70), (100, 100)])
+    def test_iter_hexdump(self, monkeypatch, start, end):
+        monkeypatch.setattr(emit, "HEXDUMP_BLOCK_BYTES", 32)
+        data = bytes(range(256)) * 2
+
+        result = "".join(emit.iter_hexdump(data, start, end))
+        assert result == self._reference_hexdump(data[start:end], start)
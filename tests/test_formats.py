@@ -0,0 +1,45 @@
+import io
+import struct
+
+import pytest
+import vdf
+
+from steam_vdf import formats
+
+
+class TestFormats:
+    @pytest.mark.parametrize(
+        "head,expected",
+        [
+            (b"", formats.TEXT_VDF),
+            (b'"AppState"\n{\n\t"appid"\t\t"228980"\n}\n', formats.TEXT_VDF),
+            (
+                '"users"\n{\n\t"PersonaName"\t\t"Jürgen ☃"\n}\n'.encode(),
+                formats.TEXT_VDF,
+            ),
+            (b'\xef\xbb\xbf// comment\n"root" { }', formats.TEXT_VDF),
+            (b'  {"name": "value"}', formats.JSON),
+            (b"[1, 2]", formats.JSON),
+            (vdf.binary_dumps({"shortcuts": {}}), formats.BINARY_VDF),
+            (struct.pack("<II", 0x07564429, 1), formats.APPINFO),
+            (struct.pack("<II", 0x07564427, 1), formats.APPINFO),
+            (struct.pack("<II", 0x06565528, 1), formats.PACKAGEINFO),
+            (b"\x89PNG\r\n\x1a\n\x00\x00", formats.UNKNOWN),
+            (b"caf\xe9 latin-1", formats.UNKNOWN),
+        ],
+    )
+    def test_sniff(self, head, expected):
+        assert formats.sniff(head) == expected
+
+    def test_sniff_truncated_character(self):
+        text = ("é" * formats.SNIFF_SIZE).encode()
+        assert (
+            formats.sniff(text[: formats.SNIFF_SIZE - 1]) == formats.TEXT_VDF
+        )
+
+    def test_sniff_file_keeps_position(self):
+        fp = io.BytesIO(b'"root"\n{\n}\n')
+        fp.seek(1)
+
+        assert formats.sniff_file(fp) == formats.TEXT_VDF
+        assert fp.tell() == 1
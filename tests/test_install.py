@@ -0,0 +1,99 @@
+import json
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+import vdf
+
+from steam_vdf import install, users, utils
+
+
+class TestInstall:
+    @pytest.fixture
+    def steam_root(self, tmp_path):
+        root = tmp_path / "Steam"
+        (root / "config").mkdir(parents=True)
+        (root / "steamapps").mkdir()
+        for user in ("22202", "22203"):
+            (root / "userdata" / user / "config").mkdir(parents=True)
+
+        (root / "config" / "loginusers.vdf").write_text(
+            vdf.dumps(
+                {
+                    "users": {
+                        "76561197960287930": {
+                            "AccountName": "testuser",
+                            "PersonaName": "Test User",
+                        }
+                    }
+                },
+                pretty=True,
+            )
+        )
+        extra = tmp_path / "Games"
+        extra.mkdir()
+        (root / "steamapps" / "libraryfolders.vdf").write_text(
+            vdf.dumps(
+                {
+                    "libraryfolders": {
+                        "0": {"path": str(root)},
+                        "1": {"path": str(extra)},
+                        "2": {"path": str(tmp_path / "missing")},
+                    }
+                },
+                pretty=True,
+            )
+        )
+        return root
+
+    def test_vdf_cache(self, tmp_path):
+        path = tmp_path / "test.vdf"
+        path.write_text('"root"\n{\n\t"key"\t"one"\n}\n')
+        cache = install.VDFCache()
+
+        assert cache.load(str(path)) == ({"root": {"key": "one"}}, True)
+        assert cache.load(str(path)) == ({"root": {"key": "one"}}, False)
+
+        path.write_text('"root"\n{\n\t"key"\t"two!"\n}\n')
+        os.utime(path, ns=(0, 0))
+        assert cache.load(str(path)) == ({"root": {"key": "two!"}}, True)
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_library_folders(self, steam_root):
+        steam = install.SteamInstall(MagicMock(), root=str(steam_root))
+
+        assert steam.library_folders == [
+            str(steam_root),
+            str(steam_root.parent / "Games"),
+        ]
+        assert sorted(steam.user_dirs) == ["22202", "22203"]
+
+    def test_commands_share_parsed_files(self, steam_root, capsys):
+        args = MagicMock(dump_vdfs=False, user=None)
+        steam = install.SteamInstall(args, root=str(steam_root))
+
+        with patch("vdf.load", wraps=vdf.load) as load:
+            users.get_user_info(args, steam.root, steam)
+            users.list_shortcuts(args, steam.root, steam)
+            assert steam.library_folders
+
+        # loginusers.vdf and libraryfolders.vdf, once each
+        assert load.call_count == 2
+        assert "Test User (testuser)" in capsys.readouterr().out
+
+    def test_info_json(self, steam_root, capsys):
+        args = MagicMock(dump_vdfs=False, output="json", analyze_storage=False)
+        steam = install.SteamInstall(args, root=str(steam_root))
+
+        with patch(
+            "steam_vdf.utils.get_steam_client_version",
+            return_value=("1700000000", False, None),
+        ):
+            utils.display_steam_info(args, steam.root, steam)
+
+        info = json.loads(capsys.readouterr().out)
+        assert info["client"]["version"] == "1700000000"
+        accounts = {user["user_id"]: user for user in info["users"]}
+        assert sorted(accounts) == ["22202", "22203"]
+        assert accounts["22202"]["account_name"] == "testuser"
+        assert accounts["22203"]["persona_name"] is None
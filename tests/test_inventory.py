@@ -0,0 +1,52 @@
+import pytest
+
+from steam_vdf import inventory
+
+
+class TestInventory:
+    @pytest.fixture
+    def games(self):
+        return inventory.Inventory.from_records(
+            [
+                inventory.GameRecord("10", "Small", 100, "/main"),
+                inventory.GameRecord("20", "Huge", 5000, "/sdcard", 1700),
+                inventory.GameRecord("30", "Medium", 700, "/main", 1600),
+                inventory.GameRecord("40", "Tie", 700, "/sdcard"),
+            ]
+        )
+
+    def test_game_record(self):
+        game = inventory.GameRecord("440", "Team Fortress 2", 2048)
+        assert game["raw_size"] == 2048
+        assert game["size"] == game.size == "2.0 kB"
+        with pytest.raises(KeyError):
+            game["missing"]
+        assert game.as_dict() == {
+            "name": "Team Fortress 2",
+            "app_id": "440",
+            "size": "2.0 kB",
+            "raw_size": 2048,
+        }
+
+    def test_columns(self, games):
+        assert len(games) == games.count == 4
+        assert games.libraries == ["/main", "/sdcard"]
+        assert list(games.library_ids) == [0, 1, 0, 1]
+        assert games.total == games.total_size() == 6500
+
+    def test_order_by(self, games):
+        assert games.order_by() == [1, 2, 3, 0]
+        assert games.order_by(limit=2) == [1, 2]
+        assert games.order_by("last_played", limit=1) == [1]
+        assert [game.name for game in games.largest()] == [
+            "Huge",
+            "Medium",
+            "Tie",
+            "Small",
+        ]
+
+    def test_where_and_aggregates(self, games):
+        rows = games.where(library="/main", min_size=500)
+        assert [games.row(i).app_id for i in rows] == ["30"]
+        assert games.total_size(games.where(min_size=700)) == 6400
+        assert games.size_by_library() == {"/main": 800, "/sdcard": 5700}
@@ -0,0 +1,110 @@
+import io
+
+import pytest
+import vdf
+
+from steam_vdf import parser
+
+MANIFEST = """"AppState"
+{
+\t"appid"\t\t"228980"
+\t"universe"\t\t"1"
+\t"name"\t\t"Steamworks \\"Common\\" Redistributables"
+\t"StateFlags"\t\t"4"
+\t"InstalledDepots"
+\t{
+\t\t"228983"
+\t\t{
+\t\t\t"manifest"\t\t"8124929965194586177"
+\t\t\t"size"\t\t"157181797"
+\t\t}
+\t}
+\t"UserConfig"
+\t{
+\t\t"language"\t\t"english"
+\t}
+\t// trailing comment
+\t"SizeOnDisk"\t\t"254853720" [$LINUX]
+}
+"""
+
+
+class TestParser:
+    def test_iter_events_matches_vdf(self):
+        events = list(parser.iter_events(io.StringIO(MANIFEST)))
+        assert events[0] == (parser.START, "AppState", None)
+        assert events[-1] == (parser.END, None, None)
+
+        # Rebuild the tree from the events and compare with vdf.loads
+        stack = [{}]
+        for event, key, value in events:
+            if event == parser.START:
+                stack[-1][key] = {}
+                stack.append(stack[-1][key])
+            elif event == parser.END:
+                stack.pop()
+            else:
+                stack[-1][key] = value
+        assert stack[0] == vdf.loads(MANIFEST)
+
+    def test_extract_fields(self):
+        fields = parser.extract_fields(
+            io.StringIO(MANIFEST),
+            ("AppState",),
+            ("appid", "name", "SizeOnDisk", "size"),
+        )
+
+        # "size" only exists inside the skipped InstalledDepots section
+        assert fields == {
+            "appid": "228980",
+            "name": 'Steamworks "Common" Redistributables',
+            "SizeOnDisk": "254853720",
+        }
+
+    def test_extract_fields_stops_early(self):
+        truncated = MANIFEST[: MANIFEST.index('\t"universe"')] + '\t"{'
+        fields = parser.extract_fields(
+            io.StringIO(truncated), ("AppState",), ("appid",)
+        )
+        assert fields == {"appid": "228980"}
+
+    def test_iter_child_fields(self):
+        text = vdf.dumps(
+            {
+                "UserLocalConfigStore": {
+                    "friends": {"1": {"LastPlayed": "9"}},
+                    "Software": {
+                        "Valve": {
+                            "Steam": {
+                                "Apps": {
+                                    "10": {
+                                        "lastplayed": "100",
+                                        "cloud": {"LastPlayed": "1"},
+                                    },
+                                    "20": {"Playtime": "5"},
+                                },
+                                "after": {"30": {"LastPlayed": "3"}},
+                            }
+                        }
+                    },
+                }
+            }
+        )
+        path = (None, "Software", "Valve", "Steam", "apps")
+        children = parser.iter_child_fields(
+            io.StringIO(text), path, ("LastPlayed",)
+        )
+        assert list(children) == [("10", {"LastPlayed": "100"}), ("20", {})]
+
+    def test_multiline_value(self):
+        text = '"root"\n{\n\t"desc"\t"first\nsecond"\n}\n'
+        fields = parser.extract_fields(io.StringIO(text), ("root",), ("desc",))
+        assert fields == {"desc": "first\nsecond"}
+
+    @pytest.mark.parametrize(
+        "text",
+        ['"root"\n{\n\t"key"\n}\n', '"root"\n{\n', "}\n", '"root" "open'],
+    )
+    def test_malformed(self, text):
+        with pytest.raises(SyntaxError):
+            list(parser.iter_events(io.StringIO(text)))
@@ -0,0 +1,135 @@
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+
+import pytest
+
+from steam_vdf import process
+
+
+class TestProcess:
+    @pytest.fixture
+    def steam_home(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("HOME", str(tmp_path))
+        (tmp_path / ".steam").mkdir()
+        return tmp_path / ".steam"
+
+    @pytest.fixture
+    def fake_proc(self, tmp_path, monkeypatch):
+        proc = tmp_path / "proc"
+        for pid, name in (
+            (1, "systemd"),
+            (123, "steamwebhelper"),
+            (456, "steam"),
+        ):
+            (proc / str(pid)).mkdir(parents=True)
+            (proc / str(pid) / "comm").write_text(name + "\n")
+        monkeypatch.setattr(process, "PROC_PATH", str(proc))
+        monkeypatch.setattr(process, "pid_alive", lambda pid: True)
+        return proc
+
+    @pytest.mark.parametrize("recorded", [456, 123, None])
+    def test_locator(self, tmp_path, fake_proc, recorded):
+        pid_file = tmp_path / "steam.pid"
+        if recorded:
+            pid_file.write_text(str(recorded))
+        locator = process.SteamLocator(ttl=60, pid_file=str(pid_file))
+
+        assert locator.find() == 456
+
+    def test_locator_cache(self, tmp_path, fake_proc):
+        locator = process.SteamLocator(ttl=60, pid_file=str(tmp_path / "x"))
+        assert locator.find() == 456
+
+        (fake_proc / "456" / "comm").unlink()
+        (fake_proc / "456").rmdir()
+        assert locator.find() == 456
+        assert locator.find(max_age=0) is None
+
+    def test_read_pid_file(self, steam_home):
+        pid_file = steam_home / "steam.pid"
+        assert process.read_pid_file() is None
+
+        pid_file.write_text(f"{os.getpid()}\n")
+        assert process.read_pid_file() == os.getpid()
+
+        pid_file.write_text("not a pid")
+        assert process.read_pid_file() is None
+
+    @pytest.mark.parametrize("use_pidfd", [True, False])
+    def test_wait_for_exit(self, monkeypatch, use_pidfd):
+        if not use_pidfd:
+            monkeypatch.delattr(os, "pidfd_open", raising=False)
+        elif not hasattr(os, "pidfd_open"):
+            pytest.skip("no pidfd support")
+
+        sleeper = subprocess.Popen(
+            [sys.executable, "-c", "input()"], stdin=subprocess.PIPE
+        )
+        try:
+            assert not asyncio.run(process.wait_for_exit(sleeper.pid, 0.1))
+            sleeper.stdin.close()
+            if not use_pidfd:
+                # Signal 0 still reaches an unreaped child
+                sleeper.wait()
+            assert asyncio.run(process.wait_for_exit(sleeper.pid, 5))
+        finally:
+            sleeper.kill()
+            sleeper.wait()
+
+    @pytest.mark.skipif(
+        not os.path.isdir("/proc"), reason="process names come from /proc"
+    )
+    def test_restart_waits_for_pid_file_and_pipe(self, steam_home, tmp_path):
+        # A stale pid file from an earlier run
+        (steam_home / "steam.pid").write_text("999999999\n")
+        # Run the fake client under the name steam, as the real one is
+        steam = tmp_path / "steam"
+        steam.symlink_to(sys.executable)
+        fake_steam = (
+            "import os, time; time.sleep(0.2); "
+            "open('steam.pipe', 'w').close(); "
+            "open('steam.pid', 'w').write(str(os.getpid())); "
+            "time.sleep(10)"
+        )
+        command = [
+            str(steam),
+            "-c",
+            f"import os; os.chdir({str(steam_home)!r}); " + fake_steam,
+        ]
+
+        try:
+            assert asyncio.run(process.restart_steam(command, start_timeout=5))
+            pid = process.read_pid_file()
+            assert pid is not None and pid != os.getpid()
+        finally:
+            pid = process.read_pid_file()
+            if pid:
+                os.kill(pid, signal.SIGKILL)
+
+    def test_wait_until_ready_ignores_recycled_pid(
+        self, steam_home, fake_proc
+    ):
+        # The pid file names a live process that is not Steam, and the pipe
+        # of the old client is still there
+        (steam_home / "steam.pid").write_text("123\n")
+        (steam_home / "steam.pipe").touch()
+        launcher = subprocess.Popen([sys.executable, "-c", "pass"])
+        launcher.wait()
+
+        ready = asyncio.run(process.wait_until_ready(launcher, None, 0.2))
+        assert ready is False
+
+        (steam_home / "steam.pid").write_text("456\n")
+        assert asyncio.run(process.wait_until_ready(launcher, None, 0.2))
+
+    def test_restart_reports_failed_launch(self, steam_home):
+        with pytest.raises(process.RestartError, match="status 3"):
+            asyncio.run(
+                process.restart_steam(
+                    [sys.executable, "-c", "raise SystemExit(3)"],
+                    start_timeout=5,
+                )
+            )
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from steam_vdf import profiling, storage
+
+
+@pytest.fixture
+def profiled():
+    profiling.enable()
+    yield
+    profiling.disable()
+    profiling.reset()
+
+
+class TestProfiling:
+    def test_disabled_records_nothing(self):
+        profiling.reset()
+        with profiling.phase("ignored"):
+            profiling.count(profiling.FILES_PARSED)
+        data = profiling.report()
+        assert data["phases"] == {}
+        assert data["counters"] == {}
+
+    def test_nested_phases_and_counters(self, profiled):
+        with profiling.phase("info"):
+            with profiling.phase("users"):
+                profiling.count(profiling.FILES_PARSED, 2)
+            with profiling.phase("users"):
+                pass
+        data = profiling.report()
+        assert set(data["phases"]) == {"info", "info/users"}
+        assert data["phases"]["info/users"]["calls"] == 2
+        assert data["counters"] == {profiling.FILES_PARSED: 2}
+
+    def test_scan_counts_dirs_and_stats(self, profiled, tmp_path):
+        (tmp_path / "a" / "b").mkdir(parents=True)
+        (tmp_path / "a" / "one").write_bytes(b"x" * 10)
+        (tmp_path / "a" / "b" / "two").write_bytes(b"x" * 5)
+
+        assert storage._scan_tree_size(str(tmp_path / "a")) == 15
+        counters = profiling.report()["counters"]
+        assert counters[profiling.DIRS_WALKED] == 2
+        assert counters[profiling.STAT_CALLS] == 2
+
+    def test_format_report(self, profiled):
+        with profiling.phase("view"):
+            profiling.count(profiling.BYTES_READ, 42)
+        data = profiling.report()
+
+        text = profiling.format_report(data)
+        assert "  view " in text
+        assert "bytes_read" in text and "42" in text
+        assert json.loads(profiling.format_report(data, "json")) == data
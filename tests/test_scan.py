@@ -0,0 +1,133 @@
+import json
+import shutil
+import sqlite3
+
+import pytest
+import vdf
+
+from steam_vdf import scan
+
+
+def _make_home(home, games, shortcuts=()):
+    root = home / ".local" / "share" / "Steam"
+    (root / "steamapps").mkdir(parents=True)
+    (root / "config").mkdir()
+    (root / "userdata" / "22202" / "config").mkdir(parents=True)
+    for app_id, (name, size) in games.items():
+        manifest = {
+            "AppState": {
+                "appid": str(app_id),
+                "name": name,
+                "SizeOnDisk": str(size),
+            }
+        }
+        path = root / "steamapps" / f"appmanifest_{app_id}.acf"
+        path.write_text(vdf.dumps(manifest, pretty=True))
+    entries = {
+        str(i): {"AppName": name, "Exe": f'"/usr/bin/{name.lower()}"'}
+        for i, name in enumerate(shortcuts)
+    }
+    path = root / "userdata" / "22202" / "config" / "shortcuts.vdf"
+    path.write_bytes(vdf.binary_dumps({"shortcuts": entries}))
+    return root
+
+
+class TestScan:
+    @pytest.fixture
+    def homes(self, tmp_path):
+        alice = tmp_path / "alice"
+        bob = tmp_path / "bob"
+        _make_home(alice, {10: ("Game 10", 1000)}, ["RetroArch"])
+        _make_home(bob, {20: ("Game 20", 5000), 30: ("Game 30", 100)})
+        return [str(alice), str(bob), str(tmp_path / "nobody")]
+
+    def test_resolve_steam_root(self, tmp_path):
+        root = _make_home(tmp_path, {})
+        assert scan.resolve_steam_root(str(tmp_path)) == str(root)
+        assert scan.resolve_steam_root(str(root)) == str(root)
+        assert scan.resolve_steam_root(str(tmp_path / "none")) is None
+
+    def test_scan_root(self, homes):
+        report = scan.scan_root(homes[0])
+        assert "error" not in report
+        assert [game["name"] for game in report["games"]] == ["Game 10"]
+        assert report["total_game_size"] == 1000
+        [user] = report["users"]
+        assert user["user_id"] == "22202"
+        assert [s["name"] for s in user["shortcuts"]] == ["RetroArch"]
+
+        assert scan.scan_root(homes[2])["error"] == "No Steam install found"
+
+    @pytest.mark.parametrize("scan_steam_dir", [False, True])
+    def test_scan_copied_tree(self, tmp_path, scan_steam_dir):
+        original = tmp_path / "original"
+        root = _make_home(original, {10: ("Game 10", 1000)})
+        extra = original / "SteamLibrary1"
+        _make_home(extra, {20: ("Game 20", 2000)})
+        extra_steamapps = extra / ".local" / "share" / "Steam" / "steamapps"
+        shutil.move(str(extra_steamapps), str(extra / "steamapps"))
+        elsewhere = tmp_path / "elsewhere"
+        _make_home(elsewhere, {30: ("Game 30", 3000)})
+        folders = {
+            "libraryfolders": {
+                "0": {"path": str(root)},
+                "1": {"path": str(extra)},
+                "2": {"path": str(elsewhere / ".local" / "share" / "Steam")},
+            }
+        }
+        (root / "steamapps" / "libraryfolders.vdf").write_text(
+            vdf.dumps(folders, pretty=True)
+        )
+
+        # The copy still lists the libraries of the original tree
+        copy = tmp_path / "copy"
+        shutil.copytree(original, copy)
+        (copy / "SteamLibrary1" / "steamapps" / "appmanifest_20.acf").unlink()
+        copy_root = copy / ".local" / "share" / "Steam"
+
+        report = scan.scan_root(str(copy_root if scan_steam_dir else copy))
+        if scan_steam_dir:
+            # Only paths below the Steam directory can be mapped
+            assert report["libraries"] == [str(copy_root)]
+            assert report["skipped_libraries"] == [
+                str(extra),
+                str(elsewhere / ".local" / "share" / "Steam"),
+            ]
+        else:
+            assert report["libraries"] == [
+                str(copy_root),
+                str(copy / "SteamLibrary1"),
+            ]
+            assert report["skipped_libraries"] == [
+                str(elsewhere / ".local" / "share" / "Steam")
+            ]
+        assert [game["name"] for game in report["games"]] == ["Game 10"]
+
+    @pytest.mark.parametrize("jobs", [1, 2])
+    def test_scan_jsonl(self, homes, tmp_path, jobs):
+        output = tmp_path / "report.jsonl"
+        assert scan.scan(homes, output=str(output), jobs=jobs) == 1
+        reports = {
+            report["source"]: report
+            for report in map(json.loads, output.read_text().splitlines())
+        }
+        assert set(reports) == set(homes)
+        assert reports[homes[1]]["total_game_size"] == 5100
+
+    def test_scan_sqlite(self, homes, tmp_path):
+        db = tmp_path / "report.db"
+        for _ in range(2):
+            scan.scan(homes, scan.SQLITE, str(db), jobs=1)
+
+        conn = sqlite3.connect(db)
+        assert conn.execute(
+            "SELECT source, SUM(raw_size) FROM games GROUP BY source "
+            "ORDER BY source"
+        ).fetchall() == [(homes[0], 1000), (homes[1], 5100)]
+        assert conn.execute("SELECT name FROM shortcuts").fetchall() == [
+            ("RetroArch",)
+        ]
+        assert conn.execute(
+            "SELECT COUNT(*) FROM installs WHERE error IS NOT NULL"
+        ).fetchone() == (1,)
+        conn.close()
@@ -0,0 +1,156 @@
+import hashlib
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+import vdf
+
+from steam_vdf import install, snapshot
+
+
+class TestSnapshot:
+    @pytest.fixture
+    def steam_root(self, tmp_path):
+        root = tmp_path / "Steam"
+        (root / "config").mkdir(parents=True)
+        (root / "steamapps").mkdir()
+        (root / "userdata" / "22202" / "config").mkdir(parents=True)
+        self._write_manifest(root, 10, "Game 10", 1000, "1")
+        self._write_manifest(root, 20, "Game 20", 2000, "1")
+        self._write_shortcuts(root, ["RetroArch", "Lutris"])
+        return root
+
+    @staticmethod
+    def _write_manifest(root, app_id, name, size, build_id):
+        path = root / "steamapps" / f"appmanifest_{app_id}.acf"
+        manifest = {
+            "AppState": {
+                "appid": str(app_id),
+                "name": name,
+                "SizeOnDisk": str(size),
+                "buildid": build_id,
+            }
+        }
+        path.write_text(vdf.dumps(manifest, pretty=True))
+
+    @staticmethod
+    def _write_shortcuts(root, names):
+        path = root / "userdata" / "22202" / "config" / "shortcuts.vdf"
+        shortcuts = {
+            str(i): {"AppName": name, "Exe": f'"/usr/bin/{name.lower()}"'}
+            for i, name in enumerate(names)
+        }
+        path.write_bytes(vdf.binary_dumps({"shortcuts": shortcuts}))
+
+    @staticmethod
+    def _take(steam_root, previous=None):
+        steam = install.SteamInstall(
+            MagicMock(dump_vdfs=False), root=str(steam_root)
+        )
+        return snapshot.take_snapshot(steam, previous)
+
+    def test_save_and_load(self, steam_root, tmp_path):
+        path = str(tmp_path / "state.snap")
+        self._take(steam_root).save(path)
+
+        loaded = snapshot.Snapshot.load(path)
+        assert loaded.header["libraries"] == [str(steam_root)]
+        assert list(loaded.header["users"]) == ["22202"]
+        manifest = str(steam_root / "steamapps" / "appmanifest_10.acf")
+        assert loaded.files[manifest].data["build_id"] == "1"
+        assert snapshot.diff_snapshots(loaded, loaded) == []
+
+    def test_previous_snapshot_is_reused(self, steam_root):
+        first = self._take(steam_root)
+        self._write_manifest(steam_root, 20, "Game 20", 2500, "2")
+
+        with patch.object(
+            snapshot, "_extract", wraps=snapshot._extract
+        ) as extract:
+            second = self._take(steam_root, previous=first)
+        # Only the changed manifest is parsed again
+        assert extract.call_count == 1
+
+        [change] = snapshot.diff_snapshots(first, second)
+        assert change["change"] == snapshot.CHANGED
+        assert change["size_delta"] == 500
+        assert change["fields"]["build_id"] == ["1", "2"]
+        assert snapshot.format_change(change) == (
+            "~ game Game 20 (ID: 20): size +500 Bytes, build 1 -> 2"
+        )
+
+    def test_data_matches_hash(self, steam_root):
+        path = steam_root / "userdata" / "22202" / "config" / "shortcuts.vdf"
+        hashed = path.read_bytes()
+        read_file = snapshot._hash_file
+
+        def hash_then_change(file_path):
+            result = read_file(file_path)
+            if file_path == str(path):
+                # The file is rewritten right after it was hashed
+                self._write_shortcuts(steam_root, ["Heroic"])
+            return result
+
+        with patch.object(snapshot, "_hash_file", hash_then_change):
+            taken = self._take(steam_root)
+
+        entry = taken.files[str(path)]
+        assert entry.digest == hashlib.sha1(hashed).hexdigest()
+        names = [s["name"] for s in entry.data["shortcuts"]]
+        assert names == ["RetroArch", "Lutris"]
+
+    def test_malformed_manifest(self, steam_root):
+        path = steam_root / "steamapps" / "appmanifest_30.acf"
+        path.write_text(
+            '"AppState"\n{\n\t"appid"\t\t"30"\n\t"name"\t\t"Game 30"\n'
+            '\t"SizeOnDisk"\t\t""\n\t"LastUpdated"\t\t"soon"\n}\n'
+        )
+
+        taken = self._take(steam_root)
+
+        data = taken.files[str(path)].data
+        assert (data["name"], data["size"], data["last_updated"]) == (
+            "Game 30",
+            0,
+            0,
+        )
+        manifest = str(steam_root / "steamapps" / "appmanifest_10.acf")
+        assert taken.files[manifest].data["size"] == 1000
+
+    @pytest.mark.parametrize(
+        "persona_name,account_name,expected",
+        [
+            ("Test User", "test", "+ user 22202 (Test User)"),
+            (None, "test", "+ user 22202 (test)"),
+            (None, None, "+ user 22202"),
+        ],
+    )
+    def test_format_user_change(self, persona_name, account_name, expected):
+        change = {
+            "change": snapshot.ADDED,
+            "type": "user",
+            "user_id": "22202",
+            "persona_name": persona_name,
+            "account_name": account_name,
+        }
+        assert snapshot.format_change(change) == expected
+
+    def test_diff(self, steam_root, capsys):
+        before = self._take(steam_root)
+        (steam_root / "steamapps" / "appmanifest_10.acf").unlink()
+        self._write_manifest(steam_root, 30, "Game 30", 3000, "1")
+        self._write_shortcuts(steam_root, ["RetroArch", "Heroic"])
+        after = self._take(steam_root)
+
+        changes = snapshot.diff_snapshots(before, after)
+        summary = {(c["change"], c["type"], c.get("name")) for c in changes}
+        assert summary == {
+            ("removed", "game", "Game 10"),
+            ("added", "game", "Game 30"),
+            ("added", "shortcut", "Heroic"),
+            ("removed", "shortcut", "Lutris"),
+        }
+
+        snapshot.write_diff(changes, "ndjson")
+        lines = capsys.readouterr().out.splitlines()
+        assert [json.loads(line) for line in lines] == changes
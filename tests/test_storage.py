@@ -0,0 +1,137 @@
+import os
+import shutil
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from steam_vdf import cache, storage
+
+
+class TestStorage:
+    @pytest.fixture
+    def home_tree(self, tmp_path):
+        steam = tmp_path / "Steam"
+        (steam / "steamapps").mkdir(parents=True)
+        (steam / "big.bin").write_bytes(b"x" * 4096)
+
+        docs = tmp_path / "Documents"
+        (docs / "nested" / "deeper").mkdir(parents=True)
+        (docs / "a.txt").write_bytes(b"a" * 100)
+        (docs / "nested" / "b.txt").write_bytes(b"b" * 200)
+        (docs / "nested" / "deeper" / "c.txt").write_bytes(b"c" * 300)
+        os.symlink(docs / "a.txt", docs / "link.txt")
+        os.symlink(steam, docs / "nested" / "steam-link")
+
+        (tmp_path / "Empty").mkdir()
+        return tmp_path
+
+    def test_get_directory_sizes(self, home_tree):
+        result = storage.get_directory_sizes(
+            [str(home_tree / "Documents"), str(home_tree / "Empty")]
+        )
+
+        assert len(result) == 1
+        assert result[0]["path"] == str(home_tree / "Documents")
+        assert result[0]["raw_size"] == 600
+        assert result[0]["size"] == "600 Bytes"
+
+    def test_get_non_steam_usage_excludes_steam(self, home_tree):
+        result = storage.get_non_steam_usage(str(home_tree / "Steam"))
+
+        assert [item["path"] for item in result] == [
+            str(home_tree / "Documents")
+        ]
+        assert result[0]["raw_size"] == 600
+
+    def test_get_directory_sizes_with_index(self, home_tree, tmp_path_factory):
+        db_path = tmp_path_factory.mktemp("cache") / "index.sqlite3"
+        docs = str(home_tree / "Documents")
+
+        with cache.SizeIndex(str(db_path)) as index:
+            cold = storage.get_directory_sizes([docs], index=index)
+        assert cold[0]["raw_size"] == 600
+
+        # Unchanged directories are served from the index without listing
+        with cache.SizeIndex(str(db_path)) as index, patch(
+            "os.scandir", wraps=os.scandir
+        ) as mock_scandir:
+            warm = storage.get_directory_sizes([docs], index=index)
+        assert warm == cold
+        listed = [call.args[0] for call in mock_scandir.call_args_list]
+        assert listed == [docs]
+
+        # A removed subtree invalidates its parent and is dropped
+        shutil.rmtree(home_tree / "Documents" / "nested" / "deeper")
+        with cache.SizeIndex(str(db_path)) as index:
+            updated = storage.get_directory_sizes([docs], index=index)
+            assert index.stored_subdirs(docs + "/nested/deeper") is None
+        assert updated[0]["raw_size"] == 300
+
+    def test_top_n_keeps_largest(self):
+        top = storage.TopN(3)
+        for size in [5, 1, 9, 3, 9, 7, 2]:
+            top.push({"raw_size": size})
+
+        assert [item["raw_size"] for item in top.largest()] == [9, 9, 7]
+        assert top.count == 7
+        assert top.total == 36
+
+    @staticmethod
+    def _write_manifest(library, app_id, size):
+        steamapps = library / "steamapps"
+        steamapps.mkdir(parents=True, exist_ok=True)
+        (steamapps / f"appmanifest_{app_id}.acf").write_text(
+            '"AppState"\n{\n'
+            f'\t"appid"\t\t"{app_id}"\n'
+            f'\t"name"\t\t"Game {app_id}"\n'
+            f'\t"SizeOnDisk"\t\t"{size}"\n'
+            "}\n"
+        )
+
+    def test_iter_installed_games(self, tmp_path):
+        self._write_manifest(tmp_path, 10, 1000)
+        self._write_manifest(tmp_path, 20, 2000)
+        (tmp_path / "steamapps" / "libraryfolders.vdf").write_text(
+            '"libraryfolders"\n{\n}\n'
+        )
+
+        games = storage.iter_installed_games(str(tmp_path))
+        assert not isinstance(games, list)
+        assert sorted(game["app_id"] for game in games) == ["10", "20"]
+
+    def test_get_installed_games_all(self, tmp_path):
+        main, sdcard, empty = (
+            tmp_path / "main",
+            tmp_path / "sdcard",
+            tmp_path / "empty",
+        )
+        self._write_manifest(main, 10, 1000)
+        self._write_manifest(sdcard, 20, 2000)
+        # Stale duplicate on the second library
+        self._write_manifest(sdcard, 10, 5)
+        empty.mkdir()
+
+        games = storage.get_installed_games_all(
+            [str(main), str(sdcard), str(empty)], max_workers=2
+        )
+
+        by_id = {game["app_id"]: game for game in games}
+        assert sorted(by_id) == ["10", "20"]
+        assert by_id["10"]["library"] == str(main)
+        assert by_id["10"]["raw_size"] == 1000
+        assert by_id["20"]["library"] == str(sdcard)
+
+    @pytest.mark.parametrize(
+        "function", [storage.analyze_storage, storage.collect_storage]
+    )
+    def test_index_closed_on_error(self, tmp_path, function):
+        index = MagicMock()
+        args = MagicMock(no_cache=False, all=False)
+        with patch.object(
+            cache.SizeIndex, "open_default", return_value=index
+        ), patch.object(
+            storage, "_read_games", side_effect=OSError("unreadable")
+        ):
+            with pytest.raises(OSError):
+                function(args, str(tmp_path))
+        index.close.assert_called_once_with()
@@ -1,8 +1,10 @@
+import json
 from unittest.mock import MagicMock, mock_open, patch
 
 import pytest
+import vdf
 
-from steam_vdf import users
+from steam_vdf import binary, users
 
 
 class TestUsers:
@@ -204,3 +206,344 @@ class TestUsers:
                 assert (
                     result is True
                 )  # Because the function continues even if shortcuts.vdf doesn't exist
+
+    def test_list_shortcuts_reads_binary_file(
+        self, tmp_path, capsys, mock_shortcuts_vdf_data
+    ):
+        config_dir = tmp_path / "userdata" / "12345" / "config"
+        config_dir.mkdir(parents=True)
+        shortcuts = {
+            "shortcuts": {
+                str(idx): entry
+                for idx, entry in mock_shortcuts_vdf_data["shortcuts"].items()
+            }
+        }
+        (config_dir / "shortcuts.vdf").write_bytes(vdf.binary_dumps(shortcuts))
+
+        with patch(
+            "steam_vdf.users.get_steam_user_names",
+            return_value={},
+        ):
+            result = users.list_shortcuts(MagicMock(), str(tmp_path))
+
+        output = capsys.readouterr().out
+        assert result is True
+        assert "Name: Custom Game 1" in output
+        assert "Executable: /path/to/game2.exe" in output
+        assert "App ID: 234567" in output
+
+    @pytest.mark.parametrize("output", ["json", "ndjson"])
+    def test_list_shortcuts_structured(
+        self, tmp_path, capsys, mock_shortcuts_vdf_data, output
+    ):
+        config_dir = tmp_path / "userdata" / "12345" / "config"
+        config_dir.mkdir(parents=True)
+        shortcuts = {
+            "shortcuts": {
+                str(idx): entry
+                for idx, entry in mock_shortcuts_vdf_data["shortcuts"].items()
+            }
+        }
+        (config_dir / "shortcuts.vdf").write_bytes(vdf.binary_dumps(shortcuts))
+
+        with patch(
+            "steam_vdf.users.get_steam_user_names",
+            return_value={
+                "12345": {"PersonaName": "Test User", "AccountName": "test"}
+            },
+        ):
+            args = MagicMock(output=output)
+            assert users.list_shortcuts(args, str(tmp_path)) is True
+
+        text = capsys.readouterr().out
+        if output == "json":
+            [account] = json.loads(text)["users"]
+            assert account["persona_name"] == "Test User"
+            names = [shortcut["name"] for shortcut in account["shortcuts"]]
+        else:
+            records = [json.loads(line) for line in text.splitlines()]
+            assert records[0]["type"] == "user"
+            assert {record["user_id"] for record in records} == {"12345"}
+            names = [record["name"] for record in records[1:]]
+        assert names == ["Custom Game 1", "Custom Game 2"]
+
+    @pytest.mark.parametrize("existing", [0, 1, 50])
+    def test_append_shortcut(self, tmp_path, existing):
+        shortcuts_vdf = tmp_path / "shortcuts.vdf"
+        shortcuts = {
+            "shortcuts": {
+                str(idx): {"appname": f"Game {idx}", "tags": {"0": "x"}}
+                for idx in range(existing)
+            }
+        }
+        shortcuts_vdf.write_bytes(vdf.binary_dumps(shortcuts))
+        new_entry = {"appname": "New Game", "exe": '"/bin/true"', "tags": {}}
+
+        index = users.append_shortcut(str(shortcuts_vdf), new_entry)
+
+        assert index == existing
+        shortcuts["shortcuts"][str(existing)] = new_entry
+        assert shortcuts_vdf.read_bytes() == vdf.binary_dumps(shortcuts)
+
+    def test_append_shortcut_out_of_order_keys(self, tmp_path):
+        shortcuts_vdf = tmp_path / "shortcuts.vdf"
+        shortcuts = {
+            "shortcuts": {
+                "0": {"appname": "A"},
+                "2": {"appname": "C"},
+                "1": {"appname": "B"},
+            }
+        }
+        shortcuts_vdf.write_bytes(vdf.binary_dumps(shortcuts))
+
+        index = users.append_shortcut(
+            str(shortcuts_vdf), {"appname": "D", "tags": {}}
+        )
+
+        assert index == 3
+        loaded = vdf.binary_loads(shortcuts_vdf.read_bytes())["shortcuts"]
+        assert {key: entry["appname"] for key, entry in loaded.items()} == {
+            "0": "A",
+            "2": "C",
+            "1": "B",
+            "3": "D",
+        }
+
+    def test_append_shortcut_without_shortcuts_map(self, tmp_path):
+        shortcuts_vdf = tmp_path / "shortcuts.vdf"
+        shortcuts_vdf.write_bytes(b"")
+
+        index = users.append_shortcut(str(shortcuts_vdf), {"appname": "A"})
+
+        assert index == 0
+        assert vdf.binary_loads(shortcuts_vdf.read_bytes()) == {
+            "shortcuts": {"0": {"appname": "A"}}
+        }
+
+    @pytest.fixture
+    def steam_root(self, tmp_path):
+        for user in ("111", "222"):
+            (tmp_path / "userdata" / user / "config").mkdir(parents=True)
+        existing = {
+            "shortcuts": {
+                "0": {"AppName": "RetroArch", "Exe": '"/usr/bin/retroarch"'}
+            }
+        }
+        (
+            tmp_path / "userdata" / "111" / "config" / "shortcuts.vdf"
+        ).write_bytes(vdf.binary_dumps(existing))
+        return tmp_path
+
+    def test_import_shortcuts_csv(self, steam_root, tmp_path_factory):
+        import_file = tmp_path_factory.mktemp("import") / "shortcuts.csv"
+        import_file.write_text(
+            "name,exe,launch_options,tags\n"
+            "RetroArch,/usr/bin/retroarch,,\n"
+            "Dolphin,/usr/bin/dolphin-emu,-b,emulator;gamecube\n"
+        )
+        args = MagicMock(file=str(import_file), format=None, user=None)
+
+        added = users.import_shortcuts(args, str(steam_root))
+
+        assert added == 3
+        first = binary.load(
+            str(steam_root / "userdata/111/config/shortcuts.vdf")
+        )["shortcuts"]
+        second = binary.load(
+            str(steam_root / "userdata/222/config/shortcuts.vdf")
+        )["shortcuts"]
+        # RetroArch already existed for the first user
+        assert [
+            s.get("appname", s.get("AppName")) for s in first.values()
+        ] == [
+            "RetroArch",
+            "Dolphin",
+        ]
+        assert [s["appname"] for s in second.values()] == [
+            "RetroArch",
+            "Dolphin",
+        ]
+        assert second["1"]["tags"] == {"0": "emulator", "1": "gamecube"}
+        assert second["1"]["LaunchOptions"] == "-b"
+        assert second["1"]["StartDir"] == '"/usr/bin"'
+
+    def test_import_shortcuts_invalid_writes_nothing(
+        self, steam_root, tmp_path_factory
+    ):
+        import_file = tmp_path_factory.mktemp("import") / "shortcuts.json"
+        import_file.write_text(
+            '[{"name": "Good", "exe": "/usr/bin/good"},'
+            ' {"name": "", "exe": "relative/path", "colour": "red"}]'
+        )
+        args = MagicMock(file=str(import_file), format=None, user=["222"])
+
+        assert users.import_shortcuts(args, str(steam_root)) == 0
+        assert not (steam_root / "userdata/222/config/shortcuts.vdf").exists()
+
+    def test_import_shortcuts_skips_corrupt_file(
+        self, steam_root, tmp_path_factory
+    ):
+        corrupt = steam_root / "userdata/111/config/shortcuts.vdf"
+        corrupt.write_bytes(corrupt.read_bytes()[:-3])
+        import_file = tmp_path_factory.mktemp("import") / "shortcuts.json"
+        import_file.write_text('[{"name": "Good", "exe": "/usr/bin/good"}]')
+        args = MagicMock(file=str(import_file), format=None, user=None)
+
+        assert users.import_shortcuts(args, str(steam_root)) == 1
+        second = binary.load(
+            str(steam_root / "userdata/222/config/shortcuts.vdf")
+        )["shortcuts"]
+        assert [s["appname"] for s in second.values()] == ["Good"]
+
+    def test_validate_shortcut_rows(self):
+        entries, errors = users.validate_shortcut_rows(
+            [
+                {"name": "A", "exe": "/a", "tags": ["x"], "hidden": True},
+                {"name": "A", "exe": "/a"},
+                {"name": "B"},
+                "not an object",
+            ]
+        )
+
+        assert len(entries) == 1
+        assert entries[0]["IsHidden"] == 1
+        assert errors == [
+            "Entry 2: duplicate of an earlier entry",
+            "Entry 3: missing exe",
+            "Entry 4: expected an object",
+        ]
+
+    @pytest.fixture
+    def many_shortcuts(self, tmp_path):
+        config = tmp_path / "userdata" / "111" / "config"
+        config.mkdir(parents=True)
+        data = {
+            "shortcuts": {
+                "0": {
+                    "appid": -100,
+                    "AppName": "RetroArch",
+                    "Exe": '"/usr/bin/retroarch"',
+                },
+                "1": {
+                    "appid": -200,
+                    "AppName": "Dolphin",
+                    "Exe": '"/usr/bin/dolphin-emu"',
+                    "tags": {"0": "emulator"},
+                },
+                "2": {
+                    "appid": -300,
+                    "AppName": "Heroic",
+                    "Exe": '"/opt/heroic/heroic"',
+                },
+            }
+        }
+        (config / "shortcuts.vdf").write_bytes(vdf.binary_dumps(data))
+        return tmp_path
+
+    @pytest.mark.parametrize(
+        "pattern,remaining",
+        [
+            ("^retro", ["Dolphin", "Heroic"]),
+            (str(-200 & 0xFFFFFFFF), ["RetroArch", "Heroic"]),
+            ("-300", ["RetroArch", "Dolphin"]),
+            ("/usr/bin/*", ["Heroic"]),
+        ],
+    )
+    def test_delete_matching_shortcuts(
+        self, many_shortcuts, pattern, remaining
+    ):
+        path = many_shortcuts / "userdata/111/config/shortcuts.vdf"
+        args = MagicMock(match=pattern, user=None, dry_run=False)
+
+        with patch.object(
+            binary, "atomic_write", wraps=binary.atomic_write
+        ) as write:
+            deleted = users.delete_matching_shortcuts(
+                args, str(many_shortcuts)
+            )
+
+        assert deleted == 3 - len(remaining)
+        assert write.call_count == 1
+        shortcuts = binary.load(str(path))["shortcuts"]
+        # Indices are compacted and untouched entries are kept intact
+        assert list(shortcuts) == [str(i) for i in range(len(remaining))]
+        assert [s["AppName"] for s in shortcuts.values()] == remaining
+        if "Dolphin" in remaining:
+            dolphin = shortcuts[str(remaining.index("Dolphin"))]
+            assert dolphin["tags"] == {"0": "emulator"}
+
+    def test_delete_shortcut(self, many_shortcuts):
+        path = many_shortcuts / "userdata/111/config/shortcuts.vdf"
+
+        with patch(
+            "builtins.input", side_effect=["1", "2", "y"]
+        ), patch.object(
+            users, "_get_user_names", return_value={}
+        ), patch.object(
+            binary, "atomic_write", wraps=binary.atomic_write
+        ) as write:
+            assert users.delete_shortcut(MagicMock(), str(many_shortcuts))
+
+        assert write.call_count == 1
+        shortcuts = binary.load(str(path))["shortcuts"]
+        assert [s["AppName"] for s in shortcuts.values()] == [
+            "RetroArch",
+            "Heroic",
+        ]
+
+    def test_delete_matching_shortcuts_dry_run(self, many_shortcuts):
+        path = many_shortcuts / "userdata/111/config/shortcuts.vdf"
+        before = path.read_bytes()
+        args = MagicMock(match="o", user=["111"], dry_run=True)
+
+        assert users.delete_matching_shortcuts(args, str(many_shortcuts)) == 3
+        assert path.read_bytes() == before
+
+    def test_get_recent_games(self, tmp_path):
+        apps = {
+            str(i): {"LastPlayed": str(1_600_000_000 + i)} for i in range(8)
+        }
+        apps["99"] = {"Playtime": "10"}
+        apps["100"] = {"LastPlayed": "not a number"}
+        config = tmp_path / "123" / "config" / "localconfig.vdf"
+        config.parent.mkdir(parents=True)
+        config.write_text(
+            vdf.dumps(
+                {
+                    "UserLocalConfigStore": {
+                        "Software": {"Valve": {"Steam": {"apps": apps}}}
+                    }
+                }
+            )
+        )
+
+        games = users.get_recent_games(str(tmp_path), "123")
+        assert [game["app_id"] for game in games] == ["7", "6", "5", "4", "3"]
+
+        # Served from the cache until the file changes
+        with patch("steam_vdf.users.read_recent_games") as read:
+            assert users.get_recent_games(str(tmp_path), "123") == games
+            read.assert_not_called()
+
+        config.write_text(
+            vdf.dumps(
+                {
+                    "UserLocalConfigStore": {
+                        "Software": {
+                            "Valve": {
+                                "Steam": {
+                                    "apps": {
+                                        "42": {"LastPlayed": "1700000000"}
+                                    }
+                                }
+                            }
+                        }
+                    }
+                }
+            )
+        )
+        games = users.get_recent_games(str(tmp_path), "123")
+        assert [game["app_id"] for game in games] == ["42"]
+
+    def test_get_recent_games_missing_file(self, tmp_path):
+        assert users.get_recent_games(str(tmp_path), "123") == []
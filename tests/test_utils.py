@@ -0,0 +1,29 @@
+import io
+
+import pytest
+
+from steam_vdf import utils
+
+
+class TestUtils:
+    def test_write_hex_dump_window(self, tmp_path):
+        path = tmp_path / "data.bin"
+        path.write_bytes(b"\x00" * 32 + b"hello, world" + b"\xff" * 20)
+        out = io.StringIO()
+
+        utils.write_hex_dump(str(path), offset=32, length=12, out=out)
+
+        assert out.getvalue() == (
+            "00000020  68 65 6c 6c 6f 2c 20 77 6f 72 6c 64"
+            + " " * 13
+            + "  |hello, world|\n"
+        )
+
+    @pytest.mark.parametrize("offset,length", [(64, None), (10, 0)])
+    def test_write_hex_dump_empty_window(self, tmp_path, offset, length):
+        path = tmp_path / "data.bin"
+        path.write_bytes(b"\x01" * 64)
+        out = io.StringIO()
+
+        utils.write_hex_dump(str(path), offset=offset, length=length, out=out)
+        assert out.getvalue() == ""